@@ -215,7 +215,46 @@ def main():
         st.markdown(f"**Gemini:** {gemini_status}")
         st.markdown(f"**OpenAI:** {openai_status}")  
         st.markdown(f"**Claude:** {anthropic_status}")
+
+        cache_stats = ai_manager.response_cache.stats()
+        st.caption(
+            f"⚡ Response cache: {cache_stats['entries']} entries, "
+            f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
         
+        # Live provider health: requests skip providers whose circuit is open
+        state_icons = {'closed': '🟢', 'half_open': '🟡', 'open': '🔴'}
+        for provider, health in ai_manager.provider_status().items():
+            if health['calls']:
+                st.caption(
+                    f"{state_icons.get(health['state'], '⚪')} {provider.title()}: {health['state'].replace('_', '-')} circuit, "
+                    f"~{health['latency_ms']} ms, {health['failures']}/{health['calls']} failed"
+                )
+            
+            # Client-side rate limits shared by every session, and today's token budget
+            rate_limit = health['rate_limit']
+            if rate_limit:
+                budget = f" of {rate_limit['daily_tokens']:,}" if rate_limit['daily_tokens'] else ""
+                st.caption(
+                    f"🎟️ {provider.title()}: {rate_limit['tokens_today']:,}{budget} tokens today, "
+                    f"{rate_limit['requests_available']}/{rate_limit['rpm']} requests free this minute"
+                )
+
+        # Hedged requests: a slow provider gets a backup request to the next one after its p95 latency
+        ai_manager.hedging = st.checkbox(
+            "🏁 Hedge slow AI requests",
+            key="hedge_ai_requests",
+            help="Data insights and ticket classification also ask a second provider when the first is slower than usual; chat answers about the data then appear all at once instead of streaming"
+        )
+        hedge_stats = ai_manager.hedge_tracker.stats()
+        if hedge_stats['requests']:
+            st.caption(
+                f"🏁 Hedging: {hedge_stats['hedge_rate']:.0%} of {hedge_stats['requests']} requests hedged, "
+                f"{hedge_stats['backup_wins']} won by the backup; p99 {hedge_stats['p99_ms']} ms "
+                f"vs ~{hedge_stats['primary_p99_ms']} ms on the primary alone"
+            )
+
         # Debug info
         if hasattr(ai_manager, 'available_keys'):
             if any(ai_manager.available_keys.values()) and not any([gemini_working, openai_working, anthropic_working]):
@@ -240,6 +279,9 @@ def main():
         show_smart_ticketing()
     elif page == "📊 Chat With Data Analytics":
         show_chat_with_data()
+    
+    # The page has rendered with only the data it needed; parse the rest in the background
+    data_processor.prefetch()
 
 def show_dashboard(data_processor):
     """Show comprehensive enterprise dashboard"""
@@ -0,0 +1,89 @@
+"""Startup benchmark: eager vs lazy loading, with and without the binary snapshot cache.
+
+Cold runs parse the JSON sources, warm runs read the snapshots; lazy loading is compared with
+eager loading in the same state, so the two gains are reported separately. The benchmark works
+on a temporary copy of data/ and never touches the snapshots of the working tree.
+
+Run from the repository root:
+
+    python benchmarks/data_loading_benchmark.py --repeats 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.data_processor import DataProcessor
+from utils.data_snapshot import SNAPSHOT_DIRNAME
+
+# What the first render of each page touches
+PAGES = {
+    'Executive Dashboard': lambda dp: dp.get_summary_stats(),
+    'Chat With Data': lambda dp: dp.get_service_areas(),
+    'Smart Ticketing': lambda dp: dp.get_ticket_categories(),
+    'HR Assistant': lambda dp: (dp.get_hr_policies(), dp.get_employees_dataframe()),
+}
+
+
+def clear_snapshots():
+    """Remove data/.snapshots (of the temporary copy) so the next load parses the JSON sources"""
+    shutil.rmtree(os.path.join('data', SNAPSHOT_DIRNAME), ignore_errors=True)
+
+
+def median_seconds(run, repeats: int, cold: bool = False) -> float:
+    """Median wall time of run() over fresh DataProcessor instances"""
+    samples = []
+    for _ in range(repeats):
+        if cold:
+            clear_snapshots()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run_benchmark(repeats: int):
+    """Print eager and lazy timings, cold and warm; expects to run inside a copy of the repository data"""
+    eager_cold = median_seconds(lambda: DataProcessor().load_all_data(), repeats, cold=True)
+    DataProcessor().load_all_data()
+    eager_warm = median_seconds(lambda: DataProcessor().load_all_data(), repeats)
+    construct = median_seconds(DataProcessor, repeats)
+
+    print(f"{'eager load, parsing JSON:':38s} {eager_cold * 1000:8.1f} ms")
+    print(f"{'eager load, from snapshots:':38s} {eager_warm * 1000:8.1f} ms  ({eager_cold / eager_warm:5.1f}x faster)")
+    print(f"{'lazy construction:':38s} {construct * 1000:8.1f} ms")
+    for page, first_render in PAGES.items():
+        lazy_cold = median_seconds(lambda: first_render(DataProcessor()), repeats, cold=True)
+        DataProcessor().load_all_data()
+        lazy_warm = median_seconds(lambda: first_render(DataProcessor()), repeats)
+        print(f"{'lazy first view, ' + page + ':':38s} "
+              f"cold {lazy_cold * 1000:7.1f} ms ({eager_cold / lazy_cold:5.1f}x vs eager)  "
+              f"warm {lazy_warm * 1000:7.1f} ms ({eager_warm / lazy_warm:5.1f}x vs eager)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    # Snapshots are created and deleted between runs, so work on a copy of data/ (without its own
+    # snapshots or ticket database) and leave the working tree alone
+    source = os.path.abspath('data')
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copytree(source, os.path.join(workdir, 'data'),
+                        ignore=shutil.ignore_patterns(SNAPSHOT_DIRNAME, 'tickets.db*', 'index'))
+        os.chdir(workdir)
+        try:
+            run_benchmark(args.repeats)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Batch technician assignment benchmark on synthetic rosters built from the real technicians.
+
+Run from the repository root:
+
+    python benchmarks/technician_assignment_benchmark.py --technicians 300 --tickets 3000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.technician_assignment import AREA_ZONES, CATEGORY_SPECIALTIES, PRIORITY_WEIGHTS, TechnicianAssigner
+
+
+def synthetic_batch(n_technicians: int, n_tickets: int, seed: int) -> tuple:
+    """Clone the roster in data/tickets.json up to n_technicians and draw random open tickets"""
+    rng = random.Random(seed)
+    with open(os.path.join('data', 'tickets.json'), 'r', encoding='utf-8') as file:
+        roster = json.load(file)['technicians']
+
+    technicians = []
+    for i in range(n_technicians):
+        tech = dict(rng.choice(roster), name=f"Technician {i}", id=f"TECH{i:04d}")
+        tech['current_workload'] = rng.randint(0, tech['max_capacity'] - 1)
+        technicians.append(tech)
+
+    tickets = [
+        {
+            'id': f"TKT{i:05d}",
+            'category': rng.choice(list(CATEGORY_SPECIALTIES)),
+            'area': rng.choice(list(AREA_ZONES)),
+            'priority': rng.choice(list(PRIORITY_WEIGHTS))
+        }
+        for i in range(n_tickets)
+    ]
+    return technicians, tickets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--technicians', type=int, default=300)
+    parser.add_argument('--tickets', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    technicians, tickets = synthetic_batch(args.technicians, args.tickets, args.seed)
+    assigner = TechnicianAssigner(technicians)
+    free_slots = sum(max(tech['max_capacity'] - tech['current_workload'], 0) for tech in assigner.technicians)
+
+    start = time.perf_counter()
+    results = assigner.assign(tickets)
+    elapsed = time.perf_counter() - start
+
+    assigned = [result for result in results if result['technician']]
+    waiting = {}
+    for result in results:
+        if not result['technician']:
+            priority = result['ticket']['priority']
+            waiting[priority] = waiting.get(priority, 0) + 1
+
+    print(f"{len(assigner.technicians)} assignable technicians, {free_slots} free slots, {len(tickets)} tickets")
+    print(f"{'assignment time:':20s} {elapsed:8.2f} s")
+    print(f"{'assigned:':20s} {len(assigned):8d}  (mean cost {sum(r['cost'] for r in assigned) / max(len(assigned), 1):.2f})")
+    print(f"{'waiting by priority:':20s} {waiting}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Throughput benchmark: single-ticket classify_ticket vs classify_tickets_batch.
+
+The descriptions come from the sample tickets the local classifier is trained on, so
+every one would be answered locally. The local path is timed on its own line; the
+provider comparison raises the local confidence threshold above 1 to force every
+ticket through the LLM.
+
+Run from the repository root with API keys in .streamlit/secrets.toml or the
+environment (GEMINI_API_KEY / OPENAI_API_KEY):
+
+    python benchmarks/ticket_classification_benchmark.py --tickets 100 --batch-size 20 --concurrency 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import streamlit as st
+from utils.ai_models import AIModelManager
+
+
+def load_descriptions(count: int) -> tuple:
+    """Build unique ticket descriptions from the sample tickets so the response cache never hits"""
+    with open('data/tickets.json', 'r', encoding='utf-8') as file:
+        tickets = json.load(file)
+    samples = [ticket['description'] for ticket in tickets['sample_tickets']]
+    return [f"{samples[i % len(samples)]} (ref #{i})" for i in range(count)], tickets['ticket_categories']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    for key in ('GEMINI_API_KEY', 'OPENAI_API_KEY', 'ANTHROPIC_API_KEY'):
+        if os.environ.get(key):
+            st.session_state[key.lower()] = os.environ[key]
+
+    manager = AIModelManager()
+    descriptions, categories = load_descriptions(args.tickets)
+
+    start = time.perf_counter()
+    for description in descriptions:
+        manager.local_classifier.classify(description, categories)
+    local_seconds = time.perf_counter() - start
+
+    # No local result is ever confident enough, so both paths below call the providers
+    manager.local_confidence_threshold = 1.01
+
+    manager.response_cache.clear()
+    start = time.perf_counter()
+    for description in descriptions:
+        manager.classify_ticket(description, categories)
+    single_seconds = time.perf_counter() - start
+
+    manager.response_cache.clear()
+    start = time.perf_counter()
+    manager.classify_tickets_batch(descriptions, categories, args.batch_size, args.concurrency)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"tickets: {args.tickets}  batch size: {args.batch_size}  concurrency: {args.concurrency}")
+    print(f"local classifier:   {local_seconds:8.2f}s  {args.tickets / local_seconds:8.1f} tickets/s")
+    print(f"single-ticket path: {single_seconds:8.2f}s  {args.tickets / single_seconds:8.1f} tickets/s")
+    print(f"batched path:       {batch_seconds:8.2f}s  {args.tickets / batch_seconds:8.1f} tickets/s")
+    print(f"speedup:            {single_seconds / batch_seconds:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
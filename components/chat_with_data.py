@@ -6,11 +6,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 from utils.ui_components import UIComponents
 from utils.data_processor import get_data_processor
 from utils.ai_models import get_ai_manager
+from utils.context_retrieval import get_data_retriever
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-import time
-import random
 
 def render_chat_with_data():
     """Render Chat with Data page"""
@@ -193,23 +192,22 @@ def process_data_query(user_input, data_processor, ai_manager):
         'content': user_input
     })
     
-    # Show processing indicator
-    with st.spinner("📊 Analyzing data..."):
-        # Prepare data context based on query
-        data_context = prepare_data_context(user_input, data_processor)
-        
-        # Generate AI response
-        response = ai_manager.generate_data_insights(user_input, data_context)
-        
-        # Check if query needs visualization
-        chart_data = None
-        if should_create_chart(user_input):
-            chart_data = generate_chart_data(user_input, data_processor)
-        
-        # Add realistic delay
-        time.sleep(random.uniform(1, 2))
+    UIComponents.render_chat_message(user_input, is_user=True)
     
-    # Add assistant response
+    # Prepare data context based on query
+    data_context = prepare_data_context(user_input, data_processor)
+    
+    # Stream AI response as it is generated
+    with st.chat_message("assistant", avatar="📊"):
+        response = st.write_stream(ai_manager.stream_data_insights(user_input, data_context))
+    
+    # Check if query needs visualization
+    chart_data = None
+    if should_create_chart(user_input):
+        chart_data = generate_chart_data(user_input, data_processor)
+        render_chart_from_message(chart_data)
+    
+    # Add assistant response - already on screen, so no rerun needed
     assistant_message = {
         'role': 'assistant',
         'content': response
@@ -219,36 +217,17 @@ def process_data_query(user_input, data_processor, ai_manager):
         assistant_message['chart_data'] = chart_data
     
     st.session_state.data_messages.append(assistant_message)
-    st.rerun()
 
 def prepare_data_context(query, data_processor):
-    """Prepare data context based on query type"""
-    query_lower = query.lower()
+    """Prepare data context from the records and metrics most relevant to the query"""
     context = {}
     
     # Always include summary stats
     context['summary_stats'] = data_processor.get_summary_stats()
     
-    # Area/consumption related queries
-    if any(word in query_lower for word in ['area', 'consumption', 'usage', 'demand']):
-        context['service_areas'] = data_processor.get_service_areas()
-    
-    # Quality related queries
-    if any(word in query_lower for word in ['quality', 'standard', 'parameters', 'compliance']):
-        context['water_quality'] = data_processor.get_water_quality_params()
-        context['service_areas'] = data_processor.get_service_areas()
-    
-    # Trends/time series queries
-    if any(word in query_lower for word in ['trend', 'monthly', 'time', 'over time', 'growth']):
-        context['monthly_trends'] = data_processor.get_monthly_trends()
-    
-    # Infrastructure queries
-    if any(word in query_lower for word in ['infrastructure', 'plant', 'pipeline', 'facility']):
-        context['infrastructure'] = data_processor.get_infrastructure_status()
-    
-    # Operational metrics
-    if any(word in query_lower for word in ['metric', 'performance', 'operational', 'efficiency']):
-        context['operational_metrics'] = data_processor.get_operational_metrics()
+    # BM25 over every record and metric of the water data: naming an area, parameter or metric pulls in
+    # just those rows, naming a whole section (e.g. "monthly trends") pulls in all of it
+    context.update(get_data_retriever().retrieve(query))
     
     return context
 
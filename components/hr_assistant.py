@@ -6,12 +6,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 from utils.ui_components import UIComponents
 from utils.data_processor import get_data_processor
 from utils.ai_models import get_ai_manager
-import time
-import random
+from utils.context_retrieval import get_policy_retriever
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from datetime import datetime, timedelta
 
 def render_hr_assistant():
     """Render HR Assistant page"""
@@ -61,8 +59,7 @@ How can I assist you today?"""
     
     with col1:
         st.markdown("### Select Employee (Demo)")
-        employees = data_processor.get_all_employees()
-        employee_names = [emp['name'] for emp in employees]
+        employee_names = data_processor.get_employee_names()
         
         selected_name = st.selectbox(
             "Choose employee for demo",
@@ -171,10 +168,10 @@ How can I assist you today?"""
 def render_hr_analytics(data_processor):
     """Render comprehensive HR analytics and visualizations"""
     
-    # Get employee data for analytics
-    employees = data_processor.get_all_employees()
+    # Get columnar employee data for analytics
+    employees_frame = data_processor.get_employees_dataframe()
     
-    if not employees:
+    if employees_frame.empty:
         st.warning("No employee data available for analytics")
         return
     
@@ -183,14 +180,11 @@ def render_hr_analytics(data_processor):
     with col1:
         # Department Distribution
         st.markdown("### 👥 Department Distribution")
-        dept_counts = {}
-        for emp in employees:
-            dept = emp.get('department', 'Unknown')
-            dept_counts[dept] = dept_counts.get(dept, 0) + 1
+        dept_counts = data_processor.count_employees_by('department')
         
         fig_dept = px.pie(
-            values=list(dept_counts.values()),
-            names=list(dept_counts.keys()),
+            values=dept_counts.values,
+            names=dept_counts.index.astype(str),
             title="Employee Distribution by Department",
             color_discrete_sequence=px.colors.qualitative.Set3
         )
@@ -200,17 +194,12 @@ def render_hr_analytics(data_processor):
     with col2:
         # Leave Balance Analysis
         st.markdown("### 🏖️ Leave Balance Overview")
-        leave_data = []
-        for emp in employees:
-            leave_balance = emp.get('leave_balance', {})
-            leave_data.append({
-                'Employee': emp.get('name', 'Unknown'),
-                'Vacation': leave_balance.get('vacation', 0),
-                'Sick': leave_balance.get('sick', 0),
-                'Emergency': leave_balance.get('emergency', 0)
-            })
-        
-        df_leave = pd.DataFrame(leave_data)
+        df_leave = employees_frame[['name', 'vacation', 'sick', 'emergency']].rename(columns={
+            'name': 'Employee',
+            'vacation': 'Vacation',
+            'sick': 'Sick',
+            'emergency': 'Emergency'
+        })
         fig_leave = px.bar(
             df_leave.melt(id_vars=['Employee'], var_name='Leave Type', value_name='Days'),
             x='Employee',
@@ -225,21 +214,8 @@ def render_hr_analytics(data_processor):
     # Employee tenure analysis - Large charts
     st.markdown("### ⏰ Employee Tenure & Position Analysis")
     
-    # Prepare tenure data
-    tenure_data = []
-    current_date = datetime.now()
-    
-    for emp in employees:
-        hire_date = datetime.strptime(emp.get('hire_date', '2020-01-01'), '%Y-%m-%d')
-        tenure_years = (current_date - hire_date).days / 365.25
-        tenure_data.append({
-            'Employee': emp.get('name', 'Unknown'),
-            'Department': emp.get('department', 'Unknown'),
-            'Tenure_Years': round(tenure_years, 1),
-            'Position': emp.get('position', 'Unknown')
-        })
-    
-    df_tenure = pd.DataFrame(tenure_data)
+    # Prepare tenure data (vectorized over the hire_date column)
+    df_tenure = data_processor.get_tenure_dataframe()
     
     # Large Tenure Analysis Chart
     fig_tenure = px.scatter(
@@ -261,10 +237,7 @@ def render_hr_analytics(data_processor):
     st.plotly_chart(fig_tenure, use_container_width=True)
     
     # Enhanced Position Distribution - Show only meaningful positions
-    position_counts = {}
-    for emp in employees:
-        position = emp.get('position', 'Unknown')
-        position_counts[position] = position_counts.get(position, 0) + 1
+    position_counts = data_processor.count_employees_by('position').to_dict()
     
     # Filter to show only positions with 5+ employees, then group others
     major_positions = {pos: count for pos, count in position_counts.items() if count >= 5}
@@ -401,10 +374,10 @@ def render_hr_analytics(data_processor):
     with col1:
         st.markdown("#### 📊 Key HR Metrics")
         
-        total_employees = len(employees)
-        avg_vacation_balance = sum(emp.get('leave_balance', {}).get('vacation', 0) for emp in employees) / total_employees
-        avg_tenure = sum(tenure['Tenure_Years'] for tenure in tenure_data) / len(tenure_data)
-        departments = len(set(emp.get('department', 'Unknown') for emp in employees))
+        total_employees = len(employees_frame)
+        avg_vacation_balance = data_processor.get_leave_balance_stats()['vacation']['mean']
+        avg_tenure = df_tenure['Tenure_Years'].mean()
+        departments = employees_frame['department'].nunique()
         
         st.metric("Total Employees", total_employees, delta="+2")
         st.metric("Avg Vacation Balance", f"{avg_vacation_balance:.1f} days", delta="+1.2 days")
@@ -413,8 +386,7 @@ def render_hr_analytics(data_processor):
     
     with col2:
         st.markdown("#### 👤 Select Employee (Demo)")
-        employees_list = data_processor.get_all_employees()
-        employee_names = [emp['name'] for emp in employees_list]
+        employee_names = data_processor.get_employee_names()
         
         selected_name = st.selectbox(
             "Choose employee for demo",
@@ -439,10 +411,7 @@ def render_hr_analytics(data_processor):
     # Full-width Office Locations Chart
     st.markdown("### 🗺️ Manila Water Office Locations Distribution")
     
-    locations = {}
-    for emp in employees:
-        location = emp.get('location', 'Unknown')
-        locations[location] = locations.get(location, 0) + 1
+    locations = data_processor.count_employees_by('location').to_dict()
     
     # Enhanced office locations visualization - full width
     fig_locations = px.bar(
@@ -550,6 +519,15 @@ def add_quick_message(message):
 
 def process_hr_query_immediate(user_input, data_processor, ai_manager):
     """Process HR query immediately without showing spinner"""
+    # Questions the onboarding FAQ answers word for word skip the AI call
+    response = find_direct_answer(user_input, data_processor)
+    if response:
+        st.session_state.hr_messages.append({
+            'role': 'assistant',
+            'content': response
+        })
+        st.rerun()
+    
     # Get employee context
     employee_context = ""
     if st.session_state.current_employee:
@@ -586,41 +564,61 @@ def process_hr_query(user_input, data_processor, ai_manager):
         'content': user_input
     })
     
-    # Show typing indicator
-    with st.spinner("HR Assistant is thinking..."):
-        # Get employee context
-        employee_context = ""
-        if st.session_state.current_employee:
-            employee_context = f"""
-            Current Employee: {st.session_state.current_employee.get('name')}
-            Department: {st.session_state.current_employee.get('department')}
-            Position: {st.session_state.current_employee.get('position')}
-            Leave Balance: {st.session_state.current_employee.get('leave_balance')}
-            """
-        
-        # Prepare additional context based on query type
-        additional_context = prepare_hr_context(user_input, data_processor)
-        
-        # Generate AI response
-        response = ai_manager.generate_hr_response(
+    UIComponents.render_chat_message(user_input, is_user=True)
+    
+    # Questions the onboarding FAQ answers word for word skip the AI call
+    response = find_direct_answer(user_input, data_processor)
+    if response:
+        with st.chat_message("assistant", avatar="🤖"):
+            st.markdown(response)
+        st.session_state.hr_messages.append({
+            'role': 'assistant',
+            'content': response
+        })
+        return
+    
+    # Get employee context
+    employee_context = ""
+    if st.session_state.current_employee:
+        employee_context = f"""
+        Current Employee: {st.session_state.current_employee.get('name')}
+        Department: {st.session_state.current_employee.get('department')}
+        Position: {st.session_state.current_employee.get('position')}
+        Leave Balance: {st.session_state.current_employee.get('leave_balance')}
+        """
+    
+    # Prepare additional context based on query type
+    additional_context = prepare_hr_context(user_input, data_processor)
+    
+    # Stream AI response as it is generated
+    with st.chat_message("assistant", avatar="🤖"):
+        response = st.write_stream(ai_manager.stream_hr_response(
             user_input, 
             st.session_state.current_employee or {}, 
             f"{employee_context}\n{additional_context}"
-        )
-        
-        # Add some realistic delay
-        time.sleep(random.uniform(1, 2))
+        ))
     
-    # Add assistant response
+    # Add assistant response - already on screen, so no rerun needed
     st.session_state.hr_messages.append({
         'role': 'assistant',
         'content': response
     })
+
+def find_direct_answer(query, data_processor):
+    """Answer from the onboarding FAQ when the query closely restates one of its questions"""
+    # Questions about the employee's own numbers need their data, and "Tell me about ..." asks for a
+    # whole policy; both go to the assistant with the retrieved passages
+    query_lower = query.lower()
+    if query_lower.startswith('tell me about') or any(word in query_lower for word in ['balance', 'remaining', 'left', 'used']):
+        return None
     
-    st.rerun()
+    hit = data_processor.get_knowledge_index().best_answer(query)
+    if not hit:
+        return None
+    return f"**{hit['question']}**\n\n{hit['answer']}\n\n*📚 From the onboarding FAQ*"
 
 def prepare_hr_context(query, data_processor):
-    """Prepare additional context based on query type"""
+    """Prepare additional context from the policy passages most relevant to the query"""
     query_lower = query.lower()
     context = ""
     
@@ -629,20 +627,12 @@ def prepare_hr_context(query, data_processor):
         leave_policies = data_processor.get_leave_policies()
         context += f"\nLeave Policies: {leave_policies}"
     
-    # Policy-related queries
-    if any(word in query_lower for word in ['policy', 'benefit', 'insurance', 'health']):
-        policies = data_processor.get_hr_policies()
-        context += f"\nHR Policies: {policies}"
-    
-    # Onboarding queries
-    if any(word in query_lower for word in ['onboard', 'new employee', 'first day', 'start']):
-        faq = data_processor.get_onboarding_faq()
-        context += f"\nOnboarding FAQ: {faq}"
-    
-    # Training queries
-    if any(word in query_lower for word in ['training', 'development', 'course', 'learning']):
-        training_policy = data_processor.get_policy_by_name('training_programs')
-        context += f"\nTraining Information: {training_policy}"
+    # Top BM25 passages from the HR policies, onboarding FAQ and common inquiries
+    passages = get_policy_retriever().search(query)
+    if passages:
+        context += "\nRelevant HR Policy Passages:"
+        for passage in passages:
+            context += f"\n[{passage['source']}] {passage['text']}"
     
     return context
 
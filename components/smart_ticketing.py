@@ -6,6 +6,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
 from utils.ui_components import UIComponents
 from utils.data_processor import get_data_processor
 from utils.ai_models import get_ai_manager
+from utils.ticket_store import get_ticket_store
+from utils.sla_engine import get_sla_monitor
 import time
 import random
 import plotly.express as px
@@ -31,26 +33,22 @@ def render_smart_ticketing():
     </div>
     """, unsafe_allow_html=True)
     
-    # Initialize session state
-    if 'tickets' not in st.session_state:
-        st.session_state.tickets = []
-    
-    # Get data processor and AI manager
+    # Get data processor, AI manager and the shared ticket store (seeded with the sample tickets)
     data_processor = get_data_processor()
     ai_manager = get_ai_manager()
-    
-    # Load initial sample tickets
-    if not st.session_state.tickets:
-        st.session_state.tickets = data_processor.get_sample_tickets().copy()
+    ticket_store = get_ticket_store()
+    sla_monitor = get_sla_monitor(ticket_store)
     
     # Top stats dashboard
     st.markdown("## 📊 Ticket Statistics & System Status")
     
-    # Stats row
-    total_tickets = len(st.session_state.tickets)
-    new_tickets = len([t for t in st.session_state.tickets if t.get('status') == 'New'])
-    in_progress = len([t for t in st.session_state.tickets if t.get('status') == 'In Progress'])
-    resolved = len([t for t in st.session_state.tickets if t.get('status') == 'Resolved'])
+    # Stats row from the incrementally maintained counters
+    ticket_stats = ticket_store.get_stats()
+    status_counts = ticket_stats['status']
+    total_tickets = ticket_stats['total']
+    new_tickets = status_counts.get('New', 0)
+    in_progress = status_counts.get('In Progress', 0)
+    resolved = status_counts.get('Resolved', 0)
     
     col1, col2, col3, col4, col5 = st.columns(5)
     
@@ -183,7 +181,7 @@ def render_smart_ticketing():
     
     # Analytics Section
     st.markdown("## 📊 Ticketing Analytics & Performance")
-    render_ticketing_analytics(data_processor, st.session_state.tickets)
+    render_ticketing_analytics(data_processor, ticket_stats, sla_monitor)
     
     st.markdown("---")
     
@@ -191,15 +189,15 @@ def render_smart_ticketing():
     tab1, tab2, tab3 = st.tabs(["🆕 Create Ticket", "📋 Ticket Dashboard", "🤖 AI Demo"])
     
     with tab1:
-        render_create_ticket_tab(data_processor, ai_manager)
+        render_create_ticket_tab(data_processor, ai_manager, ticket_store)
     
     with tab2:
-        render_ticket_dashboard_tab()
+        render_ticket_dashboard_tab(data_processor, ticket_store, sla_monitor)
     
     with tab3:
         render_ai_demo_tab(data_processor, ai_manager)
 
-def render_create_ticket_tab(data_processor, ai_manager):
+def render_create_ticket_tab(data_processor, ai_manager, ticket_store):
     """Render create ticket tab"""
     st.markdown("### 🎫 Create New Support Ticket")
     
@@ -234,33 +232,35 @@ def render_create_ticket_tab(data_processor, ai_manager):
             submit = st.form_submit_button("🚀 Create Ticket with AI Analysis", use_container_width=True)
     
     if submit and description and customer_name and area != "Select area...":
-        create_ticket_with_ai(description, customer_name, customer_contact, area, priority, category, data_processor, ai_manager)
+        create_ticket_with_ai(description, customer_name, customer_contact, area, priority, category, data_processor, ai_manager, ticket_store)
     elif submit:
         UIComponents.render_error_message("Please fill in all required fields")
 
-def create_ticket_with_ai(description, customer_name, contact, area, priority, category, data_processor, ai_manager):
+def create_ticket_with_ai(description, customer_name, contact, area, priority, category, data_processor, ai_manager, ticket_store):
     """Create ticket with AI analysis"""
     with st.spinner("🤖 AI is analyzing the ticket..."):
         # Get ticket categories for classification
         categories = data_processor.get_ticket_categories()
         
-        # AI Classification
-        classification = ai_manager.classify_ticket(description, categories)
+        # AI Classification and solution suggestion run concurrently
+        analysis = ai_manager.analyze_ticket(
+            description,
+            categories,
+            category if category != "Let AI Classify" else None
+        )
+        classification = analysis['classification']
+        solution = analysis['solution']
         
         # Use AI suggestions if user selected "Let AI Determine"
         final_category = category if category != "Let AI Classify" else classification.get('category', 'General Inquiry')
         final_priority = priority if priority != "Let AI Determine" else classification.get('priority', 'Medium')
         
-        # Find best technician
-        best_tech = data_processor.find_best_technician(final_category, area)
+        # Find best technician with spare capacity, counting the open tickets they already hold
+        workloads = data_processor.get_technician_workloads(ticket_store.count_open_by_technician())
+        best_tech = data_processor.find_best_technician(final_category, area, final_priority, workloads)
         
-        # Generate solution suggestion
-        solution = ai_manager.suggest_ticket_solution(final_category, description)
-        
-        # Create ticket
-        ticket_id = f"TKT{len(st.session_state.tickets) + 1:03d}"
+        # Create ticket; the store assigns the next ticket ID
         new_ticket = {
-            'id': ticket_id,
             'description': description,
             'customer_name': customer_name,
             'customer_contact': contact,
@@ -271,10 +271,11 @@ def create_ticket_with_ai(description, customer_name, contact, area, priority, c
             'assigned_tech': best_tech.get('name', 'Unassigned'),
             'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'ai_classification': classification,
-            'suggested_solution': solution
+            'suggested_solution': solution,
+            'ai_timings': analysis['timings']
         }
         
-        st.session_state.tickets.append(new_ticket)
+        ticket_id = ticket_store.add_ticket(new_ticket)
         
         # Show results
         st.success("✅ Ticket created successfully!")
@@ -292,19 +293,23 @@ def create_ticket_with_ai(description, customer_name, contact, area, priority, c
             
             **AI Reasoning:** {classification.get('reasoning', 'Standard classification')}
             """)
+            timings = analysis['timings']
+            st.caption(f"⚡ Analysis took {timings['wall_seconds']:.2f}s (parallel AI calls saved {timings['saved_seconds']:.2f}s)")
         
         with col2:
             st.markdown("#### 💡 AI Solution Suggestion")
             st.markdown(solution)
 
-def render_ticket_dashboard_tab():
+def render_ticket_dashboard_tab(data_processor, ticket_store, sla_monitor):
     """Render ticket dashboard tab"""
     st.markdown("### 📋 Active Tickets")
     
-    if not st.session_state.tickets:
+    if not ticket_store.count_tickets():
         st.info("No tickets available. Create a new ticket to get started!")
         return
     
+    render_auto_assignment(data_processor, ticket_store)
+    
     # Filter controls
     col1, col2, col3, col4 = st.columns(4)
     
@@ -323,46 +328,150 @@ def render_ticket_dashboard_tab():
     with col4:
         sort_by = st.selectbox("Sort by", ["Created Date", "Priority", "Status"])
     
-    # Filter tickets
-    filtered_tickets = st.session_state.tickets.copy()
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        view_mode = st.radio("View", ["📊 Table", "📋 Detailed"], horizontal=True, label_visibility="collapsed")
     
-    if status_filter != "All":
-        filtered_tickets = [t for t in filtered_tickets if t.get('status') == status_filter]
+    with col2:
+        page_size = st.selectbox("Tickets per page", [10, 25, 50, 100], index=1)
     
-    if priority_filter != "All":
-        filtered_tickets = [t for t in filtered_tickets if t.get('priority') == priority_filter]
+    # Filter and sort in SQL: newest first, most urgent first, or open work first
+    sort_keys = {"Created Date": ('created_date', True), "Priority": ('priority', False), "Status": ('status', False)}
+    sort_key, descending = sort_keys[sort_by]
+    filters = {'status': status_filter, 'priority': priority_filter, 'category': category_filter}
     
-    if category_filter != "All":
-        filtered_tickets = [t for t in filtered_tickets if t.get('category') == category_filter]
+    # Cursor stack for the current filter/sort combination; changing any of them starts again at page 1
+    page_key = (status_filter, priority_filter, category_filter, sort_by, page_size)
+    if st.session_state.get('ticket_page_key') != page_key:
+        st.session_state.ticket_page_key = page_key
+        st.session_state.ticket_page_cursors = [None]
+    cursors = st.session_state.ticket_page_cursors
+    page_number = len(cursors)
     
-    # Display tickets
-    for i, ticket in enumerate(filtered_tickets):
-        with st.expander(f"🎫 {ticket['id']} - {ticket['category']} ({ticket['priority']})", expanded=i<3):
-            UIComponents.render_ticket_status(ticket)
-            
-            # Action buttons
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                if st.button("✅ Resolve", key=f"resolve_{ticket['id']}"):
-                    update_ticket_status(ticket['id'], 'Resolved')
-            
-            with col2:
-                if st.button("⏳ In Progress", key=f"progress_{ticket['id']}"):
-                    update_ticket_status(ticket['id'], 'In Progress')
-            
-            with col3:
-                if st.button("🔄 Reopen", key=f"reopen_{ticket['id']}"):
-                    update_ticket_status(ticket['id'], 'New')
-            
-            # Show AI insights if available
-            if 'ai_classification' in ticket:
-                with st.expander("🤖 AI Insights"):
-                    st.markdown(f"**Classification Confidence:** {ticket['ai_classification'].get('confidence', 0):.0%}")
-                    st.markdown(f"**AI Reasoning:** {ticket['ai_classification'].get('reasoning', 'N/A')}")
-                    if 'suggested_solution' in ticket:
-                        st.markdown("**Suggested Solution:**")
-                        st.markdown(ticket['suggested_solution'])
+    tickets, next_cursor = ticket_store.list_tickets_page(page_size, cursors[-1], sort_key, descending, **filters)
+    total_tickets = ticket_store.count_tickets(**filters)
+    
+    if not tickets:
+        st.info("No tickets match these filters.")
+        return
+    
+    # Page navigation
+    col1, col2, col3 = st.columns([1, 3, 1])
+    
+    with col1:
+        if st.button("◀ Previous", disabled=page_number == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    
+    with col2:
+        first = (page_number - 1) * page_size + 1
+        st.caption(f"Page {page_number} · tickets {first}–{first + len(tickets) - 1} of {total_tickets}")
+    
+    with col3:
+        if st.button("Next ▶", disabled=next_cursor is None, use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
+    
+    # Display only the current page, so render cost is bounded by the page size
+    if view_mode == "📊 Table":
+        render_ticket_table(ticket_store, sla_monitor, tickets, page_number)
+    else:
+        for i, ticket in enumerate(tickets):
+            with st.expander(f"🎫 {ticket['id']} - {ticket['category']} ({ticket['priority']})", expanded=i<3):
+                render_ticket_details(ticket_store, sla_monitor, ticket)
+
+def render_auto_assignment(data_processor, ticket_store):
+    """Offer to assign every open, unassigned ticket in one optimal batch"""
+    if 'ticket_assignment_message' in st.session_state:
+        st.success(st.session_state.pop('ticket_assignment_message'))
+    
+    unassigned = ticket_store.list_tickets(descending=False, assigned_tech='Unassigned', open_only=True)
+    if not unassigned:
+        return
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        st.warning(f"⚠️ {len(unassigned)} open tickets have no technician assigned.")
+    
+    with col2:
+        if st.button("🧭 Auto-assign", use_container_width=True):
+            workloads = data_processor.get_technician_workloads(ticket_store.count_open_by_technician())
+            results = data_processor.assign_technicians(unassigned, workloads)
+            assignments = {
+                result['ticket']['id']: result['technician']['name']
+                for result in results if result['technician']
+            }
+            ticket_store.assign_technicians(assignments)
+            st.session_state.ticket_assignment_message = (
+                f"✅ Assigned {len(assignments)} tickets; {len(results) - len(assignments)} still wait for free capacity."
+            )
+            st.rerun()
+
+def render_ticket_table(ticket_store, sla_monitor, tickets, page_number):
+    """Render one compact row per ticket; selecting a row shows its details and actions"""
+    df_tickets = pd.DataFrame([{
+        'ID': ticket.get('id'),
+        'Created': ticket.get('created_date'),
+        'Priority': ticket.get('priority'),
+        'Status': ticket.get('status'),
+        'Category': ticket.get('category'),
+        'Area': ticket.get('area'),
+        'Technician': ticket.get('assigned_tech'),
+        'SLA': sla_monitor.ticket_status(ticket.get('id')).get('risk', 'Unknown'),
+        'Customer': ticket.get('customer_name')
+    } for ticket in tickets])
+    
+    event = st.dataframe(
+        df_tickets,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"ticket_table_{page_number}"
+    )
+    
+    selected_rows = event.selection.rows
+    if selected_rows:
+        render_ticket_details(ticket_store, sla_monitor, tickets[selected_rows[0]])
+    else:
+        st.caption("Select a row to see ticket details and actions.")
+
+def render_ticket_details(ticket_store, sla_monitor, ticket):
+    """Render a ticket's status card, SLA state, action buttons and AI insights"""
+    UIComponents.render_ticket_status(ticket)
+    
+    sla = sla_monitor.ticket_status(ticket['id'])
+    if sla:
+        sla_line = f"⏱️ **SLA:** {sla['risk']} · due {sla['deadline'].strftime('%Y-%m-%d %H:%M')}"
+        if sla['escalation_level']:
+            sla_line += f" · escalation level {sla['escalation_level']} ({sla['escalate_to']})"
+        st.markdown(sla_line)
+    
+    # Action buttons
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        if st.button("✅ Resolve", key=f"resolve_{ticket['id']}"):
+            update_ticket_status(ticket_store, ticket['id'], 'Resolved')
+    
+    with col2:
+        if st.button("⏳ In Progress", key=f"progress_{ticket['id']}"):
+            update_ticket_status(ticket_store, ticket['id'], 'In Progress')
+    
+    with col3:
+        if st.button("🔄 Reopen", key=f"reopen_{ticket['id']}"):
+            update_ticket_status(ticket_store, ticket['id'], 'New')
+    
+    # Show AI insights if available
+    if 'ai_classification' in ticket:
+        with st.expander("🤖 AI Insights"):
+            st.markdown(f"**Classification Confidence:** {ticket['ai_classification'].get('confidence', 0):.0%}")
+            st.markdown(f"**AI Reasoning:** {ticket['ai_classification'].get('reasoning', 'N/A')}")
+            if 'suggested_solution' in ticket:
+                st.markdown("**Suggested Solution:**")
+                st.markdown(ticket['suggested_solution'])
 
 def render_ai_demo_tab(data_processor, ai_manager):
     """Render AI demo tab"""
@@ -387,7 +496,7 @@ def render_ai_demo_tab(data_processor, ai_manager):
         # Initialize session state for demo description
         if "demo_text" not in st.session_state:
             st.session_state.demo_text = ""
-            
+        
         demo_description = st.text_area(
             "Description", 
             value=st.session_state.demo_text,
@@ -418,13 +527,14 @@ def demo_ai_classification(description, data_processor, ai_manager):
     """Demo AI classification"""
     with st.spinner("🤖 AI is analyzing..."):
         categories = data_processor.get_ticket_categories()
-        classification = ai_manager.classify_ticket(description, categories)
         
-        # Find best technician
-        best_tech = data_processor.find_best_technician(classification.get('category', ''))
+        # Classification and solution suggestion run concurrently
+        analysis = ai_manager.analyze_ticket(description, categories)
+        classification = analysis['classification']
+        solution = analysis['solution']
         
-        # Generate solution
-        solution = ai_manager.suggest_ticket_solution(classification.get('category', ''), description)
+        # Find best technician
+        best_tech = data_processor.find_best_technician(classification.get('category', ''), priority=classification.get('priority', 'Medium'))
         
         time.sleep(1)  # Realistic delay
     
@@ -444,6 +554,8 @@ def demo_ai_classification(description, data_processor, ai_manager):
         **🧠 AI Reasoning:**  
         {classification.get('reasoning', 'Standard classification applied')}
         """)
+        timings = analysis['timings']
+        st.caption(f"⚡ AI analysis: {timings['wall_seconds']:.2f}s wall clock, {timings['saved_seconds']:.2f}s saved by running classification and solution in parallel")
     
     with col2:
         st.markdown("**💡 Suggested Solution:**")
@@ -458,10 +570,10 @@ def demo_ai_classification(description, data_processor, ai_manager):
             **Status:** {best_tech.get('status')}
             """)
 
-def render_ticketing_analytics(data_processor, tickets):
+def render_ticketing_analytics(data_processor, ticket_stats, sla_monitor):
     """Render comprehensive ticketing analytics and visualizations"""
     
-    if not tickets:
+    if not ticket_stats['total']:
         st.warning("No ticket data available for analytics")
         return
     
@@ -470,10 +582,7 @@ def render_ticketing_analytics(data_processor, tickets):
     with col1:
         # Ticket Status Distribution
         st.markdown("### 🎫 Ticket Status Distribution")
-        status_counts = {}
-        for ticket in tickets:
-            status = ticket.get('status', 'Unknown')
-            status_counts[status] = status_counts.get(status, 0) + 1
+        status_counts = ticket_stats['status']
         
         fig_status = px.pie(
             values=list(status_counts.values()),
@@ -492,10 +601,7 @@ def render_ticketing_analytics(data_processor, tickets):
     with col2:
         # Priority Analysis
         st.markdown("### ⚠️ Priority Level Analysis")
-        priority_counts = {}
-        for ticket in tickets:
-            priority = ticket.get('priority', 'Medium')
-            priority_counts[priority] = priority_counts.get(priority, 0) + 1
+        priority_counts = ticket_stats['priority']
         
         fig_priority = px.bar(
             x=list(priority_counts.keys()),
@@ -518,10 +624,7 @@ def render_ticketing_analytics(data_processor, tickets):
     with col1:
         # Category Distribution
         st.markdown("### 📊 Category Analysis")
-        category_counts = {}
-        for ticket in tickets:
-            category = ticket.get('category', 'Unknown')
-            category_counts[category] = category_counts.get(category, 0) + 1
+        category_counts = ticket_stats['category']
         
         fig_cat = px.bar(
             x=list(category_counts.values()),
@@ -542,10 +645,7 @@ def render_ticketing_analytics(data_processor, tickets):
     with col2:
         # Area Distribution
         st.markdown("### 🏘️ Service Area Analysis")
-        area_counts = {}
-        for ticket in tickets:
-            area = ticket.get('area', 'Unknown')
-            area_counts[area] = area_counts.get(area, 0) + 1
+        area_counts = ticket_stats['area']
         
         fig_area = px.bar(
             x=list(area_counts.keys()),
@@ -624,10 +724,8 @@ def render_ticketing_analytics(data_processor, tickets):
                 'tickets': historical_tickets
             }
         
-        # Get today's ticket count from session state
-        today = datetime.now().date()
-        today_tickets = len([t for t in st.session_state.tickets if 
-                           datetime.strptime(t.get('created_date', ''), '%Y-%m-%d %H:%M:%S').date() == today])
+        # Get today's ticket count from the per-day counter
+        today_tickets = ticket_stats['created_day'].get(datetime.now().strftime('%Y-%m-%d'), 0)
         
         # Combine historical data with today's data
         all_dates = st.session_state.historical_ticket_data['dates'] + [datetime.now()]
@@ -746,22 +844,50 @@ def render_ticketing_analytics(data_processor, tickets):
         csat_score = 4.2
         st.metric("Customer Satisfaction", f"{csat_score}/5", delta="+0.1")
     
+    # SLA metrics from the deadline monitor
+    sla_metrics = sla_monitor.get_metrics()
+    
     with col3:
-        # SLA compliance
-        sla_compliance = 94.5
-        st.metric("SLA Compliance", f"{sla_compliance}%", delta="+2.1%")
+        # Resolved on time vs resolved late or still open past the deadline
+        sla_compliance = sla_metrics['sla_compliance']
+        st.metric(
+            "SLA Compliance",
+            f"{sla_compliance}%" if sla_compliance is not None else "—",
+            delta=f"{sla_metrics['risk']['At Risk']} at risk",
+            delta_color="off",
+            help=f"{sla_metrics['met']} resolved on time, {sla_metrics['missed']} resolved late, {sla_metrics['risk']['Breached']} open past deadline"
+        )
     
     with col4:
-        # Escalation rate
-        escalation_rate = 8.2
-        st.metric("Escalation Rate", f"{escalation_rate}%", delta="-1.3%")
+        # Tickets that reached at least the first escalation level
+        escalation_rate = sla_metrics['escalation_rate']
+        st.metric(
+            "Escalation Rate",
+            f"{escalation_rate}%" if escalation_rate is not None else "—",
+            delta=f"{sla_metrics['escalated']} escalated",
+            delta_color="off"
+        )
+    
+    render_sla_watchlist(sla_monitor, sla_metrics)
+
+def render_sla_watchlist(sla_monitor, sla_metrics):
+    """Render open tickets at risk of breaching or already breached, most overdue first"""
+    watchlist = sla_monitor.watchlist(limit=10)
+    if not watchlist:
+        return
+    
+    with st.expander(f"🚨 SLA Watchlist — {sla_metrics['risk']['Breached']} breached, {sla_metrics['risk']['At Risk']} at risk"):
+        st.dataframe(pd.DataFrame([{
+            'ID': item['id'],
+            'SLA': item['risk'],
+            'Deadline': item['deadline'].strftime('%Y-%m-%d %H:%M'),
+            'Hours Left': round(item['remaining_hours'], 1),
+            'Escalation': f"L{item['escalation_level']} · {item['escalate_to']}" if item['escalation_level'] else '—'
+        } for item in watchlist]), hide_index=True, use_container_width=True)
 
-def update_ticket_status(ticket_id, new_status):
+def update_ticket_status(ticket_store, ticket_id, new_status):
     """Update ticket status"""
-    for ticket in st.session_state.tickets:
-        if ticket['id'] == ticket_id:
-            ticket['status'] = new_status
-            break
+    ticket_store.update_status(ticket_id, new_status)
     
     UIComponents.render_success_message(f"Ticket {ticket_id} status updated to {new_status}")
     st.rerun()
\ No newline at end of file
@@ -3,127 +3,136 @@ import openai
 import anthropic
 import google.generativeai as genai
 import json
-from typing import Dict, List, Any
+import asyncio
+import hashlib
+import random
+import time
+from typing import Dict, List, Any, Callable, Iterator, Optional
+from utils.response_cache import get_response_cache
+from utils.async_runtime import get_async_runtime
+from utils.ticket_classifier import get_ticket_classifier
+from utils.provider_health import ProviderUnavailableError, get_provider_health, is_rate_limit
+from utils.context_serializer import DEFAULT_CONTEXT_TOKEN_BUDGET, serialize_context
+from utils.hedging import PRIMARY_SAMPLE_RATE, get_hedge_tracker, hedge_delay, latency_beyond
+from utils.rate_limiter import DEFAULT_COMPLETION_TOKENS, ProviderRateLimitedError, estimate_tokens, get_rate_limiter
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+OPENAI_MODEL = 'gpt-3.5-turbo'
+CLAUDE_MODEL = 'claude-3-haiku-20240307'
+PROVIDER_MODELS = {'gemini': GEMINI_MODEL, 'openai': OPENAI_MODEL, 'anthropic': CLAUDE_MODEL}
+
+# Tickets the local classifier is at least this confident about never reach an LLM
+LOCAL_CLASSIFIER_THRESHOLD = 0.6
+
+QUOTA_SOLUTION_FALLBACK = """**AI Quota Limit Reached**
+
+**Immediate Steps:**
+1. Check water pressure at multiple taps
+2. Contact Manila Water hotline: 1627
+3. Report location and duration of issue
+
+**Manila Water Actions:**
+1. Technical team will investigate within 24 hours
+2. Emergency response if affecting multiple units
+3. Water supply restoration priority
+
+**Expected Timeline:** 4-24 hours depending on cause
+
+*Note: Upgrade to paid AI plan for unlimited smart solutions.*"""
 
 class AIModelManager:
     def __init__(self):
         self.openai_client = None
         self.anthropic_client = None
         self.gemini_model = None
+        self.async_openai_client = None
+        self.async_anthropic_client = None
+        self.response_cache = get_response_cache()
+        self.async_runtime = get_async_runtime()
+        self.provider_health = get_provider_health()
+        self.rate_limiter = get_rate_limiter()
+        self.hedge_tracker = get_hedge_tracker()
+        self.health_keys = {}
+        # Optional hedged requests for data insights and ticket classification (set from the sidebar)
+        self.hedging = False
+        self.local_confidence_threshold = LOCAL_CLASSIFIER_THRESHOLD
+        self.context_token_budget = DEFAULT_CONTEXT_TOKEN_BUDGET
         self.setup_clients()
     
+    @property
+    def local_classifier(self):
+        """Local ticket classifier, refitted whenever tickets.json is reloaded"""
+        return get_ticket_classifier()
+    
     def setup_clients(self):
         """Initialize AI clients with API keys from session state or secrets"""
         try:
             # Check session state first (user input), then secrets (deployment)
             gemini_key = st.session_state.get('gemini_api_key') or st.secrets.get("GEMINI_API_KEY")
-            openai_key = st.session_state.get('openai_api_key') or st.secrets.get("OPENAI_API_KEY") 
+            openai_key = st.session_state.get('openai_api_key') or st.secrets.get("OPENAI_API_KEY")
             anthropic_key = st.session_state.get('anthropic_api_key') or st.secrets.get("ANTHROPIC_API_KEY")
             
             # Debug: Store which keys are available
             self.available_keys = {
                 'gemini': bool(gemini_key),
-                'openai': bool(openai_key), 
+                'openai': bool(openai_key),
                 'anthropic': bool(anthropic_key)
             }
             
+            # Circuit breakers are shared by every session but tracked per API key,
+            # so one user's revoked key doesn't cut off everyone else
+            for provider, key in (('gemini', gemini_key), ('openai', openai_key), ('anthropic', anthropic_key)):
+                if key:
+                    self.health_keys[provider] = f"{provider}:{hashlib.sha256(key.encode()).hexdigest()[:12]}"
+            
             if openai_key:
                 openai.api_key = openai_key
                 self.openai_client = openai.OpenAI(api_key=openai_key)
+                self.async_openai_client = openai.AsyncOpenAI(api_key=openai_key)
             
             if anthropic_key:
                 self.anthropic_client = anthropic.Anthropic(api_key=anthropic_key)
+                self.async_anthropic_client = anthropic.AsyncAnthropic(api_key=anthropic_key)
             
             if gemini_key:
                 genai.configure(api_key=gemini_key)
-                self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+                self.gemini_model = genai.GenerativeModel(GEMINI_MODEL)
         except Exception as e:
             # Store error for debugging
             self.setup_error = str(e)
             pass
     
-    def generate_hr_response(self, user_query: str, employee_data: Dict, context: str = "") -> str:
-        """Generate HR assistant response using OpenAI or Gemini"""
-        # Try Gemini first, fallback to OpenAI
-        if self.gemini_model:
-            return self.generate_hr_response_gemini(user_query, employee_data, context)
-        elif self.openai_client:
-            return self.generate_hr_response_openai(user_query, employee_data, context)
-        else:
-            return self.generate_hr_fallback_response(user_query, employee_data)
-    
-    def generate_hr_response_openai(self, user_query: str, employee_data: Dict, context: str = "") -> str:
-        """Generate HR assistant response using OpenAI"""
-        
-        system_prompt = f"""
-        You are Manila Water's HR AI Assistant. You help employees with HR-related queries.
-        
-        Employee Context: {json.dumps(employee_data, indent=2)}
-        Additional Context: {context}
-        
-        Respond professionally and helpfully. If you need to reference specific policies or procedures, 
-        mention that detailed information is available in the employee handbook.
-        Keep responses concise but informative.
-        """
-        
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_query}
-                ],
-                max_tokens=300,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"I apologize, but I'm experiencing technical difficulties. Please contact HR directly for assistance. Error: {str(e)}"
-    
-    def generate_hr_response_gemini(self, user_query: str, employee_data: Dict, context: str = "") -> str:
-        """Generate HR assistant response using Gemini"""
+    # Prompt builders - shared by the sync and async APIs
+    def _hr_prompt(self, employee_data: Dict, context: str, user_query: str = None) -> str:
+        """Build the HR assistant prompt; the user query is inlined for single-prompt providers"""
+        query_section = f"""
+        User Query: {user_query}
+        """ if user_query is not None else ""
         
-        prompt = f"""
+        return f"""
         You are Manila Water's HR AI Assistant. You help employees with HR-related queries.
         
         Employee Context: {json.dumps(employee_data, indent=2)}
         Additional Context: {context}
-        
-        User Query: {user_query}
-        
-        Respond professionally and helpfully. If you need to reference specific policies or procedures, 
+        {query_section}
+        Respond professionally and helpfully. If you need to reference specific policies or procedures,
         mention that detailed information is available in the employee handbook.
         Keep responses concise but informative.
         """
-        
-        try:
-            response = self.gemini_model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"I apologize, but I'm experiencing technical difficulties. Please contact HR directly for assistance. Error: {str(e)}"
     
-    def classify_ticket(self, ticket_description: str, categories: List[Dict]) -> Dict:
-        """Classify support ticket using Gemini, OpenAI, or fallback"""
-        # Try Gemini first, then OpenAI, then fallback
-        if self.gemini_model:
-            return self.classify_ticket_gemini(ticket_description, categories)
-        elif self.openai_client:
-            return self.classify_ticket_openai(ticket_description, categories)
-        else:
-            return {"category": "General Inquiry", "priority": "Medium", "confidence": 0.5, "reasoning": "AI classification unavailable"}
-    
-    def classify_ticket_gemini(self, ticket_description: str, categories: List[Dict]) -> Dict:
-        """Classify support ticket using Gemini"""
+    def _classification_prompt(self, categories: List[Dict], ticket_description: str = None) -> str:
+        """Build the ticket classification prompt; the description is inlined for single-prompt providers"""
         category_list = [cat["name"] for cat in categories]
+        description_section = f"""
+        Ticket Description: {ticket_description}
+        """ if ticket_description is not None else ""
         
-        prompt = f"""
+        return f"""
         You are Manila Water's ticket classification system. Classify the following ticket into one of these categories:
         {', '.join(category_list)}
         
         Also determine priority level: Critical, High, Medium, Low
-        
-        Ticket Description: {ticket_description}
-        
+        {description_section}
         Respond with JSON format:
         {{
             "category": "category_name",
@@ -132,256 +141,776 @@ class AIModelManager:
             "reasoning": "brief explanation"
         }}
         """
+    
+    def _data_insights_prompt(self, data_context: Dict, query: str = None) -> str:
+        """Build the data analytics prompt used by Gemini (with query) and Claude (without)"""
+        query_section = f"""
+        User Query: {query}
+        """ if query is not None else ""
         
-        try:
-            response = self.gemini_model.generate_content(prompt)
-            # Clean the response to extract JSON
-            response_text = response.text.strip()
-            
-            # Remove markdown code block formatting if present
-            if response_text.startswith('```json'):
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            elif response_text.startswith('```'):
-                response_text = response_text.replace('```', '').strip()
-            
-            result = json.loads(response_text)
-            return result
-        except Exception as e:
-            error_msg = str(e)
-            # Check if it's a quota limit error
-            if "quota" in error_msg.lower() or "429" in error_msg:
-                return {
-                    "category": "Water Quality Issues",  # Smart fallback based on common patterns
-                    "priority": "Medium",
-                    "confidence": 0.7,
-                    "reasoning": "AI quota limit reached - using smart pattern recognition. Upgrade to paid plan for unlimited AI classification."
-                }
-            # Fallback to OpenAI if Gemini fails for other reasons
-            elif self.openai_client:
-                return self.classify_ticket_openai(ticket_description, categories)
-            return {
-                "category": "General Inquiry",
-                "priority": "Medium", 
-                "confidence": 0.5,
-                "reasoning": f"AI services temporarily unavailable. Please classify manually."
-            }
+        return f"""
+        You are Manila Water's Data Analytics AI. You help users understand water utility data and operational metrics.
+        
+        Available Data Context (tables are pipe-separated with a header row):
+        {serialize_context(data_context, self.context_token_budget)}
+        {query_section}
+        Provide clear, actionable insights based on the data. Include specific numbers and trends when relevant.
+        If the query cannot be answered with available data, suggest what additional information might be needed.
+        Keep your response professional and focused on Manila Water's operations.
+        """
     
-    def classify_ticket_openai(self, ticket_description: str, categories: List[Dict]) -> Dict:
-        """Classify support ticket using OpenAI"""
-        if not self.openai_client:
-            return {"category": "General Inquiry", "priority": "Medium", "confidence": 0.5}
+    def _data_insights_openai_prompt(self, data_context: Dict) -> str:
+        """Build the OpenAI system prompt for data analytics"""
+        return f"""
+        You are Manila Water's Data Analytics AI assistant.
         
-        category_list = [cat["name"] for cat in categories]
+        Data Context (tables are pipe-separated with a header row):
+        {serialize_context(data_context, self.context_token_budget)}
         
-        system_prompt = f"""
-        You are Manila Water's ticket classification system. Classify the following ticket into one of these categories:
-        {', '.join(category_list)}
+        Provide data-driven insights and answer questions about Manila Water's operations.
+        """
+    
+    def _solution_prompt(self, category: str, description: str) -> str:
+        """Build the ticket solution prompt"""
+        return f"""
+        You are Manila Water's technical support AI. Suggest practical solutions for customer issues.
         
-        Also determine priority level: Critical, High, Medium, Low
+        Category: {category}
+        Issue Description: {description}
         
-        Respond with JSON format:
-        {{
-            "category": "category_name",
-            "priority": "priority_level",
-            "confidence": 0.95,
-            "reasoning": "brief explanation"
-        }}
+        Provide:
+        1. Immediate steps the customer can take
+        2. What Manila Water will do to resolve the issue
+        3. Expected timeline
+        
+        Keep response concise and actionable.
         """
+    
+    def _parse_json_response(self, response_text: str) -> Any:
+        """Parse a JSON reply, stripping markdown code fences if present"""
+        response_text = response_text.strip()
+        
+        # Remove markdown code block formatting if present
+        if response_text.startswith('```json'):
+            response_text = response_text.replace('```json', '').replace('```', '').strip()
+        elif response_text.startswith('```'):
+            response_text = response_text.replace('```', '').strip()
+        
+        return json.loads(response_text)
+    
+    def _local_classification(self, ticket_description: str, categories: List[Dict], note: str = None) -> Dict:
+        """Classify with the local TF-IDF model, optionally noting why the LLM was not used"""
+        result = self.local_classifier.classify(ticket_description, categories)
+        if note:
+            result['reasoning'] = f"{note} {result['reasoning']}"
+        return result
+    
+    def _is_quota_error(self, error: Exception) -> bool:
+        """Check whether a provider error is a quota/rate limit error, or our own limiter refused the call"""
+        return isinstance(error, ProviderRateLimitedError) or is_rate_limit(error)
+    
+    # Provider routing - circuit breakers skip failing providers, live latency and error rates pick the order
+    def _health_key(self, provider: str) -> str:
+        """Circuit breaker id of a provider for the configured API key"""
+        return self.health_keys.get(provider, provider)
+    
+    def _ranked(self, providers: List[str]) -> List[str]:
+        """Providers whose circuit is not open, fastest expected answer first; ties keep the given order"""
+        by_key = {self._health_key(provider): provider for provider in providers}
+        return [by_key[key] for key in self.provider_health.rank(list(by_key))]
+    
+    def provider_status(self) -> Dict[str, Dict]:
+        """Circuit state, live stats and rate limit usage of each configured provider"""
+        stats = self.provider_health.stats([self._health_key(provider) for provider in self.health_keys])
+        limits = self.rate_limiter.stats([self._limit_key(provider, model) for provider, model in PROVIDER_MODELS.items()])
+        return {
+            provider: dict(stats[self._health_key(provider)], rate_limit=limits.get(self._limit_key(provider, PROVIDER_MODELS[provider])))
+            for provider in self.health_keys
+        }
+    
+    def _first_success(self, attempts: Dict[str, Callable[[], Any]]) -> tuple:
+        """Try each provider's attempt in ranked order until one succeeds; returns (result, None) or (None, last error)"""
+        last_error = ProviderUnavailableError("Every configured AI provider is cooling down after failures")
+        for provider in self._ranked(list(attempts)):
+            try:
+                return attempts[provider](), None
+            except Exception as e:
+                last_error = e
+        return None, last_error
+    
+    async def _afirst_success(self, attempts: Dict[str, Callable[[], Any]]) -> tuple:
+        """Async variant of _first_success; each attempt returns a coroutine"""
+        last_error = ProviderUnavailableError("Every configured AI provider is cooling down after failures")
+        for provider in self._ranked(list(attempts)):
+            try:
+                return await attempts[provider](), None
+            except Exception as e:
+                last_error = e
+        return None, last_error
+    
+    async def _ahedged_first_success(self, attempts: Dict[str, Callable[[], Any]]) -> tuple:
+        """Hedged variant of _afirst_success: if the best provider hasn't answered within its p95 latency,
+        the same request also goes to the next one; the first valid answer wins and the other is cancelled"""
+        ranked = self._ranked(list(attempts))
+        if len(ranked) < 2:
+            return await self._afirst_success(attempts)
         
+        primary_samples = self.provider_health.latency_samples(self._health_key(ranked[0]))
+        start = time.perf_counter()
+        tasks = {asyncio.ensure_future(attempts[ranked[0]]()): ranked[0]}
+        result, winner, last_error, hedged = None, None, None, False
+        try:
+            # Inside the try so a caller cancelled or timed out while waiting still cancels the primary
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay(primary_samples))
+            hedged = not done
+            if hedged:
+                tasks[asyncio.ensure_future(attempts[ranked[1]]())] = ranked[1]
+            
+            while tasks and winner is None:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                # Invalid answers (errors, unparseable JSON) raise inside the attempt, so any result is valid
+                for task in sorted(done, key=lambda task: ranked.index(tasks[task])):
+                    provider = tasks.pop(task)
+                    if winner is None and task.exception() is None:
+                        result, winner = task.result(), provider
+                    elif task.exception() is not None:
+                        last_error = task.exception()
+        finally:
+            # Cancelling the loser releases its circuit breaker probe and returns its reserved tokens
+            for task, provider in tasks.items():
+                if winner is not None and provider == ranked[0] and random.random() < PRIMARY_SAMPLE_RATE:
+                    # Occasionally let a beaten primary finish in the background to keep measuring its tail
+                    task.add_done_callback(lambda task: task.cancelled() or task.exception())
+                else:
+                    task.cancel()
+        
+        seconds = time.perf_counter() - start
+        if winner is None:
+            # The racing calls failed: carry on with the remaining providers one at a time
+            fallback = {provider: attempts[provider] for provider in ranked[2 if hedged else 1:]}
+            if fallback:
+                result, error = await self._afirst_success(fallback)
+            else:
+                error = last_error
+            total = time.perf_counter() - start
+            self.hedge_tracker.record(total, total, hedged, False)
+            return result, error
+        
+        backup_won = winner != ranked[0]
+        primary_seconds = latency_beyond(primary_samples, seconds) if backup_won else seconds
+        self.hedge_tracker.record(seconds, primary_seconds, hedged, backup_won)
+        return result, None
+    
+    # Rate limiting - every SDK request reserves requests/tokens from the shared limiter first, queueing
+    # briefly when a provider is near its limit and raising ProviderRateLimitedError (so the router moves
+    # on to the next provider) instead of waiting for a 429
+    def _limit_key(self, provider: str, model: str) -> str:
+        """Rate limit account of a provider model for the configured API key"""
+        return f"{self._health_key(provider)}/{model}"
+    
+    def _usage_tokens(self, response: Any) -> Optional[int]:
+        """Total tokens a provider response reports (OpenAI, Claude or Gemini shape), None if it doesn't"""
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            if getattr(usage, 'total_tokens', None) is not None:
+                return usage.total_tokens
+            if getattr(usage, 'input_tokens', None) is not None:
+                return usage.input_tokens + usage.output_tokens
+        return getattr(getattr(response, 'usage_metadata', None), 'total_token_count', None)
+    
+    def _limited_call(self, provider: str, prompt: Any, max_tokens: Optional[int], call: Callable[[], Any], extract: Callable[[Any], str]) -> str:
+        """Reserve capacity, call the provider through its circuit breaker and settle the reservation to actual usage"""
+        limit_key = self._limit_key(provider, PROVIDER_MODELS[provider])
+        reserved = estimate_tokens(prompt) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+        self.rate_limiter.acquire(limit_key, provider, reserved)
+        try:
+            response = self.provider_health.call(self._health_key(provider), call)
+        except BaseException:
+            # Failed requests still count against requests per minute, but return their tokens
+            self.rate_limiter.settle(limit_key, provider, reserved, 0)
+            raise
+        self.rate_limiter.settle(limit_key, provider, reserved, self._usage_tokens(response))
+        return extract(response)
+    
+    async def _alimited_call(self, provider: str, prompt: Any, max_tokens: Optional[int], call: Callable[[], Any], extract: Callable[[Any], str]) -> str:
+        """Async variant of _limited_call; queueing waits without blocking the event loop"""
+        limit_key = self._limit_key(provider, PROVIDER_MODELS[provider])
+        reserved = estimate_tokens(prompt) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+        await self.rate_limiter.aacquire(limit_key, provider, reserved)
+        try:
+            response = await self.provider_health.acall(self._health_key(provider), call)
+        except BaseException:
+            self.rate_limiter.settle(limit_key, provider, reserved, 0)
+            raise
+        self.rate_limiter.settle(limit_key, provider, reserved, self._usage_tokens(response))
+        return extract(response)
+    
+    def _limited_stream(self, provider: str, prompt: Any, max_tokens: Optional[int], make_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Streaming variant of _limited_call; usage is settled from the length of the streamed text"""
+        limit_key = self._limit_key(provider, PROVIDER_MODELS[provider])
+        prompt_tokens = estimate_tokens(prompt)
+        reserved = prompt_tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+        self.rate_limiter.acquire(limit_key, provider, reserved)
+        chunks = []
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            for chunk in self.provider_health.stream(self._health_key(provider), make_stream):
+                if chunk:
+                    chunks.append(chunk)
+                yield chunk
+        finally:
+            self.rate_limiter.settle(limit_key, provider, reserved, prompt_tokens + estimate_tokens("".join(chunks)) if chunks else 0)
+    
+    # Provider calls - every SDK request goes through the shared response cache
+    def _call_openai(self, system_prompt: str, user_content: str, max_tokens: int, temperature: float) -> str:
+        """Call OpenAI chat completions, serving repeats from the response cache"""
+        params = {'max_tokens': max_tokens, 'temperature': temperature}
+        key = self.response_cache.make_key('openai', OPENAI_MODEL, [system_prompt, user_content], params)
+        
+        def call():
+            return self.openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": ticket_description}
+                    {"role": "user", "content": user_content}
                 ],
-                max_tokens=200,
-                temperature=0.3
+                **params
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-        except Exception as e:
-            return {
-                "category": "General Inquiry",
-                "priority": "Medium", 
-                "confidence": 0.5,
-                "reasoning": f"Auto-classification failed: {str(e)}"
-            }
-    
-    def generate_data_insights(self, query: str, data_context: Dict) -> str:
-        """Generate insights from water data using Gemini, OpenAI, or Claude"""
-        # Try Gemini first, then OpenAI, then Claude
-        if self.gemini_model:
-            return self.generate_data_insights_gemini(query, data_context)
-        elif self.openai_client:
-            return self.generate_data_insights_openai(query, data_context)
-        elif self.anthropic_client:
-            return self.generate_data_insights_claude(query, data_context)
-        else:
-            return self.generate_smart_fallback_response(query, data_context)
+        
+        return self.response_cache.get_or_call(key, lambda: self._limited_call(
+            'openai', [system_prompt, user_content], max_tokens, call, lambda response: response.choices[0].message.content
+        ))
     
-    def generate_data_insights_gemini(self, query: str, data_context: Dict) -> str:
-        """Generate data insights using Gemini"""
+    def _call_gemini(self, prompt: str) -> str:
+        """Call Gemini generate_content, serving repeats from the response cache"""
+        key = self.response_cache.make_key('gemini', GEMINI_MODEL, prompt)
         
-        prompt = f"""
-        You are Manila Water's Data Analytics AI. You help users understand water utility data and operational metrics.
+        def call():
+            return self.gemini_model.generate_content(prompt)
         
-        Available Data Context:
-        {json.dumps(data_context, indent=2)}
+        return self.response_cache.get_or_call(key, lambda: self._limited_call(
+            'gemini', prompt, None, call, lambda response: response.text
+        ))
+    
+    def _call_claude(self, content: str, max_tokens: int) -> str:
+        """Call Claude messages API, serving repeats from the response cache"""
+        params = {'max_tokens': max_tokens}
+        key = self.response_cache.make_key('anthropic', CLAUDE_MODEL, content, params)
         
-        User Query: {query}
+        def call():
+            return self.anthropic_client.messages.create(
+                model=CLAUDE_MODEL,
+                messages=[{"role": "user", "content": content}],
+                **params
+            )
         
-        Provide clear, actionable insights based on the data. Include specific numbers and trends when relevant.
-        If the query cannot be answered with available data, suggest what additional information might be needed.
-        Keep your response professional and focused on Manila Water's operations.
-        """
+        return self.response_cache.get_or_call(key, lambda: self._limited_call(
+            'anthropic', content, max_tokens, call, lambda response: response.content[0].text
+        ))
+    
+    async def _acall_openai(self, system_prompt: str, user_content: str, max_tokens: int, temperature: float) -> str:
+        """Async OpenAI chat completion sharing the response cache with the sync path"""
+        params = {'max_tokens': max_tokens, 'temperature': temperature}
+        key = self.response_cache.make_key('openai', OPENAI_MODEL, [system_prompt, user_content], params)
         
-        try:
-            response = self.gemini_model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            # Fallback to OpenAI if Gemini fails
-            if self.openai_client:
-                return self.generate_data_insights_openai(query, data_context)
-            return f"Data analysis temporarily unavailable. Error: {str(e)}"
+        async def call():
+            return await self.async_openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                **params
+            )
+        
+        return await self.response_cache.aget_or_call(key, lambda: self._alimited_call(
+            'openai', [system_prompt, user_content], max_tokens, call, lambda response: response.choices[0].message.content
+        ))
     
-    def generate_data_insights_claude(self, query: str, data_context: Dict) -> str:
-        """Generate insights from water data using Claude"""
-        system_prompt = f"""
-        You are Manila Water's Data Analytics AI. You help users understand water utility data and operational metrics.
+    async def _acall_gemini(self, prompt: str) -> str:
+        """Async Gemini generate_content sharing the response cache with the sync path"""
+        key = self.response_cache.make_key('gemini', GEMINI_MODEL, prompt)
         
-        Available Data Context:
-        {json.dumps(data_context, indent=2)}
+        async def call():
+            return await self.gemini_model.generate_content_async(prompt)
         
-        Provide clear, actionable insights based on the data. Include specific numbers and trends when relevant.
-        If the query cannot be answered with available data, suggest what additional information might be needed.
-        """
+        return await self.response_cache.aget_or_call(key, lambda: self._alimited_call(
+            'gemini', prompt, None, call, lambda response: response.text
+        ))
+    
+    async def _acall_claude(self, content: str, max_tokens: int) -> str:
+        """Async Claude messages call sharing the response cache with the sync path"""
+        params = {'max_tokens': max_tokens}
+        key = self.response_cache.make_key('anthropic', CLAUDE_MODEL, content, params)
         
-        try:
-            response = self.anthropic_client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=400,
-                messages=[
-                    {"role": "user", "content": f"Context: {system_prompt}\n\nQuery: {query}"}
-                ]
+        async def call():
+            return await self.async_anthropic_client.messages.create(
+                model=CLAUDE_MODEL,
+                messages=[{"role": "user", "content": content}],
+                **params
             )
-            return response.content[0].text
-        except Exception as e:
-            return f"Data analysis temporarily unavailable. Error: {str(e)}"
-    
-    def generate_data_insights_openai(self, query: str, data_context: Dict) -> str:
-        """Fallback data insights using OpenAI"""
-        if not self.openai_client:
-            return "Data analysis service temporarily unavailable."
         
-        system_prompt = f"""
-        You are Manila Water's Data Analytics AI assistant. 
+        return await self.response_cache.aget_or_call(key, lambda: self._alimited_call(
+            'anthropic', content, max_tokens, call, lambda response: response.content[0].text
+        ))
+    
+    # Streaming provider calls - completed streams are stored in the response cache
+    def _stream_cached(self, key: str, make_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Yield a cached response in one piece, or stream it from the provider and cache the full text"""
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
         
-        Data Context: {json.dumps(data_context, indent=2)}
+        chunks = []
+        for chunk in make_stream():
+            if chunk:
+                chunks.append(chunk)
+                yield chunk
         
-        Provide data-driven insights and answer questions about Manila Water's operations.
-        """
+        if chunks:
+            self.response_cache.set(key, "".join(chunks))
+    
+    def _stream_openai(self, system_prompt: str, user_content: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        """Stream an OpenAI chat completion token by token"""
+        params = {'max_tokens': max_tokens, 'temperature': temperature}
+        key = self.response_cache.make_key('openai', OPENAI_MODEL, [system_prompt, user_content], params)
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
+        def make_stream():
+            stream = self.openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
+                    {"role": "user", "content": user_content}
                 ],
-                max_tokens=400,
-                temperature=0.5
+                stream=True,
+                **params
             )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Data analysis error: {str(e)}"
+            for chunk in stream:
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content
+        
+        return self._stream_cached(key, lambda: self._limited_stream('openai', [system_prompt, user_content], max_tokens, make_stream))
+    
+    def _stream_gemini(self, prompt: str) -> Iterator[str]:
+        """Stream a Gemini response chunk by chunk"""
+        key = self.response_cache.make_key('gemini', GEMINI_MODEL, prompt)
+        
+        def make_stream():
+            for chunk in self.gemini_model.generate_content(prompt, stream=True):
+                yield chunk.text
+        
+        return self._stream_cached(key, lambda: self._limited_stream('gemini', prompt, None, make_stream))
+    
+    def _stream_claude(self, content: str, max_tokens: int) -> Iterator[str]:
+        """Stream a Claude response token by token"""
+        params = {'max_tokens': max_tokens}
+        key = self.response_cache.make_key('anthropic', CLAUDE_MODEL, content, params)
+        
+        def make_stream():
+            with self.anthropic_client.messages.stream(
+                model=CLAUDE_MODEL,
+                messages=[{"role": "user", "content": content}],
+                **params
+            ) as stream:
+                yield from stream.text_stream
+        
+        return self._stream_cached(key, lambda: self._limited_stream('anthropic', content, max_tokens, make_stream))
+    
+    def _stream_first_available(self, streams: List[Callable[[], Iterator[str]]], error_message: Callable[[Exception], str]) -> Iterator[str]:
+        """Yield from the first provider stream that succeeds, falling through only if nothing was emitted yet"""
+        last_error = None
+        for make_stream in streams:
+            emitted = False
+            try:
+                for chunk in make_stream():
+                    emitted = True
+                    yield chunk
+                return
+            except Exception as e:
+                last_error = e
+                if emitted:
+                    # Part of the answer is already on screen, so don't restart it on another provider
+                    yield f"\n\n*Response interrupted: {str(e)}*"
+                    return
+        
+        if last_error is not None:
+            yield error_message(last_error)
+    
+    def run_async(self, coro, timeout: float = None) -> Any:
+        """Run a coroutine on the shared event loop from synchronous Streamlit code"""
+        return self.async_runtime.run(coro, timeout)
+    
+    # Public API - every method tries the configured providers best-first, as ranked by _ranked
+    def generate_hr_response(self, user_query: str, employee_data: Dict, context: str = "") -> str:
+        """Generate HR assistant response using the healthiest of Gemini and OpenAI"""
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = lambda: self.generate_hr_response_gemini(user_query, employee_data, context)
+        if self.openai_client:
+            attempts['openai'] = lambda: self.generate_hr_response_openai(user_query, employee_data, context)
+        if not attempts:
+            return self.generate_hr_fallback_response(user_query, employee_data)
+        
+        response, error = self._first_success(attempts)
+        return response if error is None else self._hr_error_response(user_query, employee_data, error)
+    
+    def _hr_error_response(self, user_query: str, employee_data: Dict, error: Exception) -> str:
+        """HR answer when every provider failed: the local answer if they're all cooling down, else the error"""
+        if isinstance(error, ProviderUnavailableError):
+            return self.generate_hr_fallback_response(user_query, employee_data)
+        return f"I apologize, but I'm experiencing technical difficulties. Please contact HR directly for assistance. Error: {str(error)}"
+    
+    def generate_hr_response_openai(self, user_query: str, employee_data: Dict, context: str = "") -> str:
+        """Generate HR assistant response using OpenAI (raises on failure)"""
+        return self._call_openai(self._hr_prompt(employee_data, context), user_query, max_tokens=300, temperature=0.7)
+    
+    def generate_hr_response_gemini(self, user_query: str, employee_data: Dict, context: str = "") -> str:
+        """Generate HR assistant response using Gemini (raises on failure)"""
+        return self._call_gemini(self._hr_prompt(employee_data, context, user_query))
+    
+    def classify_ticket(self, ticket_description: str, categories: List[Dict]) -> Dict:
+        """Classify support ticket locally, escalating to Gemini or OpenAI only when the local model is unsure"""
+        local_result = self.local_classifier.classify(ticket_description, categories)
+        if local_result['confidence'] >= self.local_confidence_threshold:
+            return local_result
+        if self.hedging:
+            # Hedging keeps two requests in flight at once, so it runs on the async clients
+            return self.run_async(self.aclassify_ticket(ticket_description, categories))
+        
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = lambda: self.classify_ticket_gemini(ticket_description, categories)
+        if self.openai_client:
+            attempts['openai'] = lambda: self.classify_ticket_openai(ticket_description, categories)
+        if not attempts:
+            return self._local_classification(ticket_description, categories, "AI classification unavailable.")
+        
+        result, error = self._first_success(attempts)
+        return result if error is None else self._classification_error_result(ticket_description, categories, error)
+    
+    def _classification_error_result(self, ticket_description: str, categories: List[Dict], error: Exception) -> Dict:
+        """Local classification noting why every provider failed"""
+        if self._is_quota_error(error):
+            return self._local_classification(ticket_description, categories, "AI quota limit reached.")
+        if isinstance(error, ProviderUnavailableError):
+            return self._local_classification(ticket_description, categories, "AI services temporarily unavailable.")
+        return self._local_classification(ticket_description, categories, f"Auto-classification failed: {str(error)}.")
+    
+    def classify_ticket_gemini(self, ticket_description: str, categories: List[Dict]) -> Dict:
+        """Classify support ticket using Gemini (raises on failure)"""
+        return self._parse_json_response(self._call_gemini(self._classification_prompt(categories, ticket_description)))
+    
+    def classify_ticket_openai(self, ticket_description: str, categories: List[Dict]) -> Dict:
+        """Classify support ticket using OpenAI (raises on failure)"""
+        response_text = self._call_openai(self._classification_prompt(categories), ticket_description, max_tokens=200, temperature=0.3)
+        return json.loads(response_text)
+    
+    def generate_data_insights(self, query: str, data_context: Dict) -> str:
+        """Generate insights from water data using the healthiest of Gemini, OpenAI and Claude"""
+        if self.hedging:
+            return self.run_async(self.agenerate_data_insights(query, data_context))
+        
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = lambda: self.generate_data_insights_gemini(query, data_context)
+        if self.openai_client:
+            attempts['openai'] = lambda: self.generate_data_insights_openai(query, data_context)
+        if self.anthropic_client:
+            attempts['anthropic'] = lambda: self.generate_data_insights_claude(query, data_context)
+        if not attempts:
+            return self.generate_smart_fallback_response(query, data_context)
+        
+        insights, error = self._first_success(attempts)
+        return insights if error is None else self._data_insights_error_response(query, data_context, error)
+    
+    def _data_insights_error_response(self, query: str, data_context: Dict, error: Exception) -> str:
+        """Insights when every provider failed: the local analysis if they're all cooling down, else the error"""
+        if isinstance(error, ProviderUnavailableError):
+            return self.generate_smart_fallback_response(query, data_context)
+        return f"Data analysis temporarily unavailable. Error: {str(error)}"
+    
+    def generate_data_insights_gemini(self, query: str, data_context: Dict) -> str:
+        """Generate data insights using Gemini (raises on failure)"""
+        return self._call_gemini(self._data_insights_prompt(data_context, query))
+    
+    def generate_data_insights_claude(self, query: str, data_context: Dict) -> str:
+        """Generate insights from water data using Claude (raises on failure)"""
+        return self._call_claude(f"Context: {self._data_insights_prompt(data_context)}\n\nQuery: {query}", max_tokens=400)
+    
+    def generate_data_insights_openai(self, query: str, data_context: Dict) -> str:
+        """Generate data insights using OpenAI (raises on failure)"""
+        return self._call_openai(self._data_insights_openai_prompt(data_context), query, max_tokens=400, temperature=0.5)
     
     def suggest_ticket_solution(self, category: str, description: str) -> str:
-        """Suggest solution for ticket based on category using Gemini or OpenAI"""
-        # Try Gemini first, then OpenAI
+        """Suggest solution for ticket based on category using the healthiest of Gemini and OpenAI"""
+        attempts = {}
         if self.gemini_model:
-            return self.suggest_ticket_solution_gemini(category, description)
-        elif self.openai_client:
-            return self.suggest_ticket_solution_openai(category, description)
-        else:
+            attempts['gemini'] = lambda: self.suggest_ticket_solution_gemini(category, description)
+        if self.openai_client:
+            attempts['openai'] = lambda: self.suggest_ticket_solution_openai(category, description)
+        if not attempts:
             return "Solution suggestions temporarily unavailable."
+        
+        solution, error = self._first_success(attempts)
+        return solution if error is None else self._solution_error_response(error)
+    
+    def _solution_error_response(self, error: Exception) -> str:
+        """Solution text when every provider failed"""
+        if self._is_quota_error(error):
+            return QUOTA_SOLUTION_FALLBACK
+        return "Solution suggestions temporarily unavailable. Please contact Manila Water support directly."
     
     def suggest_ticket_solution_gemini(self, category: str, description: str) -> str:
-        """Suggest solution using Gemini"""
-        prompt = f"""
-        You are Manila Water's technical support AI. Suggest practical solutions for customer issues.
+        """Suggest solution using Gemini (raises on failure)"""
+        return self._call_gemini(self._solution_prompt(category, description))
+    
+    def suggest_ticket_solution_openai(self, category: str, description: str) -> str:
+        """Suggest solution using OpenAI (raises on failure)"""
+        system_prompt = self._solution_prompt(category, description)
+        return self._call_openai(system_prompt, f"Please suggest solutions for this {category} issue: {description}", max_tokens=250, temperature=0.6)
+    
+    # Streaming API - same provider ranking as the sync methods, for st.write_stream
+    def stream_hr_response(self, user_query: str, employee_data: Dict, context: str = "") -> Iterator[str]:
+        """Stream an HR assistant response as it is generated"""
+        streams = {}
+        if self.gemini_model:
+            streams['gemini'] = lambda: self._stream_gemini(self._hr_prompt(employee_data, context, user_query))
+        if self.openai_client:
+            streams['openai'] = lambda: self._stream_openai(self._hr_prompt(employee_data, context), user_query, max_tokens=300, temperature=0.7)
         
-        Category: {category}
-        Issue Description: {description}
+        ranked = self._ranked(list(streams))
+        if not ranked:
+            yield self.generate_hr_fallback_response(user_query, employee_data)
+            return
         
-        Provide:
-        1. Immediate steps the customer can take
-        2. What Manila Water will do to resolve the issue
-        3. Expected timeline
+        yield from self._stream_first_available(
+            [streams[provider] for provider in ranked],
+            lambda e: self._hr_error_response(user_query, employee_data, e)
+        )
+    
+    def stream_data_insights(self, query: str, data_context: Dict) -> Iterator[str]:
+        """Stream data insights as they are generated"""
+        if self.hedging:
+            # Hedging races whole answers, so with it on the insights arrive in one piece instead of streaming
+            yield self.generate_data_insights(query, data_context)
+            return
         
-        Keep response concise and actionable.
-        """
+        streams = {}
+        if self.gemini_model:
+            streams['gemini'] = lambda: self._stream_gemini(self._data_insights_prompt(data_context, query))
+        if self.openai_client:
+            streams['openai'] = lambda: self._stream_openai(self._data_insights_openai_prompt(data_context), query, max_tokens=400, temperature=0.5)
+        if self.anthropic_client:
+            streams['anthropic'] = lambda: self._stream_claude(f"Context: {self._data_insights_prompt(data_context)}\n\nQuery: {query}", max_tokens=400)
         
-        try:
-            response = self.gemini_model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            error_msg = str(e)
-            # Check if it's a quota limit error
-            if "quota" in error_msg.lower() or "429" in error_msg:
-                return """**AI Quota Limit Reached**
-
-**Immediate Steps:**
-1. Check water pressure at multiple taps
-2. Contact Manila Water hotline: 1627
-3. Report location and duration of issue
-
-**Manila Water Actions:**
-1. Technical team will investigate within 24 hours
-2. Emergency response if affecting multiple units
-3. Water supply restoration priority
-
-**Expected Timeline:** 4-24 hours depending on cause
-
-*Note: Upgrade to paid AI plan for unlimited smart solutions.*"""
-            # Fallback to OpenAI if Gemini fails for other reasons  
-            elif self.openai_client:
-                return self.suggest_ticket_solution_openai(category, description)
-            return "Solution suggestions temporarily unavailable. Please contact Manila Water support directly."
+        ranked = self._ranked(list(streams))
+        if not ranked:
+            yield self.generate_smart_fallback_response(query, data_context)
+            return
+        
+        yield from self._stream_first_available(
+            [streams[provider] for provider in ranked],
+            lambda e: self._data_insights_error_response(query, data_context, e)
+        )
     
-    def suggest_ticket_solution_openai(self, category: str, description: str) -> str:
-        """Suggest solution using OpenAI"""
-        if not self.openai_client:
+    # Async API - same provider ranking and fallbacks as the sync methods, run on the shared event loop
+    async def agenerate_hr_response(self, user_query: str, employee_data: Dict, context: str = "") -> str:
+        """Async variant of generate_hr_response"""
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = lambda: self._acall_gemini(self._hr_prompt(employee_data, context, user_query))
+        if self.async_openai_client:
+            attempts['openai'] = lambda: self._acall_openai(self._hr_prompt(employee_data, context), user_query, max_tokens=300, temperature=0.7)
+        if not attempts:
+            return self.generate_hr_fallback_response(user_query, employee_data)
+        
+        response, error = await self._afirst_success(attempts)
+        return response if error is None else self._hr_error_response(user_query, employee_data, error)
+    
+    async def aclassify_ticket(self, ticket_description: str, categories: List[Dict]) -> Dict:
+        """Async variant of classify_ticket"""
+        local_result = self.local_classifier.classify(ticket_description, categories)
+        if local_result['confidence'] >= self.local_confidence_threshold:
+            return local_result
+        
+        async def classify_gemini():
+            return self._parse_json_response(await self._acall_gemini(self._classification_prompt(categories, ticket_description)))
+        
+        async def classify_openai():
+            response_text = await self._acall_openai(self._classification_prompt(categories), ticket_description, max_tokens=200, temperature=0.3)
+            return json.loads(response_text)
+        
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = classify_gemini
+        if self.async_openai_client:
+            attempts['openai'] = classify_openai
+        if not attempts:
+            return self._local_classification(ticket_description, categories, "AI classification unavailable.")
+        
+        result, error = await (self._ahedged_first_success(attempts) if self.hedging else self._afirst_success(attempts))
+        return result if error is None else self._classification_error_result(ticket_description, categories, error)
+    
+    async def agenerate_data_insights(self, query: str, data_context: Dict) -> str:
+        """Async variant of generate_data_insights"""
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = lambda: self._acall_gemini(self._data_insights_prompt(data_context, query))
+        if self.async_openai_client:
+            attempts['openai'] = lambda: self._acall_openai(self._data_insights_openai_prompt(data_context), query, max_tokens=400, temperature=0.5)
+        if self.async_anthropic_client:
+            attempts['anthropic'] = lambda: self._acall_claude(f"Context: {self._data_insights_prompt(data_context)}\n\nQuery: {query}", max_tokens=400)
+        if not attempts:
+            return self.generate_smart_fallback_response(query, data_context)
+        
+        insights, error = await (self._ahedged_first_success(attempts) if self.hedging else self._afirst_success(attempts))
+        return insights if error is None else self._data_insights_error_response(query, data_context, error)
+    
+    async def asuggest_ticket_solution(self, category: str, description: str) -> str:
+        """Async variant of suggest_ticket_solution"""
+        prompt = self._solution_prompt(category, description)
+        
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = lambda: self._acall_gemini(prompt)
+        if self.async_openai_client:
+            attempts['openai'] = lambda: self._acall_openai(prompt, f"Please suggest solutions for this {category} issue: {description}", max_tokens=250, temperature=0.6)
+        if not attempts:
             return "Solution suggestions temporarily unavailable."
         
-        system_prompt = f"""
-        You are Manila Water's technical support AI. Suggest practical solutions for customer issues.
+        solution, error = await self._afirst_success(attempts)
+        return solution if error is None else self._solution_error_response(error)
+    
+    # Ticket analysis pipeline - classification and solution run concurrently
+    async def _timed(self, coro) -> tuple:
+        """Await a coroutine and return (result, elapsed seconds)"""
+        start = time.perf_counter()
+        result = await coro
+        return result, time.perf_counter() - start
+    
+    async def aanalyze_ticket(self, ticket_description: str, categories: List[Dict], category: str = None) -> Dict:
+        """Classify a ticket and suggest a solution concurrently, reporting the latency saved"""
+        # The solution prompt cannot wait for the AI category, so it uses the user's choice or lets the model infer it
+        solution_category = category or "Unclassified (infer from the issue description)"
         
-        Category: {category}
-        Issue Description: {description}
+        start = time.perf_counter()
+        (classification, classify_seconds), (solution, solution_seconds) = await asyncio.gather(
+            self._timed(self.aclassify_ticket(ticket_description, categories)),
+            self._timed(self.asuggest_ticket_solution(solution_category, ticket_description))
+        )
+        wall_seconds = time.perf_counter() - start
         
-        Provide:
-        1. Immediate steps the customer can take
-        2. What Manila Water will do to resolve the issue
-        3. Expected timeline
+        return {
+            'classification': classification,
+            'solution': solution,
+            'timings': {
+                'classification_seconds': round(classify_seconds, 3),
+                'solution_seconds': round(solution_seconds, 3),
+                'wall_seconds': round(wall_seconds, 3),
+                'saved_seconds': round(max(classify_seconds + solution_seconds - wall_seconds, 0.0), 3)
+            }
+        }
+    
+    def analyze_ticket(self, ticket_description: str, categories: List[Dict], category: str = None) -> Dict:
+        """Sync entry point for aanalyze_ticket, run on the shared event loop"""
+        return self.run_async(self.aanalyze_ticket(ticket_description, categories, category))
+    
+    # Bulk classification - many tickets per provider call, batches run concurrently
+    def _batch_classification_prompt(self, categories: List[Dict]) -> str:
+        """Build the prompt for classifying a numbered list of tickets in one call"""
+        category_list = [cat["name"] for cat in categories]
         
-        Keep response concise and actionable.
+        return f"""
+        You are Manila Water's ticket classification system. Classify each of the following tickets into one of these categories:
+        {', '.join(category_list)}
+        
+        Also determine the priority level of each ticket: Critical, High, Medium, Low
+        
+        Respond with a JSON array holding one object per ticket, using the ticket's number as "index":
+        [
+            {{
+                "index": 0,
+                "category": "category_name",
+                "priority": "priority_level",
+                "confidence": 0.95,
+                "reasoning": "brief explanation"
+            }}
+        ]
         """
+    
+    def _valid_classification(self, item: Any, category_names: set) -> bool:
+        """Check that a batch result item names a known category and priority"""
+        return (
+            isinstance(item, dict)
+            and item.get('category') in category_names
+            and item.get('priority') in ('Critical', 'High', 'Medium', 'Low')
+        )
+    
+    async def _aclassify_batch(self, descriptions: List[str], categories: List[Dict], semaphore: asyncio.Semaphore) -> List[Dict]:
+        """Classify one batch in a single provider call, retrying missing or invalid items one at a time
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Please suggest solutions for this {category} issue: {description}"}
-                ],
-                max_tokens=250,
-                temperature=0.6
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Solution suggestion error: {str(e)}"
+        The batch call and every retry each hold the semaphore while they run, so retries count against
+        the same concurrency limit as batches instead of all firing at once.
+        """
+        system_prompt = self._batch_classification_prompt(categories)
+        tickets_text = "\n".join(f"[{i}] {description}" for i, description in enumerate(descriptions))
+        
+        async def classify_gemini():
+            return self._parse_json_response(await self._acall_gemini(f"{system_prompt}\n        Tickets:\n{tickets_text}"))
+        
+        async def classify_openai():
+            response_text = await self._acall_openai(system_prompt, tickets_text, max_tokens=80 * len(descriptions) + 100, temperature=0.3)
+            return self._parse_json_response(response_text)
+        
+        attempts = {}
+        if self.gemini_model:
+            attempts['gemini'] = classify_gemini
+        if self.async_openai_client:
+            attempts['openai'] = classify_openai
+        
+        # If every provider fails, the whole batch falls through to per-ticket retries
+        async with semaphore:
+            parsed, _ = await self._afirst_success(attempts)
+        
+        category_names = {cat["name"] for cat in categories}
+        results = [None] * len(descriptions)
+        for item in parsed if isinstance(parsed, list) else []:
+            index = item.get('index') if isinstance(item, dict) else None
+            if isinstance(index, int) and 0 <= index < len(descriptions) and self._valid_classification(item, category_names):
+                results[index] = {key: value for key, value in item.items() if key != 'index'}
+        
+        async def retry(description: str) -> Dict:
+            async with semaphore:
+                return await self.aclassify_ticket(description, categories)
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            retried = await asyncio.gather(*(retry(descriptions[i]) for i in missing))
+            for i, result in zip(missing, retried):
+                results[i] = result
+        
+        return results
+    
+    async def aclassify_tickets_batch(self, descriptions: List[str], categories: List[Dict], batch_size: int = 20, max_concurrency: int = 4) -> List[Dict]:
+        """Classify many tickets, packing batch_size tickets per call with at most max_concurrency calls in flight"""
+        # Confident local classifications skip the LLM entirely
+        results = [self.local_classifier.classify(description, categories) for description in descriptions]
+        pending = [i for i, result in enumerate(results) if result['confidence'] < self.local_confidence_threshold]
+        
+        # Shared by every batch call and per-ticket retry, so at most max_concurrency provider calls are in flight
+        semaphore = asyncio.Semaphore(max_concurrency)
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        batch_results = await asyncio.gather(*(
+            self._aclassify_batch([descriptions[i] for i in batch], categories, semaphore) for batch in batches
+        ))
+        for batch, batch_result in zip(batches, batch_results):
+            for i, result in zip(batch, batch_result):
+                results[i] = result
+        return results
+    
+    def classify_tickets_batch(self, descriptions: List[str], categories: List[Dict], batch_size: int = 20, max_concurrency: int = 4) -> List[Dict]:
+        """Sync entry point for aclassify_tickets_batch, run on the shared event loop"""
+        return self.run_async(self.aclassify_tickets_batch(descriptions, categories, batch_size, max_concurrency))
     
     def generate_hr_fallback_response(self, user_query: str, employee_data: Dict) -> str:
         """Generate intelligent HR fallback responses without API keys"""
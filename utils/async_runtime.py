@@ -0,0 +1,33 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Optional
+
+import streamlit as st
+
+
+class AsyncRuntime:
+    """Long-lived asyncio event loop on a daemon thread, shared by every Streamlit session"""
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="ai-event-loop", daemon=True)
+        self._thread.start()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the shared loop and return a thread-safe future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and block the calling thread for its result"""
+        return self.submit(coro).result(timeout)
+
+
+# Initialize global instance
+@st.cache_resource
+def get_async_runtime():
+    return AsyncRuntime()
@@ -0,0 +1,64 @@
+import math
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from utils.text import terms
+
+# Okapi BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Top k (index, score) pairs with a positive score, best first"""
+    matching = np.flatnonzero(scores > 0)
+    if len(matching) > k:
+        matching = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+    ranked = matching[np.argsort(-scores[matching], kind='stable')]
+    return [(int(index), float(scores[index])) for index in ranked]
+
+
+class BM25Index:
+    """Okapi BM25 over text documents, with per-term postings so a query only touches documents sharing its terms"""
+    
+    def __init__(self, documents: List[str], analyzer: Callable[[str], List[str]] = terms, k1: float = BM25_K1, b: float = BM25_B):
+        # Documents and queries go through the same analyzer (the shared retrieval terms by default)
+        self.analyzer = analyzer
+        documents = [analyzer(document) for document in documents]
+        self.size = len(documents)
+        self.k1 = k1
+        lengths = np.array([len(tokens) for tokens in documents], dtype=float)
+        average_length = lengths.mean() if self.size and lengths.mean() > 0 else 1.0
+        # Denominator term that only depends on the document: k1 * (1 - b + b * length / average length)
+        self.length_norms = k1 * (1 - b + b * lengths / average_length)
+        
+        counts: Dict[str, Dict[int, int]] = {}
+        for doc_id, tokens in enumerate(documents):
+            for token in tokens:
+                postings = counts.setdefault(token, {})
+                postings[doc_id] = postings.get(doc_id, 0) + 1
+        
+        # term -> (document ids, term frequencies, idf)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for token, postings in counts.items():
+            frequency = len(postings)
+            idf = math.log(1 + (self.size - frequency + 0.5) / (frequency + 0.5))
+            self.postings[token] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=frequency),
+                np.fromiter(postings.values(), dtype=float, count=frequency),
+                idf
+            )
+    
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query (each distinct query term counted once)"""
+        scores = np.zeros(self.size)
+        for token in dict.fromkeys(self.analyzer(query)):
+            if token in self.postings:
+                doc_ids, frequencies, idf = self.postings[token]
+                scores[doc_ids] += idf * frequencies * (self.k1 + 1) / (frequencies + self.length_norms[doc_ids])
+        return scores
+    
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top k (document id, score) pairs with a positive score, best first"""
+        return top_k(self.scores(query), k)
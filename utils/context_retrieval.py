@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import streamlit as st
+
+from utils.bm25 import BM25Index, top_k
+from utils.data_processor import get_data_processor
+from utils.text import split_passages
+
+# Matches scoring at least this fraction of the best one are kept; when a query names a whole section
+# (e.g. "monthly trends") its rows score alike, so the section comes back complete
+RELATIVE_SCORE_CUTOFF = 0.4
+
+# Most records and metrics put into one data context
+MAX_CONTEXT_ROWS = 40
+
+# Extra words indexed with every entry of a section, for the ways people ask about it
+SECTION_KEYWORDS = {
+    'service_areas': 'area district city zone',
+    'monthly_trends': 'trend growth over time history month',
+    'water_quality_parameters': 'quality standard test',
+    'infrastructure_status': 'infrastructure facility asset',
+    'financial_performance': 'finance financial',
+    'compliance_metrics': 'regulatory compliance'
+}
+
+# Passages put into one HR prompt; weaker matches than the cutoff fraction of the best are left out
+TOP_PASSAGES = 4
+PASSAGE_SCORE_CUTOFF = 0.3
+
+# Common-inquiry passages list questions without answers: they show what a topic covers, one is enough
+MAX_QUESTION_PASSAGES = 1
+
+# Weight of a match on a passage's source (policy title, "Onboarding FAQ", ...) next to a match on its
+# text. Sources are scored on their own index: repeated in every passage of a source they would be in
+# so many documents that their words ("onboarding", "leave") get next to no IDF weight.
+SOURCE_WEIGHT = 2.0
+
+
+def _is_records(value: Any) -> bool:
+    """Whether a value is a non-empty list of records"""
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def _words(name: str) -> str:
+    """Field or section name as words ('monthly_consumption_liters' -> 'monthly consumption liters')"""
+    return str(name).replace('_', ' ')
+
+
+class DataContextRetriever:
+    """BM25 index over every record and metric of water_data.json, selecting those relevant to a query"""
+    
+    def __init__(self, water_data: Dict):
+        # Each entry is (section path, record index or metric name, record or metric value)
+        self.entries: List[Tuple[tuple, Any, Any]] = []
+        texts = []
+        for section, value in water_data.items():
+            self._collect(value, (section,), texts)
+        self.index = BM25Index(texts)
+    
+    def _collect(self, value: Any, path: tuple, texts: List[str]):
+        """Add one entry per record of a record list and per metric of a dict, recursing into nested sections"""
+        section_words = ' '.join(_words(part) for part in path) + ' ' + SECTION_KEYWORDS.get(path[0], '')
+        if _is_records(value):
+            for position, record in enumerate(value):
+                fields = [
+                    f"{_words(key)} {field}" if isinstance(field, str) else _words(key)
+                    for key, field in record.items()
+                ]
+                self.entries.append((path, position, record))
+                texts.append(f"{section_words} {' '.join(fields)}")
+        elif isinstance(value, dict):
+            for key, field in value.items():
+                if _is_records(field) or isinstance(field, dict):
+                    self._collect(field, path + (key,), texts)
+                else:
+                    text_values = ' '.join(str(item) for item in field) if isinstance(field, list) else (field if isinstance(field, str) else '')
+                    self.entries.append((path, key, field))
+                    texts.append(f"{section_words} {_words(key)} {text_values}")
+    
+    def retrieve(self, query: str, max_rows: int = MAX_CONTEXT_ROWS) -> Dict:
+        """The records and metrics that best match the query, nested like water_data.json and in its order"""
+        hits = self.index.search(query, max_rows)
+        if not hits:
+            return {}
+        cutoff = hits[0][1] * RELATIVE_SCORE_CUTOFF
+        
+        context = {}
+        for entry_id in sorted(entry_id for entry_id, score in hits if score >= cutoff):
+            path, key, value = self.entries[entry_id]
+            node = context
+            for part in path[:-1]:
+                node = node.setdefault(part, {})
+            if isinstance(key, int):
+                node.setdefault(path[-1], []).append(value)
+            else:
+                node.setdefault(path[-1], {})[key] = value
+        return context
+
+
+class PolicyRetriever:
+    """BM25 index over passages of the HR policies, onboarding FAQ and common inquiries in policies.json"""
+    
+    def __init__(self, policies_data: Dict):
+        # Each passage is {'source': where it comes from, 'kind': policy/faq/questions, 'text': what goes into the prompt}
+        self.passages: List[Dict] = []
+        for key, policy in policies_data.get('hr_policies', {}).items():
+            title = policy.get('title', _words(key))
+            for text in split_passages(policy.get('content', '')):
+                self.passages.append({'source': title, 'kind': 'policy', 'text': text})
+        for item in policies_data.get('onboarding_faq', []):
+            self.passages.append({'source': 'Onboarding FAQ', 'kind': 'faq', 'text': f"Q: {item.get('question', '')} A: {item.get('answer', '')}"})
+        for inquiry in policies_data.get('common_inquiries', []):
+            for text in split_passages(' '.join(inquiry.get('questions', []))):
+                self.passages.append({'source': f"Common {inquiry.get('category', '')} questions", 'kind': 'questions', 'text': text})
+        
+        self.index = BM25Index([passage['text'] for passage in self.passages])
+        # One document per source, so "leave policy" or "onboarding" find the right passages
+        self.sources = list(dict.fromkeys(passage['source'] for passage in self.passages))
+        self.source_index = BM25Index(self.sources)
+        source_ids = {source: source_id for source_id, source in enumerate(self.sources)}
+        self.passage_sources = np.array([source_ids[passage['source']] for passage in self.passages], dtype=np.int64)
+    
+    def search(self, query: str, k: int = TOP_PASSAGES) -> List[Dict]:
+        """The passages that best match the query, best first"""
+        scores = self.index.scores(query)
+        if len(self.passages):
+            scores += SOURCE_WEIGHT * self.source_index.scores(query)[self.passage_sources]
+        hits = top_k(scores, k + MAX_QUESTION_PASSAGES * 4)
+        if not hits:
+            return []
+        cutoff = hits[0][1] * PASSAGE_SCORE_CUTOFF
+        
+        results = []
+        questions = 0
+        for passage_id, score in hits:
+            passage = self.passages[passage_id]
+            if score < cutoff or len(results) == k:
+                break
+            if passage['kind'] == 'questions':
+                questions += 1
+                if questions > MAX_QUESTION_PASSAGES:
+                    continue
+            results.append(dict(passage, score=round(score, 2)))
+        return results
+
+
+# Initialize global instance
+@st.cache_resource(max_entries=1)
+def _build_data_retriever(water_data_version: int, _data_processor):
+    # Monthly trends may come from an Arrow/Parquet table rather than the JSON
+    water_data = dict(_data_processor.get_dataset('water_data'), monthly_trends=_data_processor.get_monthly_trends())
+    return DataContextRetriever(water_data)
+
+
+def get_data_retriever():
+    data_processor = get_data_processor()
+    data_processor.get_dataset('water_data')
+    # Keyed on the water data version so a hot-reloaded water_data.json is re-indexed
+    return _build_data_retriever(data_processor.get_data_version('water_data'), data_processor)
+
+
+@st.cache_resource(max_entries=1)
+def _build_policy_retriever(policies_version: int, _data_processor):
+    return PolicyRetriever(_data_processor.get_dataset('policies'))
+
+
+def get_policy_retriever():
+    data_processor = get_data_processor()
+    data_processor.get_dataset('policies')
+    # Keyed on the policies data version so a hot-reloaded policies.json is re-indexed
+    return _build_policy_retriever(data_processor.get_data_version('policies'), data_processor)
@@ -0,0 +1,128 @@
+import math
+from typing import Any, Dict, List
+
+from utils.rate_limiter import estimate_tokens
+
+# Default size of the data context in analytics prompts, in (estimated) tokens
+DEFAULT_CONTEXT_TOKEN_BUDGET = 1500
+
+# Significant digits kept for numbers; numbers from SHORTEN_FROM up get a suffix (2.5B, 629.6K)
+SIGNIFICANT_DIGITS = 4
+SHORTEN_FROM = 1e5
+NUMBER_SUFFIXES = [(1e12, 'T'), (1e9, 'B'), (1e6, 'M'), (1e3, 'K')]
+
+
+def format_value(value: Any) -> str:
+    """Short text for one scalar (or list of scalars) in a context table"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            return str(value)
+        for scale, suffix in NUMBER_SUFFIXES:
+            if abs(value) >= max(scale, SHORTEN_FROM):
+                return f"{value / scale:.{SIGNIFICANT_DIGITS}g}{suffix}"
+        return str(value) if isinstance(value, int) else f"{value:.{SIGNIFICANT_DIGITS}g}"
+    if isinstance(value, (list, tuple)):
+        return ';'.join(format_value(item) for item in value)
+    if isinstance(value, dict):
+        return ';'.join(f"{key}={format_value(item)}" for key, item in value.items())
+    return str(value).replace('|', '/').replace('\n', ' ')
+
+
+def _flatten(record: Dict, prefix: str = '') -> Dict:
+    """One table row: nested dicts become parent.child columns"""
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            row.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            row[f"{prefix}{key}"] = value
+    return row
+
+
+def _is_table(value: Any) -> bool:
+    """Whether a value is a non-empty list of records"""
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+class _Table:
+    """A list of records rendered as pipe-separated rows, which can be shortened to fit the budget"""
+    
+    def __init__(self, title: str, records: List[Dict]):
+        self.title = title
+        rows = [_flatten(record) for record in records]
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        cells = [{column: format_value(row.get(column)) for column in columns} for row in rows]
+        
+        # Columns that are empty everywhere are dropped; columns with one value for every row are stated once
+        self.constants = {}
+        self.columns = []
+        for column in columns:
+            values = {row[column] for row in cells}
+            if values == {''}:
+                continue
+            if len(values) == 1 and len(cells) > 1:
+                self.constants[column] = values.pop()
+            else:
+                self.columns.append(column)
+        self.lines = ['|'.join(row[column] for column in self.columns) for row in cells]
+        self.shown = len(self.lines)
+    
+    def render(self) -> str:
+        """Title, constant columns, header row and the rows currently shown"""
+        header = f"{self.title} ({len(self.lines)} rows)"
+        if self.constants:
+            header += " all: " + ', '.join(f"{column}={value}" for column, value in self.constants.items())
+        if not self.columns:
+            return header
+        # Shortened tables keep their first and last rows (e.g. the start and the latest months of a trend)
+        head = self.lines[:math.ceil(self.shown / 2)]
+        tail = self.lines[len(self.lines) - self.shown // 2:] if self.shown // 2 else []
+        omitted = len(self.lines) - self.shown
+        middle = [f"... {omitted} rows omitted"] if omitted else []
+        return '\n'.join([header, '|'.join(self.columns)] + head + middle + tail)
+
+
+def _sections(value: Any, title: str) -> List:
+    """Split a context value into tables and 'key=value' lines, titled by their path"""
+    if _is_table(value):
+        return [_Table(title, value)]
+    if isinstance(value, dict):
+        scalars = {key: item for key, item in value.items() if not _is_table(item) and not isinstance(item, dict)}
+        sections = [f"{title}: " + ', '.join(f"{key}={format_value(item)}" for key, item in scalars.items())] if scalars else []
+        for key, item in value.items():
+            if key not in scalars:
+                sections.extend(_sections(item, f"{title}.{key}"))
+        return sections
+    return [f"{title}: {format_value(value)}"]
+
+
+def serialize_context(data_context: Dict, max_tokens: int = DEFAULT_CONTEXT_TOKEN_BUDGET) -> str:
+    """Compact text rendering of a prompt data context that fits in max_tokens
+    
+    Record lists become pipe-separated tables and flat dicts become key=value lines, with numbers
+    rounded. Over the budget, the table using the most tokens gives up a quarter of its rows (from the
+    middle) until the context fits; whatever is still too long is cut off.
+    """
+    sections = []
+    for key, value in data_context.items():
+        sections.extend(_sections(value, key))
+    
+    def render(section) -> str:
+        return section.render() if isinstance(section, _Table) else section
+    
+    rendered = [render(section) for section in sections]
+    while sum(estimate_tokens(text) for text in rendered) > max_tokens:
+        shrinkable = [i for i, section in enumerate(sections) if isinstance(section, _Table) and section.shown > 1]
+        if not shrinkable:
+            break
+        largest = max(shrinkable, key=lambda i: len(rendered[i]))
+        sections[largest].shown -= max(sections[largest].shown // 4, 1)
+        rendered[largest] = render(sections[largest])
+    
+    text = '\n'.join(rendered)
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars].rsplit('\n', 1)[0] + "\n... (truncated)"
@@ -1,71 +1,361 @@
+import hashlib
 import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import streamlit as st
 from typing import Dict, List, Any
 import os
+import threading
+import time
+from utils.data_snapshot import load_snapshot, write_snapshot
+from utils.semantic_index import SemanticIndex, load_knowledge_index
+from utils.tabular_sources import TABULAR_SOURCES, find_table_sources, open_table
+from utils.technician_assignment import TechnicianAssigner
+
+# Substring search uses n-grams up to this length; shorter queries hit the index directly
+EMPLOYEE_NGRAM_SIZE = 3
+
+LEAVE_TYPES = ['vacation', 'sick', 'emergency']
+
+EMPLOYEE_FRAME_COLUMNS = ['id', 'name', 'department', 'position', 'location', 'hire_date']
+
+DATA_FILES = {
+    'employees': 'data/employees.json',
+    'tickets': 'data/tickets.json',
+    'water_data': 'data/water_data.json',
+    'policies': 'data/policies.json'
+}
+
+# How often get_data_processor() stats the data files for changes
+RELOAD_CHECK_INTERVAL_SECONDS = 2.0
+
+# Order datasets are parsed in by the background prefetch: small, widely used files first
+DATASET_PREFETCH_ORDER = ['water_data', 'tickets', 'policies', 'employees']
 
 class DataProcessor:
     def __init__(self):
         self.data_cache = {}
-        self.load_all_data()
+        self.employee_index = {'employees': [], 'by_id': {}, 'by_name': {}, 'ngrams': {}, 'fields': []}
+        self.employees_frame = pd.DataFrame()
+        self.tables = {}
+        self.data_versions = {}
+        self.aggregate_cache = {}
+        self.file_signatures = {}
+        self.last_reload_check = time.monotonic()
+        self.reload_lock = threading.Lock()
+        # Datasets are parsed on first access; one lock per file so pages never parse the same file twice
+        self.load_locks = {key: threading.Lock() for key in DATA_FILES}
+        self.prefetch_thread = None
+    
+    def read_json_file(self, filepath: str) -> tuple:
+        """Parse a JSON file and hash the exact bytes parsed, letting I/O and decode errors propagate"""
+        with open(filepath, 'rb') as file:
+            raw = file.read()
+        return json.loads(raw.decode('utf-8')), hashlib.sha256(raw).hexdigest()
     
-    def load_json_file(self, filepath: str) -> Dict:
+    def load_json_file(self, filepath: str) -> tuple:
         """Load JSON file with error handling"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as file:
-                return json.load(file)
+            return self.read_json_file(filepath)
         except FileNotFoundError:
             st.error(f"Data file not found: {filepath}")
-            return {}
+            return {}, None
         except json.JSONDecodeError:
             st.error(f"Invalid JSON format in: {filepath}")
-            return {}
+            return {}, None
     
     def load_all_data(self):
         """Load all data files into cache"""
-        data_files = {
-            'employees': 'data/employees.json',
-            'tickets': 'data/tickets.json',
-            'water_data': 'data/water_data.json',
-            'policies': 'data/policies.json'
+        for key in DATA_FILES:
+            self.get_dataset(key)
+    
+    def get_dataset(self, key: str) -> Dict:
+        """Get a dataset, parsing its file on first access"""
+        data = self.data_cache.get(key)
+        if data is None:
+            data = self.load_dataset(key)
+        return data
+    
+    def load_dataset(self, key: str) -> Dict:
+        """Parse one data file and publish it, unless another thread got there first"""
+        with self.load_locks[key]:
+            if key not in self.data_cache:
+                # Stat before reading so a write that lands mid-read is picked up by the next reload check
+                signature = self.get_dataset_signature(key)
+                data, derived = self.parse_dataset(key, signature)
+                self.publish_dataset(key, signature, data, derived)
+            return self.data_cache[key]
+    
+    def get_dataset_signature(self, key: str) -> tuple:
+        """Get the JSON file signature of a dataset followed by those of its Arrow/Parquet tables"""
+        tables = tuple(sorted(
+            (path, self.get_file_signature(path)) for path in find_table_sources(key).values()
+        ))
+        return (self.get_file_signature(DATA_FILES[key]),) + tables
+    
+    def parse_dataset(self, key: str, signature: tuple, strict: bool = False) -> tuple:
+        """Get (data, derived structures) from the file's snapshot when fresh, else parse the JSON and snapshot it"""
+        filepath = DATA_FILES[key]
+        tables = {name: open_table(path) for name, path in find_table_sources(key).items()}
+        
+        # Memory-mapped tables are already cheap to open, and a snapshot would copy them into every process
+        snapshot = None if tables else load_snapshot(filepath, signature[0])
+        if snapshot is not None:
+            return snapshot['data'], snapshot['derived']
+        
+        data, sha256 = self.read_json_file(filepath) if strict else self.load_json_file(filepath)
+        derived = self.derive_dataset(key, data, tables)
+        if sha256 and signature[0] and not tables:
+            write_snapshot(filepath, signature[0], {'data': data, 'derived': derived}, sha256)
+        return data, derived
+    
+    def derive_dataset(self, key: str, data: Dict, tables: Dict[str, pa.Table]) -> Dict:
+        """Build the lookup structures that are kept alongside a dataset"""
+        derived = {'tables': tables}
+        if key == 'employees':
+            table = tables.get('employees')
+            if table is not None:
+                # Lookups and search run as Arrow compute over the mapped columns instead of Python indexes
+                derived['employee_index'] = {'table': table}
+                derived['employees_frame'] = self.build_employee_frame_from_table(table)
+            else:
+                employees = data.get('employees', [])
+                derived['employee_index'] = self.build_employee_indexes(employees)
+                derived['employees_frame'] = self.build_employee_frame(employees)
+        return derived
+    
+    def publish_dataset(self, key: str, signature: tuple, data: Dict, derived: Dict):
+        """Swap in a parsed dataset with its derived structures and bump its version"""
+        if key == 'employees':
+            # Published as one object so searches never mix postings from an old roster with a new one
+            self.employee_index = derived['employee_index']
+            self.employees_frame = derived['employees_frame']
+        
+        tables = {name: table for name, table in self.tables.items() if TABULAR_SOURCES[name][0] != key}
+        tables.update(derived.get('tables', {}))
+        self.tables = tables
+        
+        # Readers see either the old or the new dataset, never a half-parsed one
+        self.file_signatures[key] = signature
+        self.data_cache[key] = data
+        self.bump_data_version(key)
+    
+    def prefetch(self, keys: List[str] = None):
+        """Parse the remaining datasets in a background thread so later pages find them loaded"""
+        if self.prefetch_thread is not None:
+            return
+        
+        pending = [key for key in (keys or DATASET_PREFETCH_ORDER) if key not in self.data_cache]
+        if not pending:
+            return
+        
+        def load_pending():
+            for key in pending:
+                self.get_dataset(key)
+        
+        self.prefetch_thread = threading.Thread(target=load_pending, name='data-prefetch', daemon=True)
+        self.prefetch_thread.start()
+    
+    def get_file_signature(self, filepath: str) -> tuple:
+        """Get (mtime, size) of a data file, or None if it is missing"""
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def reload_changed_files(self, force: bool = False) -> List[str]:
+        """Re-parse only the data files that changed on disk and swap them in; returns the reloaded keys"""
+        now = time.monotonic()
+        if not force and now - self.last_reload_check < RELOAD_CHECK_INTERVAL_SECONDS:
+            return []
+        
+        # Another session is already checking; it publishes the new data for everyone
+        if not self.reload_lock.acquire(blocking=False):
+            return []
+        
+        try:
+            self.last_reload_check = now
+            reloaded = []
+            for key in DATA_FILES:
+                # Datasets nobody has asked for yet are read fresh on first access anyway
+                if key not in self.data_cache:
+                    continue
+                
+                signature = self.get_dataset_signature(key)
+                if signature[0] is None or signature == self.file_signatures.get(key):
+                    continue
+                
+                try:
+                    data, derived = self.parse_dataset(key, signature, strict=True)
+                except (OSError, ValueError):
+                    # Most likely caught mid-write: keep serving the old data and retry on the next check
+                    continue
+                
+                self.publish_dataset(key, signature, data, derived)
+                reloaded.append(key)
+            
+            return reloaded
+        finally:
+            self.reload_lock.release()
+    
+    def bump_data_version(self, dataset: str):
+        """Mark a dataset as reloaded so aggregates derived from it are recomputed"""
+        self.data_versions[dataset] = self.data_versions.get(dataset, 0) + 1
+    
+    def get_data_version(self, dataset: str) -> int:
+        """Get the current version counter of a dataset"""
+        return self.data_versions.get(dataset, 0)
+    
+    def _memoized(self, key: Any, datasets: tuple, compute) -> Any:
+        """Return a cached aggregate while the datasets it depends on keep the same versions"""
+        for dataset in datasets:
+            self.get_dataset(dataset)
+        versions = tuple(self.get_data_version(dataset) for dataset in datasets)
+        cached = self.aggregate_cache.get(key)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        
+        value = compute()
+        self.aggregate_cache[key] = (versions, value)
+        return value
+    
+    def build_employee_indexes(self, employees: List[Dict]) -> Dict:
+        """Build id/name lookup dicts and an n-gram index over name, department and position"""
+        by_id = {}
+        by_name = {}
+        ngram_index = {}
+        search_fields = []
+        
+        for position, emp in enumerate(employees):
+            # First occurrence wins, matching the order of the roster
+            by_id.setdefault(emp.get('id'), emp)
+            by_name.setdefault(emp.get('name', '').lower(), emp)
+            
+            fields = self._employee_search_fields(emp)
+            search_fields.append(fields)
+            for field in fields:
+                for size in range(1, EMPLOYEE_NGRAM_SIZE + 1):
+                    for start in range(len(field) - size + 1):
+                        postings = ngram_index.setdefault(field[start:start + size], [])
+                        if not postings or postings[-1] != position:
+                            postings.append(position)
+        
+        return {
+            'employees': employees,
+            'by_id': by_id,
+            'by_name': by_name,
+            'ngrams': ngram_index,
+            'fields': search_fields
         }
+    
+    def build_employee_frame(self, employees: List[Dict]) -> pd.DataFrame:
+        """Build a columnar employee frame with parsed hire dates and categorical dimensions"""
+        frame = pd.DataFrame.from_records(employees, columns=EMPLOYEE_FRAME_COLUMNS)
+        leave = pd.DataFrame.from_records(
+            [emp.get('leave_balance') or {} for emp in employees],
+            columns=LEAVE_TYPES
+        )
+        return self._finish_employee_frame(frame.join(leave.fillna(0)))
+    
+    def build_employee_frame_from_table(self, table: pa.Table) -> pd.DataFrame:
+        """Build the employee frame from an Arrow table, converting only the columns it needs"""
+        frame = table.select(EMPLOYEE_FRAME_COLUMNS).to_pandas()
+        leave = table.select(['leave_balance']).flatten().to_pandas()
+        leave.columns = [column.split('.', 1)[1] for column in leave.columns]
+        return self._finish_employee_frame(frame.join(leave.reindex(columns=LEAVE_TYPES).fillna(0)))
+    
+    def _finish_employee_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Fill gaps, parse hire dates and make the low-cardinality columns categorical"""
+        frame['name'] = frame['name'].fillna('Unknown')
+        frame['hire_date'] = pd.to_datetime(frame['hire_date'].fillna('2020-01-01'), format='%Y-%m-%d')
+        for column in ('department', 'position', 'location'):
+            frame[column] = frame[column].fillna('Unknown').astype('category')
         
-        for key, filepath in data_files.items():
-            self.data_cache[key] = self.load_json_file(filepath)
+        return frame
+    
+    def _employee_search_fields(self, emp: Dict) -> List[str]:
+        """Lowercased fields that search_employees matches against"""
+        return [
+            emp.get('name', '').lower(),
+            emp.get('department', '').lower(),
+            emp.get('position', '').lower()
+        ]
     
     # Employee Data Methods
     def get_employee_by_id(self, emp_id: str) -> Dict:
         """Get employee data by ID"""
-        employees = self.data_cache.get('employees', {}).get('employees', [])
-        for emp in employees:
-            if emp['id'] == emp_id:
-                return emp
-        return {}
+        index = self.get_employee_index()
+        if 'table' in index:
+            return self._first_row(index['table'], pc.equal(index['table'].column('id'), emp_id))
+        return index['by_id'].get(emp_id, {})
     
     def get_employee_by_name(self, name: str) -> Dict:
         """Get employee data by name"""
-        employees = self.data_cache.get('employees', {}).get('employees', [])
-        for emp in employees:
-            if emp['name'].lower() == name.lower():
-                return emp
-        return {}
+        index = self.get_employee_index()
+        if 'table' in index:
+            return self._first_row(index['table'], pc.equal(pc.utf8_lower(index['table'].column('name')), name.lower()))
+        return index['by_name'].get(name.lower(), {})
+    
+    def _first_row(self, table: pa.Table, mask) -> Dict:
+        """First row of a table matching a boolean mask, as a dict"""
+        rows = table.filter(mask).slice(0, 1).to_pylist()
+        return rows[0] if rows else {}
     
     def get_all_employees(self) -> List[Dict]:
         """Get all employees"""
-        return self.data_cache.get('employees', {}).get('employees', [])
+        return self.get_table_records('employees')
+    
+    def get_employee_names(self) -> List[str]:
+        """Get employee names in roster order, without materializing table-backed rows"""
+        table = self.get_employee_index().get('table')
+        if table is not None:
+            return table.column('name').to_pylist()
+        return [emp['name'] for emp in self.get_all_employees()]
+    
+    def get_employee_index(self) -> Dict:
+        """Get the employee lookup and search index, loading employees if needed"""
+        self.get_dataset('employees')
+        return self.employee_index
+    
+    def get_employees_dataframe(self) -> pd.DataFrame:
+        """Get employees as a columnar DataFrame (one row per employee, leave balances flattened)"""
+        self.get_dataset('employees')
+        return self.employees_frame
+    
+    def count_employees_by(self, column: str) -> pd.Series:
+        """Count employees per value of a categorical column (department, position, location)"""
+        return self.get_employees_dataframe()[column].value_counts(sort=False)
+    
+    def get_tenure_dataframe(self) -> pd.DataFrame:
+        """Get tenure in years per employee, computed in one vectorized pass"""
+        frame = self.get_employees_dataframe()
+        tenure_years = (pd.Timestamp.now() - frame['hire_date']).dt.days / 365.25
+        return pd.DataFrame({
+            'Employee': frame['name'],
+            'Department': frame['department'],
+            'Tenure_Years': tenure_years.round(1),
+            'Position': frame['position']
+        })
+    
+    def get_leave_balance_stats(self) -> Dict:
+        """Get mean/min/max/total leave balance per leave type"""
+        stats = self.get_employees_dataframe()[LEAVE_TYPES].agg(['mean', 'min', 'max', 'sum'])
+        return {leave_type: stats[leave_type].to_dict() for leave_type in LEAVE_TYPES}
     
     def get_departments(self) -> List[str]:
         """Get all departments"""
-        return self.data_cache.get('employees', {}).get('departments', [])
+        return self.get_dataset('employees').get('departments', [])
     
     def get_leave_policies(self) -> Dict:
         """Get leave policies"""
-        return self.data_cache.get('employees', {}).get('leave_policies', {})
+        return self.get_dataset('employees').get('leave_policies', {})
     
     # HR Policy Methods
     def get_hr_policies(self) -> Dict:
         """Get all HR policies"""
-        return self.data_cache.get('policies', {}).get('hr_policies', {})
+        return self.get_dataset('policies').get('hr_policies', {})
     
     def get_policy_by_name(self, policy_name: str) -> Dict:
         """Get specific policy by name"""
@@ -74,55 +364,69 @@ class DataProcessor:
     
     def get_onboarding_faq(self) -> List[Dict]:
         """Get onboarding FAQ"""
-        return self.data_cache.get('policies', {}).get('onboarding_faq', [])
+        return self.get_dataset('policies').get('onboarding_faq', [])
+    
+    def get_knowledge_index(self) -> SemanticIndex:
+        """Get the semantic index over the onboarding FAQ and HR policy passages"""
+        return self._memoized('knowledge_index', ('policies',), lambda: load_knowledge_index(self.get_dataset('policies')))
     
     def search_faq(self, query: str) -> List[Dict]:
-        """Search FAQ by query"""
+        """Search FAQ by query, most similar in meaning first"""
         faq = self.get_onboarding_faq()
-        results = []
-        query_lower = query.lower()
-        
-        for item in faq:
-            if (query_lower in item.get('question', '').lower() or 
-                query_lower in item.get('answer', '').lower()):
-                results.append(item)
-        return results
+        hits = self.get_knowledge_index().search(query, len(faq), kinds={'faq'})
+        return [{'question': hit['question'], 'answer': hit['answer']} for hit in hits]
     
     # Ticket Data Methods
     def get_ticket_categories(self) -> List[Dict]:
         """Get all ticket categories"""
-        return self.data_cache.get('tickets', {}).get('ticket_categories', [])
+        return self.get_dataset('tickets').get('ticket_categories', [])
+    
+    def get_sla_targets(self) -> Dict[str, Dict]:
+        """Get response and resolution targets per priority"""
+        return self.get_dataset('tickets').get('sla_targets', {})
+    
+    def get_escalation_matrix(self) -> List[Dict]:
+        """Get escalation levels and the hours after which they trigger"""
+        return self.get_dataset('tickets').get('escalation_matrix', [])
     
     def get_technicians(self) -> List[Dict]:
         """Get all technicians"""
-        return self.data_cache.get('tickets', {}).get('technicians', [])
+        return self.get_dataset('tickets').get('technicians', [])
     
     def get_available_technicians(self) -> List[Dict]:
         """Get available technicians"""
         techs = self.get_technicians()
         return [tech for tech in techs if tech.get('status') == 'Available']
     
-    def find_best_technician(self, category: str, area: str = None) -> Dict:
-        """Find best technician for a category and area"""
-        techs = self.get_available_technicians()
-        
-        # Simple matching logic - can be enhanced with ML
-        for tech in techs:
-            if category.lower() in tech.get('specialty', '').lower():
-                if area and area.lower() in tech.get('zone', '').lower():
-                    return tech
-        
-        # Fallback to any available technician
-        return techs[0] if techs else {}
+    def get_technician_workloads(self, open_tickets: Dict[str, int] = None) -> Dict[str, int]:
+        """Current workload per technician: the roster figure, raised to the open tickets actually assigned to them"""
+        open_tickets = open_tickets or {}
+        return {
+            tech.get('name'): max(tech.get('current_workload', 0), open_tickets.get(tech.get('name'), 0))
+            for tech in self.get_technicians()
+        }
+    
+    def assign_technicians(self, tickets: List[Dict], workloads: Dict[str, int] = None) -> List[Dict]:
+        """Assign a batch of tickets to technicians at minimum total cost under capacity"""
+        return TechnicianAssigner(self.get_technicians(), workloads).assign(tickets)
+    
+    def find_best_technician(self, category: str, area: str = None, priority: str = 'Medium', workloads: Dict[str, int] = None) -> Dict:
+        """Find best technician for a category and area (empty dict if nobody has capacity)"""
+        ticket = {'category': category, 'area': area or '', 'priority': priority}
+        return TechnicianAssigner(self.get_technicians(), workloads).best_for(ticket)
     
     def get_sample_tickets(self) -> List[Dict]:
         """Get sample tickets"""
-        return self.data_cache.get('tickets', {}).get('sample_tickets', [])
+        return self.get_table_records('sample_tickets')
+    
+    def get_ticket_trends(self) -> List[Dict]:
+        """Get monthly ticket volume and SLA trends"""
+        return self.get_table_records('ticket_trends')
     
     # Water Data Methods
     def get_service_areas(self) -> List[Dict]:
         """Get all service areas"""
-        return self.data_cache.get('water_data', {}).get('service_areas', [])
+        return self.get_dataset('water_data').get('service_areas', [])
     
     def get_area_data(self, area_name: str) -> Dict:
         """Get data for specific area"""
@@ -134,45 +438,72 @@ class DataProcessor:
     
     def get_operational_metrics(self) -> Dict:
         """Get operational metrics"""
-        return self.data_cache.get('water_data', {}).get('operational_metrics', {})
+        return self.get_dataset('water_data').get('operational_metrics', {})
     
     def get_monthly_trends(self) -> List[Dict]:
         """Get monthly trends data"""
-        return self.data_cache.get('water_data', {}).get('monthly_trends', [])
+        return self.get_table_records('monthly_trends')
+    
+    # Tabular Source Methods
+    def get_table(self, name: str) -> pa.Table:
+        """Get the memory-mapped Arrow table behind a tabular collection, or None if it comes from JSON"""
+        self.get_dataset(TABULAR_SOURCES[name][0])
+        return self.tables.get(name)
+    
+    def get_table_records(self, name: str) -> List[Dict]:
+        """Get the rows of a tabular collection as dicts, from its Arrow/Parquet source when there is one"""
+        dataset, field = TABULAR_SOURCES[name]
+        data = self.get_dataset(dataset)
+        table = self.tables.get(name)
+        if table is not None:
+            return table.to_pylist()
+        return data.get(field, [])
     
     def get_water_quality_params(self) -> Dict:
         """Get water quality parameters"""
-        return self.data_cache.get('water_data', {}).get('water_quality_parameters', {})
+        return self.get_dataset('water_data').get('water_quality_parameters', {})
     
     def get_infrastructure_status(self) -> Dict:
         """Get infrastructure status"""
-        return self.data_cache.get('water_data', {}).get('infrastructure_status', {})
+        return self.get_dataset('water_data').get('infrastructure_status', {})
     
     # Analytics Methods
     def calculate_total_consumption(self) -> float:
         """Calculate total monthly consumption across all areas"""
-        areas = self.get_service_areas()
-        total = sum(area.get('monthly_consumption_liters', 0) for area in areas)
-        return total / 1_000_000_000  # Convert to billion liters
+        def compute():
+            areas = self.get_service_areas()
+            total = sum(area.get('monthly_consumption_liters', 0) for area in areas)
+            return total / 1_000_000_000  # Convert to billion liters
+        
+        return self._memoized('total_consumption', ('water_data',), compute)
     
     def calculate_average_quality_score(self) -> float:
         """Calculate average water quality score"""
-        areas = self.get_service_areas()
-        if not areas:
-            return 0
-        total_score = sum(area.get('water_quality_score', 0) for area in areas)
-        return total_score / len(areas)
+        def compute():
+            areas = self.get_service_areas()
+            if not areas:
+                return 0
+            total_score = sum(area.get('water_quality_score', 0) for area in areas)
+            return total_score / len(areas)
+        
+        return self._memoized('average_quality_score', ('water_data',), compute)
     
     def get_top_consuming_areas(self, limit: int = 3) -> List[Dict]:
         """Get top consuming areas"""
-        areas = self.get_service_areas()
-        sorted_areas = sorted(areas, 
-                            key=lambda x: x.get('monthly_consumption_liters', 0), 
-                            reverse=True)
-        return sorted_areas[:limit]
+        def compute():
+            areas = self.get_service_areas()
+            return sorted(areas, 
+                          key=lambda x: x.get('monthly_consumption_liters', 0), 
+                          reverse=True)
+        
+        # The full ranking is cached once; each limit is just a slice of it
+        return self._memoized('areas_by_consumption', ('water_data',), compute)[:limit]
     
     def get_trends_dataframe(self) -> pd.DataFrame:
         """Get monthly trends as DataFrame for plotting"""
+        table = self.get_table('monthly_trends')
+        if table is not None:
+            return table.to_pandas()
         trends = self.get_monthly_trends()
         return pd.DataFrame(trends)
     
@@ -183,17 +514,44 @@ class DataProcessor:
     
     # Search and Filter Methods
     def search_employees(self, query: str) -> List[Dict]:
-        """Search employees by name or department"""
-        employees = self.get_all_employees()
-        results = []
+        """Search employees by substring of name, department or position"""
+        index = self.get_employee_index()
         query_lower = query.lower()
+        if 'table' in index:
+            return self._search_employee_table(index['table'], query_lower)
+        
+        employees = index['employees']
+        if not query_lower:
+            return list(employees)
         
-        for emp in employees:
-            if (query_lower in emp.get('name', '').lower() or
-                query_lower in emp.get('department', '').lower() or
-                query_lower in emp.get('position', '').lower()):
-                results.append(emp)
-        return results
+        # Short queries are n-grams themselves, so their posting list is the exact answer
+        if len(query_lower) <= EMPLOYEE_NGRAM_SIZE:
+            return [employees[i] for i in index['ngrams'].get(query_lower, [])]
+        
+        # Longer queries: intersect the posting lists of their n-grams, rarest first, then verify
+        grams = {query_lower[start:start + EMPLOYEE_NGRAM_SIZE] for start in range(len(query_lower) - EMPLOYEE_NGRAM_SIZE + 1)}
+        postings = sorted((index['ngrams'].get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        
+        return [
+            employees[i] for i in sorted(candidates)
+            if any(query_lower in field for field in index['fields'][i])
+        ]
+    
+    def _search_employee_table(self, table: pa.Table, query_lower: str) -> List[Dict]:
+        """Vectorized substring search over a table-backed roster, materializing only the matches"""
+        if not query_lower:
+            return table.to_pylist()
+        
+        mask = None
+        for column in ('name', 'department', 'position'):
+            matches = pc.match_substring(pc.utf8_lower(table.column(column)), query_lower)
+            mask = matches if mask is None else pc.or_(mask, matches)
+        return table.filter(pc.fill_null(mask, False)).to_pylist()
     
     def filter_areas_by_quality(self, min_score: float = 99.0) -> List[Dict]:
         """Filter areas by minimum quality score"""
@@ -203,26 +561,36 @@ class DataProcessor:
     
     def get_summary_stats(self) -> Dict:
         """Get summary statistics for dashboard"""
-        areas = self.get_service_areas()
-        metrics = self.get_operational_metrics()
+        def compute():
+            areas = self.get_service_areas()
+            metrics = self.get_operational_metrics()
+            
+            total_population = sum(area.get('population', 0) for area in areas)
+            total_connections = sum(area.get('service_connections', 0) for area in areas)
+            avg_quality = self.calculate_average_quality_score()
+            total_consumption = self.calculate_total_consumption()
+            
+            return {
+                'total_population_served': total_population,
+                'total_service_connections': total_connections,
+                'average_water_quality': round(avg_quality, 1),
+                'monthly_consumption_billion_liters': round(total_consumption, 1),
+                'treatment_plants': metrics.get('total_treatment_plants', 0),
+                'pipeline_network_km': metrics.get('total_pipeline_km', 0),
+                'customer_satisfaction': metrics.get('customer_satisfaction_score', 0),
+                'average_response_time': metrics.get('average_response_time_hours', 0)
+            }
         
-        total_population = sum(area.get('population', 0) for area in areas)
-        total_connections = sum(area.get('service_connections', 0) for area in areas)
-        avg_quality = self.calculate_average_quality_score()
-        total_consumption = self.calculate_total_consumption()
-        
-        return {
-            'total_population_served': total_population,
-            'total_service_connections': total_connections,
-            'average_water_quality': round(avg_quality, 1),
-            'monthly_consumption_billion_liters': round(total_consumption, 1),
-            'treatment_plants': metrics.get('total_treatment_plants', 0),
-            'pipeline_network_km': metrics.get('total_pipeline_km', 0),
-            'customer_satisfaction': metrics.get('customer_satisfaction_score', 0),
-            'average_response_time': metrics.get('average_response_time_hours', 0)
-        }
+        # Copy so callers that tweak the dict for display don't corrupt the cache
+        return dict(self._memoized('summary_stats', ('water_data',), compute))
 
 # Initialize global instance
 @st.cache_resource
+def _create_data_processor():
+    return DataProcessor()
+
 def get_data_processor():
-    return DataProcessor()
\ No newline at end of file
+    data_processor = _create_data_processor()
+    # Throttled mtime check, so edits to data/*.json show up without restarting the server
+    data_processor.reload_changed_files()
+    return data_processor
\ No newline at end of file
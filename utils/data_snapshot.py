@@ -0,0 +1,81 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, Optional
+
+import pandas as pd
+
+SNAPSHOT_DIRNAME = '.snapshots'
+
+# Bump when the shape of what DataProcessor snapshots changes, so old snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def snapshot_path(source_path: str) -> str:
+    """Where the snapshot of a data file lives: a .snapshots folder next to it"""
+    directory, filename = os.path.split(source_path)
+    return os.path.join(directory, SNAPSHOT_DIRNAME, filename + '.pickle')
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's bytes"""
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _format_key() -> tuple:
+    """Snapshots are only valid for the same snapshot format and pandas version that wrote them"""
+    return (SNAPSHOT_FORMAT_VERSION, pd.__version__)
+
+
+def load_snapshot(source_path: str, signature: tuple) -> Optional[Any]:
+    """Load the snapshot of source_path if it was built from the current file, else None"""
+    path = snapshot_path(source_path)
+    try:
+        with open(path, 'rb') as file:
+            # The small header is a separate pickle, so stale snapshots are rejected without loading the payload
+            header = pickle.load(file)
+            if header.get('format') != _format_key():
+                return None
+            
+            # A matching (mtime, size) is trusted; otherwise fall back to the content hash,
+            # so snapshots survive deploys that rewrite mtimes without changing content
+            if header.get('signature') != signature:
+                sha256 = file_sha256(source_path)
+                if header.get('sha256') != sha256:
+                    return None
+                payload = pickle.load(file)
+                write_snapshot(source_path, signature, payload, sha256)
+                return payload
+            
+            return pickle.load(file)
+    except Exception:
+        # Missing, truncated or incompatible snapshots just mean parsing the JSON again
+        return None
+
+
+def write_snapshot(source_path: str, signature: tuple, payload: Any, sha256: str):
+    """Atomically write a pickle-protocol-5 snapshot of payload for source_path"""
+    path = snapshot_path(source_path)
+    header = {
+        'format': _format_key(),
+        'signature': signature,
+        'sha256': sha256
+    }
+    
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Each worker writes its own temp file and renames it into place, so readers never see a partial snapshot
+        file = tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(path), delete=False)
+    except OSError:
+        # Read-only deployments simply run without snapshots
+        return
+    
+    try:
+        with file:
+            pickle.dump(header, file, protocol=5)
+            pickle.dump(payload, file, protocol=5)
+        os.replace(file.name, path)
+    except OSError:
+        os.unlink(file.name)
@@ -0,0 +1,93 @@
+import math
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+# A backup request goes out once the primary provider is slower than this percentile of its recent calls
+HEDGE_PERCENTILE = 95
+
+# Successful calls a provider needs before its own percentile is trusted; until then the default delay is used
+MIN_LATENCY_SAMPLES = 20
+DEFAULT_HEDGE_DELAY_SECONDS = 2.0
+
+# Never duplicate near-instant answers, and never wait on a stuck provider for longer than this
+MIN_HEDGE_DELAY_SECONDS = 0.25
+MAX_HEDGE_DELAY_SECONDS = 15.0
+
+# Share of primaries beaten by the backup that are left to finish instead of being cancelled; without them
+# the slow calls hedging cuts off would never reach the latency samples, hiding the tail it is meant to beat
+PRIMARY_SAMPLE_RATE = 0.1
+
+# Requests remembered for the latency percentiles in the stats
+MAX_TRACKED_REQUESTS = 1000
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank q-th percentile of values, None when there are none"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(q / 100 * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+def hedge_delay(samples: List[float]) -> float:
+    """Seconds to wait for the primary provider before sending the backup request"""
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return DEFAULT_HEDGE_DELAY_SECONDS
+    return min(max(percentile(samples, HEDGE_PERCENTILE), MIN_HEDGE_DELAY_SECONDS), MAX_HEDGE_DELAY_SECONDS)
+
+
+def latency_beyond(samples: List[float], elapsed: float) -> float:
+    """Estimated total latency of a call that was still running after elapsed seconds
+    
+    The median of the provider's recent latencies that exceeded elapsed, i.e. how long its slow calls
+    usually take; elapsed itself if none did. Used for the primary of a hedge the backup won, which is
+    cancelled before we learn how long it would have taken.
+    """
+    slower = [seconds for seconds in samples if seconds > elapsed]
+    return percentile(slower, 50) if slower else elapsed
+
+
+class HedgeTracker:
+    """Process-wide hedging stats: how often a backup request was sent and won, and the tail latency saved"""
+    
+    def __init__(self, max_requests: int = MAX_TRACKED_REQUESTS):
+        self.requests = 0
+        self.hedged = 0
+        self.backup_wins = 0
+        # What callers waited, and what they would have waited on the primary provider alone
+        self.latencies = deque(maxlen=max_requests)
+        self.primary_latencies = deque(maxlen=max_requests)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float, primary_seconds: float, hedged: bool, backup_won: bool):
+        """Record one request made in hedging mode"""
+        with self._lock:
+            self.requests += 1
+            self.hedged += hedged
+            self.backup_wins += backup_won
+            self.latencies.append(seconds)
+            self.primary_latencies.append(primary_seconds)
+    
+    def stats(self) -> Dict:
+        """Hedge rate, backup win count and p99 latency with hedging versus the primary alone"""
+        with self._lock:
+            p99 = percentile(list(self.latencies), 99)
+            primary_p99 = percentile(list(self.primary_latencies), 99)
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_rate': self.hedged / self.requests if self.requests else 0.0,
+                'backup_wins': self.backup_wins,
+                'p99_ms': round(p99 * 1000) if p99 is not None else None,
+                'primary_p99_ms': round(primary_p99 * 1000) if primary_p99 is not None else None,
+                'p99_saved_ms': round((primary_p99 - p99) * 1000) if p99 is not None else None
+            }
+
+
+# Initialize global instance
+@st.cache_resource
+def get_hedge_tracker():
+    return HedgeTracker()
@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List
+
+import streamlit as st
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Latency assumed for a provider before its first call, so untried providers keep their preference order
+DEFAULT_LATENCY_SECONDS = 2.0
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Recent successful call latencies kept per provider for percentiles (hedging delays, tail latency)
+LATENCY_SAMPLES = 200
+
+
+class ProviderUnavailableError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a sliding time window of call outcomes"""
+    
+    def __init__(self, window_seconds: float = 60.0, min_calls: int = 4, failure_rate_threshold: float = 0.5,
+                 cooldown_seconds: float = 30.0, max_cooldown_seconds: float = 600.0, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.base_cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.clock = clock
+        
+        self.state = CLOSED
+        self.cooldown_seconds = cooldown_seconds
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.outcomes = deque()
+        self.trips = 0
+    
+    def _prune(self, now: float):
+        """Forget outcomes older than the window"""
+        while self.outcomes and self.outcomes[0][0] < now - self.window_seconds:
+            self.outcomes.popleft()
+    
+    def _open(self, now: float, cooldown_seconds: float):
+        """Stop calls for cooldown_seconds"""
+        self.state = OPEN
+        self.opened_at = now
+        self.cooldown_seconds = min(cooldown_seconds, self.max_cooldown_seconds)
+        self.probe_in_flight = False
+        self.outcomes.clear()
+        self.trips += 1
+    
+    def available(self, now: float = None) -> bool:
+        """Whether a call could go through now, without reserving the half-open probe"""
+        now = self.clock() if now is None else now
+        if self.state == OPEN:
+            return now >= self.opened_at + self.cooldown_seconds
+        if self.state == HALF_OPEN:
+            return not self.probe_in_flight
+        return True
+    
+    def allow(self) -> bool:
+        """Reserve a call: always when closed, one probe after the cooldown, never while open"""
+        now = self.clock()
+        if not self.available(now):
+            return False
+        if self.state != CLOSED:
+            # Cooldown over: let exactly one request find out whether the provider recovered
+            self.state = HALF_OPEN
+            self.probe_in_flight = True
+        return True
+    
+    def record_success(self):
+        """Record a successful call; a successful probe closes the circuit"""
+        now = self.clock()
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self.cooldown_seconds = self.base_cooldown_seconds
+            self.probe_in_flight = False
+            self.outcomes.clear()
+        self.outcomes.append((now, True))
+        self._prune(now)
+    
+    def record_failure(self, trip: bool = False):
+        """Record a failed call; trip=True opens the circuit at once (e.g. rate limited)"""
+        now = self.clock()
+        if self.state == HALF_OPEN:
+            # Still failing: back off twice as long before the next probe
+            self._open(now, self.cooldown_seconds * 2)
+            return
+        
+        self.outcomes.append((now, False))
+        self._prune(now)
+        failures = sum(1 for _, ok in self.outcomes if not ok)
+        if trip or (len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate_threshold):
+            self._open(now, self.base_cooldown_seconds)
+    
+    def release_probe(self):
+        """Give back the half-open probe of a call that ended without an outcome (cancelled)"""
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+    
+    def success_rate(self) -> float:
+        """Smoothed success rate over the window; 0.5 with no recent calls"""
+        self._prune(self.clock())
+        successes = sum(1 for _, ok in self.outcomes if ok)
+        return (successes + 1) / (len(self.outcomes) + 2)
+
+
+class ProviderHealth:
+    """Process-wide circuit breakers and latency/error stats per AI provider, used to route requests"""
+    
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, float] = {}
+        self.samples: Dict[str, deque] = {}
+        self.calls: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        """Get a provider's breaker, creating it on first use"""
+        if provider not in self.breakers:
+            self.breakers[provider] = CircuitBreaker(**self.breaker_options)
+        return self.breakers[provider]
+    
+    def _record_latency(self, provider: str, seconds: float):
+        """Fold one call's latency into the provider's moving average"""
+        previous = self.latency.get(provider)
+        self.latency[provider] = seconds if previous is None else previous + LATENCY_EWMA_ALPHA * (seconds - previous)
+        self.calls[provider] = self.calls.get(provider, 0) + 1
+    
+    def allow(self, provider: str) -> bool:
+        """Reserve a call to a provider (see CircuitBreaker.allow)"""
+        with self._lock:
+            return self._breaker(provider).allow()
+    
+    def record_success(self, provider: str, seconds: float):
+        """Record a successful call and its latency"""
+        with self._lock:
+            self._breaker(provider).record_success()
+            self._record_latency(provider, seconds)
+            self.samples.setdefault(provider, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+    
+    def record_failure(self, provider: str, seconds: float, trip: bool = False):
+        """Record a failed call and its latency"""
+        with self._lock:
+            self._breaker(provider).record_failure(trip)
+            self._record_latency(provider, seconds)
+            self.failures[provider] = self.failures.get(provider, 0) + 1
+    
+    def release(self, provider: str):
+        """Release a reserved call that was cancelled before it succeeded or failed"""
+        with self._lock:
+            self._breaker(provider).release_probe()
+    
+    def expected_seconds(self, provider: str) -> float:
+        """Expected time to a successful answer: average latency divided by the recent success rate"""
+        with self._lock:
+            return self.latency.get(provider, DEFAULT_LATENCY_SECONDS) / self._breaker(provider).success_rate()
+    
+    def latency_samples(self, provider: str) -> List[float]:
+        """Latencies of the provider's most recent successful calls, oldest first"""
+        with self._lock:
+            return list(self.samples.get(provider, ()))
+    
+    def rank(self, providers: List[str]) -> List[str]:
+        """Providers whose circuit lets calls through, fastest expected answer first (ties keep the given order)"""
+        with self._lock:
+            candidates = [provider for provider in providers if self._breaker(provider).available()]
+        return sorted(candidates, key=self.expected_seconds)
+    
+    def call(self, provider: str, fn: Callable):
+        """Run a provider call through its circuit breaker, timing it; rate limit errors open the circuit at once"""
+        if not self.allow(provider):
+            raise ProviderUnavailableError(f"{provider} is cooling down after repeated failures")
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record_failure(provider, time.perf_counter() - start, is_rate_limit(e))
+            raise
+        except BaseException:
+            self.release(provider)
+            raise
+        self.record_success(provider, time.perf_counter() - start)
+        return result
+    
+    async def acall(self, provider: str, fn: Callable):
+        """Async variant of call for coroutine functions"""
+        if not self.allow(provider):
+            raise ProviderUnavailableError(f"{provider} is cooling down after repeated failures")
+        start = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception as e:
+            self.record_failure(provider, time.perf_counter() - start, is_rate_limit(e))
+            raise
+        except BaseException:
+            # Cancelled (e.g. the caller stopped waiting): not the provider's fault
+            self.release(provider)
+            raise
+        self.record_success(provider, time.perf_counter() - start)
+        return result
+    
+    def stream(self, provider: str, make_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Generator variant of call; the latency recorded is the time to the first chunk"""
+        if not self.allow(provider):
+            raise ProviderUnavailableError(f"{provider} is cooling down after repeated failures")
+        start = time.perf_counter()
+        first_chunk_seconds = None
+        try:
+            for chunk in make_stream():
+                if first_chunk_seconds is None:
+                    first_chunk_seconds = time.perf_counter() - start
+                yield chunk
+        except Exception as e:
+            self.record_failure(provider, time.perf_counter() - start, is_rate_limit(e))
+            raise
+        except BaseException:
+            # The reader stopped early (GeneratorExit)
+            self.release(provider)
+            raise
+        self.record_success(provider, first_chunk_seconds if first_chunk_seconds is not None else time.perf_counter() - start)
+    
+    def stats(self, providers: List[str] = None) -> Dict[str, Dict]:
+        """State, trip count, average latency and failure counts per provider"""
+        with self._lock:
+            return {
+                provider: {
+                    'state': self._breaker(provider).state,
+                    'trips': self._breaker(provider).trips,
+                    'latency_ms': round(self.latency[provider] * 1000) if provider in self.latency else None,
+                    'calls': self.calls.get(provider, 0),
+                    'failures': self.failures.get(provider, 0)
+                }
+                for provider in (providers if providers is not None else list(self.breakers))
+            }
+
+
+# SDK exception types for HTTP 429 (openai/anthropic RateLimitError, google.api_core ResourceExhausted)
+RATE_LIMIT_ERROR_NAMES = {'RateLimitError', 'ResourceExhausted', 'TooManyRequests'}
+
+def is_rate_limit(error: Exception) -> bool:
+    """Whether a provider error is a quota/rate limit error (HTTP 429), which will keep failing until it resets"""
+    if type(error).__name__ in RATE_LIMIT_ERROR_NAMES:
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return status == 429
+
+
+# Initialize global instance
+@st.cache_resource
+def get_provider_health():
+    return ProviderHealth()
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import streamlit as st
+
+from utils.provider_health import ProviderUnavailableError
+
+# Requests/tokens per minute per provider account, kept a little under the published tier limits, and an
+# optional daily token budget (None = unlimited). Override any of them with [AI_RATE_LIMITS.<provider>] in secrets.
+DEFAULT_RATE_LIMITS = {
+    'gemini': {'rpm': 15, 'tpm': 1_000_000, 'daily_tokens': None},
+    'openai': {'rpm': 500, 'tpm': 60_000, 'daily_tokens': None},
+    'anthropic': {'rpm': 50, 'tpm': 50_000, 'daily_tokens': None}
+}
+
+# How long a request may wait for capacity before it is routed to another provider instead
+MAX_QUEUE_SECONDS = 2.0
+
+# Completion size assumed when reserving capacity for calls without max_tokens; settled to actual usage afterwards
+DEFAULT_COMPLETION_TOKENS = 1024
+
+
+class ProviderRateLimitedError(ProviderUnavailableError):
+    """Raised when a provider has no rate limit capacity or daily budget left for a request"""
+
+
+def estimate_tokens(text) -> int:
+    """Rough token count of a prompt (about four characters per token)"""
+    if isinstance(text, (list, tuple)):
+        text = "\n".join(str(part) for part in text)
+    return len(str(text)) // 4 + 1
+
+
+class TokenBucket:
+    """Token bucket that may go into debt: callers reserve now and wait until the debt is refilled"""
+    
+    def __init__(self, capacity: float, refill_per_second: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+    
+    def _refill(self):
+        """Add the tokens accrued since the last update"""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+    
+    def wait_seconds(self, amount: float) -> float:
+        """Seconds until amount could be taken without debt (requests larger than the bucket wait for a full one)"""
+        self._refill()
+        deficit = min(amount, self.capacity) - self.tokens
+        return max(deficit, 0.0) / self.refill_per_second
+    
+    def take(self, amount: float):
+        """Remove tokens, possibly going negative; negative amounts give tokens back"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+    
+    def available(self) -> float:
+        """Tokens that can be taken right now"""
+        self._refill()
+        return max(self.tokens, 0.0)
+
+
+class RateLimiter:
+    """Process-wide requests-per-minute, tokens-per-minute and daily token budgets per provider account and model"""
+    
+    def __init__(self, limits: Dict[str, Dict] = None, max_queue_seconds: float = MAX_QUEUE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.limits = limits or DEFAULT_RATE_LIMITS
+        self.max_queue_seconds = max_queue_seconds
+        self.clock = clock
+        self._accounts: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+    
+    def _account(self, key: str, provider: str) -> Dict:
+        """Buckets and daily usage for one provider account and model, created on first use"""
+        account = self._accounts.get(key)
+        if account is None:
+            limits = self.limits.get(provider, {})
+            rpm = limits.get('rpm') or 60
+            tpm = limits.get('tpm') or 100_000
+            account = {
+                'provider': provider,
+                'requests': TokenBucket(rpm, rpm / 60.0, self.clock),
+                'tokens': TokenBucket(tpm, tpm / 60.0, self.clock),
+                'daily_tokens': limits.get('daily_tokens'),
+                'day': date.today(),
+                'used_today': 0,
+                'requests_today': 0,
+                'queued': 0,
+                'rejected': 0
+            }
+            self._accounts[key] = account
+        if account['day'] != date.today():
+            account['day'] = date.today()
+            account['used_today'] = 0
+            account['requests_today'] = 0
+        return account
+    
+    def reserve(self, key: str, provider: str, tokens: int, max_wait: Optional[float] = None) -> float:
+        """Reserve one request and an estimated token count; returns how long to wait before sending it
+        
+        Raises ProviderRateLimitedError when the daily budget would be exceeded or the wait would be
+        longer than max_wait, so the caller can use another provider right away.
+        """
+        max_wait = self.max_queue_seconds if max_wait is None else max_wait
+        with self._lock:
+            account = self._account(key, provider)
+            budget = account['daily_tokens']
+            if budget is not None and account['used_today'] + tokens > budget:
+                account['rejected'] += 1
+                raise ProviderRateLimitedError(f"{provider} daily token budget of {budget:,} is used up")
+            
+            wait = max(account['requests'].wait_seconds(1), account['tokens'].wait_seconds(tokens))
+            if wait > max_wait:
+                account['rejected'] += 1
+                raise ProviderRateLimitedError(f"{provider} is at its rate limit (next slot in {wait:.1f}s)")
+            
+            # Taking the capacity now (into debt if needed) queues later callers behind this one
+            account['requests'].take(1)
+            account['tokens'].take(tokens)
+            account['used_today'] += tokens
+            account['requests_today'] += 1
+            account['queued'] += wait > 0
+            return wait
+    
+    def settle(self, key: str, provider: str, reserved_tokens: int, used_tokens: Optional[int]):
+        """Correct a reservation with the tokens the provider reported (no-op when unknown)"""
+        if used_tokens is None:
+            return
+        with self._lock:
+            account = self._account(key, provider)
+            account['tokens'].take(used_tokens - reserved_tokens)
+            account['used_today'] += used_tokens - reserved_tokens
+    
+    def acquire(self, key: str, provider: str, tokens: int):
+        """Reserve capacity and sleep through any queueing delay"""
+        wait = self.reserve(key, provider, tokens)
+        if wait:
+            time.sleep(wait)
+    
+    async def aacquire(self, key: str, provider: str, tokens: int):
+        """Async variant of acquire: waits without blocking the event loop"""
+        wait = self.reserve(key, provider, tokens)
+        if wait:
+            await asyncio.sleep(wait)
+    
+    def stats(self, keys: List[str] = None) -> Dict[str, Dict]:
+        """Remaining per-minute capacity and today's usage per account"""
+        with self._lock:
+            return {
+                key: {
+                    'requests_available': int(account['requests'].available()),
+                    'rpm': account['requests'].capacity,
+                    'tokens_available': int(account['tokens'].available()),
+                    'tpm': account['tokens'].capacity,
+                    'tokens_today': account['used_today'],
+                    'requests_today': account['requests_today'],
+                    'daily_tokens': account['daily_tokens'],
+                    'queued': account['queued'],
+                    'rejected': account['rejected']
+                }
+                for key, account in self._accounts.items()
+                if keys is None or key in keys
+            }
+
+
+def _configured_limits() -> Dict[str, Dict]:
+    """Default limits overridden by [AI_RATE_LIMITS.<provider>] tables in secrets, if any"""
+    limits = {provider: dict(values) for provider, values in DEFAULT_RATE_LIMITS.items()}
+    try:
+        overrides = st.secrets.get("AI_RATE_LIMITS", {})
+    except Exception:
+        # No secrets file: run with the defaults
+        overrides = {}
+    for provider, values in dict(overrides).items():
+        limits.setdefault(provider, {}).update(dict(values))
+    return limits
+
+
+# Initialize global instance
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter(_configured_limits())
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import streamlit as st
+
+
+class ResponseCache:
+    """Process-wide LRU cache for AI provider responses with per-entry TTL"""
+    
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 900.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Collapse whitespace so re-indented prompts share a cache entry"""
+        return " ".join(str(prompt).split())
+    
+    def make_key(self, provider: str, model: str, prompt: Any, params: Optional[Dict] = None) -> str:
+        """Build a cache key from provider, model, normalized prompt and generation parameters"""
+        if isinstance(prompt, (list, tuple)):
+            prompt = "\n".join(self.normalize_prompt(part) for part in prompt)
+        else:
+            prompt = self.normalize_prompt(prompt)
+        
+        payload = json.dumps(
+            {"provider": provider, "model": model, "prompt": prompt, "params": params or {}},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entries past capacity"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def get_or_call(self, key: str, fn: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """Return the cached value for key, calling fn and caching its result on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        value = fn()
+        if value:
+            self.set(key, value, ttl_seconds)
+        return value
+    
+    async def aget_or_call(self, key: str, fn: Callable[[], Awaitable[Any]], ttl_seconds: Optional[float] = None) -> Any:
+        """Async variant of get_or_call for coroutine-returning callables"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        value = await fn()
+        if value:
+            self.set(key, value, ttl_seconds)
+        return value
+    
+    def clear(self):
+        """Drop every cached entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+# Initialize global instance
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.text import QUESTION_WORDS, STOPWORDS, split_passages, words
+
+INDEX_DIR = 'data/index'
+KNOWLEDGE_INDEX = 'knowledge'
+
+# Hashed feature space: words, word bigrams, character n-grams and synonym concepts share one
+# fixed-size vector, so the index needs no vocabulary and new text never changes its shape
+VECTOR_DIMENSIONS = 2 ** 14
+CHAR_NGRAM_SIZES = (3, 4, 5)
+
+# Feature weights before IDF: whole words count most, character n-grams catch typos and word forms,
+# concepts let different words for the same thing ("paid", "payroll", "salary") match
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 1.0
+CHAR_NGRAM_WEIGHT = 0.15
+CONCEPT_WEIGHT = 3.0
+
+# Bump when the features change so stale offline indexes are rebuilt
+VECTORIZER_VERSION = 3
+
+# Hits below this cosine similarity are not returned
+MIN_SIMILARITY = 0.1
+
+# An FAQ entry whose question is this similar to the query, and this much more similar than the next
+# entry, is shown as the answer without an LLM call (policy passages are never answers on their own)
+DIRECT_ANSWER_SIMILARITY = 0.6
+DIRECT_ANSWER_MARGIN = 0.05
+
+# Small HR synonym lexicon standing in for a language model: every word of a group adds the group's
+# concept feature, so questions match answers phrased with other words
+CONCEPTS = {
+    'pay': ['pay', 'paid', 'payday', 'payroll', 'payslip', 'paycheck', 'salary', 'salaries', 'wage', 'wages', 'compensation'],
+    'leave': ['leave', 'leaves', 'vacation', 'holiday', 'holidays', 'pto', 'absence', 'absent', 'off'],
+    'sick': ['sick', 'ill', 'illness', 'medical', 'doctor', 'hospital', 'hospitalization'],
+    'health': ['health', 'insurance', 'hmo', 'medical', 'dental', 'vision', 'wellness', 'maxicare', 'intellicare'],
+    'remote': ['remote', 'home', 'wfh', 'hybrid', 'telecommute', 'flexible'],
+    'training': ['training', 'train', 'course', 'courses', 'learning', 'learn', 'seminar', 'certification', 'development'],
+    'onboarding': ['onboarding', 'orientation', 'first', 'newcomer', 'start', 'starting', 'join', 'joining'],
+    'conduct': ['harassment', 'discrimination', 'bullying', 'misconduct', 'ethics', 'conduct', 'complaint', 'grievance'],
+    'dress': ['dress', 'uniform', 'uniforms', 'attire', 'clothes', 'clothing', 'wear'],
+    'separation': ['retire', 'retirement', 'resign', 'resignation', 'separation', 'quit', 'exit', 'leaving'],
+    'schedule': ['schedule', 'hours', 'shift', 'shifts', 'overtime', 'attendance', 'timekeeping'],
+    'equipment': ['equipment', 'laptop', 'computer', 'tools', 'ppe', 'gear'],
+    'benefits': ['benefit', 'benefits', 'perks', 'allowance', 'allowances', 'bonus', 'bonuses', 'incentive', 'incentives'],
+    'safety': ['safety', 'safe', 'accident', 'injury', 'hazard', 'emergency'],
+    'review': ['review', 'appraisal', 'evaluation', 'performance', 'rating', 'promotion'],
+    'privacy': ['privacy', 'data', 'personal', 'confidential', 'confidentiality']
+}
+WORD_CONCEPTS = {
+    word: [concept for concept, members in CONCEPTS.items() if word in members]
+    for members in CONCEPTS.values() for word in members
+}
+
+
+def text_features(text: str) -> Dict[str, float]:
+    """Weighted features of a text: words, word bigrams, character n-grams of each word and concepts"""
+    text_words = words(text, STOPWORDS | QUESTION_WORDS)
+    features: Dict[str, float] = {}
+    
+    def add(feature: str, weight: float):
+        features[feature] = features.get(feature, 0.0) + weight
+    
+    for word in text_words:
+        add('w:' + word, WORD_WEIGHT)
+        padded = f" {word} "
+        for size in CHAR_NGRAM_SIZES:
+            for start in range(len(padded) - size + 1):
+                add('c:' + padded[start:start + size], CHAR_NGRAM_WEIGHT)
+        for concept in WORD_CONCEPTS.get(word, ()):
+            add('k:' + concept, CONCEPT_WEIGHT)
+    for first, second in zip(text_words, text_words[1:]):
+        add(f"b:{first}_{second}", BIGRAM_WEIGHT)
+    return features
+
+
+def hash_vector(text: str, dimensions: int = VECTOR_DIMENSIONS) -> np.ndarray:
+    """Term weights of a text hashed into a fixed-size vector (signed, so collisions tend to cancel out)"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for feature, weight in text_features(text).items():
+        # crc32 rather than hash(): it is the same in every process, so offline indexes stay valid
+        digest = zlib.crc32(feature.encode('utf-8'))
+        vector[digest % dimensions] += (1.0 if (digest // dimensions) % 2 else -1.0) * math.log1p(weight)
+    return vector
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize the last axis, leaving all-zero rows untouched"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class SemanticIndex:
+    """Documents and their hashed n-gram vectors, searched by cosine similarity with one matrix-vector product"""
+    
+    def __init__(self, documents: List[Dict], vectors: np.ndarray, idf: np.ndarray):
+        self.documents = documents
+        self.vectors = vectors
+        self.idf = idf
+    
+    @classmethod
+    def build(cls, documents: List[Dict], dimensions: int = VECTOR_DIMENSIONS) -> "SemanticIndex":
+        """Vectorize documents by their 'text', weighting each hashed feature by its inverse document frequency"""
+        raw = np.array([hash_vector(document['text'], dimensions) for document in documents], dtype=np.float32).reshape(len(documents), dimensions)
+        document_frequency = (raw != 0).sum(axis=0)
+        idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return cls(documents, _normalize(raw * idf).astype(np.float32), idf)
+    
+    def search(self, query: str, k: int = 5, kinds: set = None, min_similarity: float = MIN_SIMILARITY) -> List[Dict]:
+        """The k documents most similar to the query (optionally only of some kinds), with their 'score'
+        
+        Documents sharing an 'id' (an FAQ entry's question and answer passages) are returned once, for
+        their best match.
+        """
+        if not len(self.documents):
+            return []
+        query_vector = _normalize(hash_vector(query, self.vectors.shape[1]) * self.idf)
+        scores = self.vectors @ query_vector
+        if kinds is not None:
+            scores = np.where([document.get('kind') in kinds for document in self.documents], scores, -1.0)
+        
+        results = []
+        seen = set()
+        for i in np.argsort(-scores, kind='stable'):
+            if scores[i] < min_similarity or len(results) == k:
+                break
+            document = self.documents[i]
+            if document.get('id') in seen:
+                continue
+            seen.add(document.get('id'))
+            results.append(dict(document, score=round(float(scores[i]), 3)))
+        return results
+    
+    def best_answer(self, query: str) -> Optional[Dict]:
+        """The FAQ entry whose question the query restates closely enough to answer it on its own, else None"""
+        hits = self.search(query, 2, kinds={'faq'})
+        # Each entry comes back for its best match, so a hit on the answer text means the question itself didn't match
+        if not hits or hits[0]['part'] != 'question' or hits[0]['score'] < DIRECT_ANSWER_SIMILARITY:
+            return None
+        # Two close candidates mean the question is ambiguous; leave it to the assistant
+        if len(hits) > 1 and hits[0]['score'] - hits[1]['score'] < DIRECT_ANSWER_MARGIN:
+            return None
+        return hits[0]
+
+
+def knowledge_documents(policies_data: Dict) -> List[Dict]:
+    """FAQ entries and policy passages from policies.json, as documents for the semantic index"""
+    documents = []
+    for number, item in enumerate(policies_data.get('onboarding_faq', [])):
+        question, answer = item.get('question', ''), item.get('answer', '')
+        entry = {'id': f"faq:{number}", 'kind': 'faq', 'source': 'Onboarding FAQ', 'question': question, 'answer': answer}
+        # Questions are indexed on their own (a long answer would drown out how people phrase them)
+        # and with each passage of their answer, for questions about a detail of it
+        documents.append(dict(entry, part='question', text=question))
+        for passage in split_passages(answer):
+            documents.append(dict(entry, part='answer', text=f"{question} {passage}"))
+    for key, policy in policies_data.get('hr_policies', {}).items():
+        title = policy.get('title', key.replace('_', ' '))
+        for number, passage in enumerate(split_passages(policy.get('content', ''))):
+            documents.append({'id': f"{key}:{number}", 'kind': 'policy', 'source': title, 'policy': key,
+                              'passage': passage, 'text': f"{title} {passage}"})
+    return documents
+
+
+def _fingerprint(documents: List[Dict], dimensions: int) -> str:
+    """Identifies the documents and vectorizer an index was built from"""
+    payload = json.dumps([VECTORIZER_VERSION, dimensions, [document['text'] for document in documents]])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _index_paths(name: str, directory: str) -> Dict[str, str]:
+    """Files of a saved index: vector matrix, IDF weights and metadata"""
+    base = os.path.join(directory, name)
+    return {'vectors': base + '.npy', 'idf': base + '.idf.npy', 'meta': base + '.json'}
+
+
+def _replace_file(path: str, write):
+    """Write a file through a temp file and an atomic rename: workers may have the old one memory-mapped"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as file:
+        write(file)
+    os.chmod(file.name, 0o644)
+    os.replace(file.name, path)
+
+
+def save_index(index: SemanticIndex, name: str = KNOWLEDGE_INDEX, directory: str = INDEX_DIR) -> Dict[str, str]:
+    """Save an index as a .npy vector matrix (memory-mappable), its IDF weights and JSON metadata"""
+    paths = _index_paths(name, directory)
+    meta = {'fingerprint': _fingerprint(index.documents, index.vectors.shape[1]), 'documents': index.documents}
+    _replace_file(paths['vectors'], lambda file: np.save(file, np.ascontiguousarray(index.vectors, dtype=np.float32)))
+    _replace_file(paths['idf'], lambda file: np.save(file, index.idf))
+    _replace_file(paths['meta'], lambda file: file.write(json.dumps(meta).encode('utf-8')))
+    return paths
+
+
+def load_knowledge_index(policies_data: Dict, directory: str = INDEX_DIR) -> SemanticIndex:
+    """The knowledge index for policies.json: memory-mapped from the offline build when it is current, else built now"""
+    documents = knowledge_documents(policies_data)
+    paths = _index_paths(KNOWLEDGE_INDEX, directory)
+    try:
+        with open(paths['meta'], 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta.get('fingerprint') == _fingerprint(documents, VECTOR_DIMENSIONS):
+            return SemanticIndex(meta['documents'], np.load(paths['vectors'], mmap_mode='r'), np.load(paths['idf']))
+    except (OSError, ValueError, KeyError):
+        # No usable offline index: fall through and build one in memory
+        pass
+    return SemanticIndex.build(documents)
+
+
+if __name__ == '__main__':
+    # python -m utils.semantic_index
+    from utils.data_processor import DataProcessor
+    
+    knowledge = SemanticIndex.build(knowledge_documents(DataProcessor().get_dataset('policies')))
+    for kind, path in save_index(knowledge).items():
+        print(f"{kind}: {path}")
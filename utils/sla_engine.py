@@ -0,0 +1,267 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+from utils.data_processor import get_data_processor
+from utils.ticket_store import CLOSED_STATUSES
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Resolution window used when neither the category nor the priority defines one
+DEFAULT_RESOLUTION_HOURS = 24.0
+
+# An open ticket is at risk once less than this fraction of its resolution window remains
+AT_RISK_FRACTION = 0.25
+
+# Breach risk of an open ticket, in the order it moves through them
+RISK_LEVELS = ['On Track', 'At Risk', 'Breached']
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Parse a ticket timestamp ('YYYY-MM-DD HH:MM:SS' or ISO), None if missing or malformed"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), TIMESTAMP_FORMAT)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+
+class SLAMonitor:
+    """Tracks SLA deadlines, breach risk and escalation of every ticket with a heap of upcoming SLA events"""
+    
+    def __init__(self, categories: List[Dict], sla_targets: Dict[str, Dict], escalation_matrix: List[Dict]):
+        self.category_hours = {category.get('name'): category.get('sla_hours') for category in categories}
+        self.priority_hours = {priority: target.get('resolution_hours') for priority, target in sla_targets.items()}
+        self.escalation_levels = sorted(escalation_matrix, key=lambda level: level.get('trigger_hours', 0))
+        
+        # Open tickets each have their next SLA event (at risk, breach or the next escalation level)
+        # in one heap: (time, entry id, ticket id). Rescheduling a ticket pushes a new entry and records
+        # its id on the ticket; superseded entries are skipped when popped, so every change is O(log n).
+        self._heap = []
+        self._entry_ids = itertools.count()
+        self._stale_entries = 0
+        self.tickets = {}
+        self.clock = datetime.min
+        self.revision = None
+        self._lock = threading.Lock()
+        
+        # Running totals, adjusted as tickets are tracked, advance through their events or close
+        self.risk_counts = {risk: 0 for risk in RISK_LEVELS}
+        self.escalation_counts = {level.get('level'): 0 for level in self.escalation_levels}
+        self.met = 0
+        self.missed = 0
+        self.escalated = 0
+    
+    def resolution_hours(self, category: str, priority: str) -> float:
+        """Resolution window of a ticket: the stricter of its category SLA and its priority target"""
+        windows = [hours for hours in (self.category_hours.get(category), self.priority_hours.get(priority)) if hours]
+        return float(min(windows)) if windows else DEFAULT_RESOLUTION_HOURS
+    
+    def escalation_level_at(self, age: timedelta) -> int:
+        """Escalation level reached by a ticket open for this long (0 if none)"""
+        level = 0
+        for escalation in self.escalation_levels:
+            if age >= timedelta(hours=escalation.get('trigger_hours', 0)):
+                level = escalation.get('level', level + 1)
+        return level
+    
+    def escalate_to(self, level: int) -> str:
+        """Who an escalation level goes to"""
+        for escalation in self.escalation_levels:
+            if escalation.get('level') == level:
+                return escalation.get('escalate_to', '')
+        return ''
+    
+    def _schedule(self, record: Dict):
+        """Push an open ticket's next pending event onto the heap"""
+        if record['next_event'] < len(record['events']):
+            record['entry'] = next(self._entry_ids)
+            heapq.heappush(self._heap, (record['events'][record['next_event']][0], record['entry'], record['id']))
+    
+    def track(self, ticket: Dict):
+        """Add a ticket (open or closed), replacing whatever was tracked under its id"""
+        self.untrack(ticket.get('id'))
+        created = parse_timestamp(ticket.get('created_date'))
+        if created is None:
+            return
+        
+        window = timedelta(hours=self.resolution_hours(ticket.get('category'), ticket.get('priority')))
+        record = {
+            'id': ticket.get('id'),
+            'created': created,
+            'deadline': created + window,
+            'closed': ticket.get('status') in CLOSED_STATUSES
+        }
+        self.tickets[record['id']] = record
+        
+        if record['closed']:
+            # Closed tickets only count towards compliance when we know when they were resolved
+            resolved = parse_timestamp(ticket.get('actual_resolution'))
+            record['resolved'] = resolved
+            record['escalation_level'] = self.escalation_level_at(resolved - created) if resolved else 0
+            if resolved is not None:
+                if resolved <= record['deadline']:
+                    self.met += 1
+                else:
+                    self.missed += 1
+            self.escalated += record['escalation_level'] > 0
+            return
+        
+        # An open ticket starts on track at level 0 and replays its timeline from the heap
+        record['risk'] = 'On Track'
+        record['escalation_level'] = 0
+        record['events'] = sorted(
+            [(record['deadline'] - window * AT_RISK_FRACTION, 'risk', 'At Risk'), (record['deadline'], 'risk', 'Breached')]
+            + [(created + timedelta(hours=level.get('trigger_hours', 0)), 'escalation', level.get('level')) for level in self.escalation_levels],
+            key=lambda event: event[0]
+        )
+        record['next_event'] = 0
+        self.risk_counts['On Track'] += 1
+        self._schedule(record)
+    
+    def untrack(self, ticket_id: str):
+        """Remove a ticket's contribution to every total"""
+        record = self.tickets.pop(ticket_id, None)
+        if record is None:
+            return
+        
+        if record['closed']:
+            if record['resolved'] is not None:
+                if record['resolved'] <= record['deadline']:
+                    self.met -= 1
+                else:
+                    self.missed -= 1
+        else:
+            self.risk_counts[record['risk']] -= 1
+            if record['escalation_level']:
+                self.escalation_counts[record['escalation_level']] -= 1
+            if record['next_event'] < len(record['events']):
+                self._stale_entries += 1
+        self.escalated -= record['escalation_level'] > 0
+    
+    def advance(self, now: datetime):
+        """Apply every SLA event due by now, in deadline order"""
+        self.clock = max(self.clock, now)
+        while self._heap and self._heap[0][0] <= self.clock:
+            entry = heapq.heappop(self._heap)
+            if not self._is_current(entry):
+                self._stale_entries -= 1
+                continue
+            record = self.tickets[entry[2]]
+            
+            _, kind, value = record['events'][record['next_event']]
+            if kind == 'risk':
+                self.risk_counts[record['risk']] -= 1
+                self.risk_counts[value] += 1
+                record['risk'] = value
+            else:
+                if record['escalation_level']:
+                    self.escalation_counts[record['escalation_level']] -= 1
+                else:
+                    self.escalated += 1
+                self.escalation_counts[value] += 1
+                record['escalation_level'] = value
+            
+            record['next_event'] += 1
+            self._schedule(record)
+        
+        # Drop superseded entries once they make up most of the heap
+        if self._stale_entries > len(self._heap) // 2 and self._stale_entries > 64:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+            self._stale_entries = 0
+    
+    def _is_current(self, entry: tuple) -> bool:
+        """Whether a heap entry is still the next event of an open ticket"""
+        record = self.tickets.get(entry[2])
+        return record is not None and not record['closed'] and record.get('entry') == entry[1]
+    
+    def sync(self, ticket_store, now: datetime = None):
+        """Catch up with tickets written to the store since the last sync, then advance to now"""
+        with self._lock:
+            if self.revision is None:
+                # Read the revision first: anything written while listing is simply re-applied next time
+                self.revision = ticket_store.get_revision()
+                for ticket in ticket_store.list_tickets(descending=False):
+                    self.track(ticket)
+            else:
+                self.revision, ticket_ids = ticket_store.changes_since(self.revision)
+                for ticket_id in ticket_ids:
+                    ticket = ticket_store.get_ticket(ticket_id)
+                    if ticket:
+                        self.track(ticket)
+                    else:
+                        self.untrack(ticket_id)
+            self.advance(now or datetime.now())
+    
+    def _status(self, record: Dict) -> Dict:
+        """Deadline, breach risk and escalation of a tracked ticket record (caller holds the lock)"""
+        status = {
+            'deadline': record['deadline'],
+            'escalation_level': record['escalation_level'],
+            'escalate_to': self.escalate_to(record['escalation_level'])
+        }
+        if record['closed']:
+            resolved = record['resolved']
+            status['risk'] = 'Unknown' if resolved is None else ('Met' if resolved <= record['deadline'] else 'Missed')
+        else:
+            status['risk'] = record['risk']
+            status['remaining_hours'] = (record['deadline'] - self.clock).total_seconds() / 3600
+        return status
+    
+    def ticket_status(self, ticket_id: str) -> Dict:
+        """Deadline, breach risk and escalation of one ticket (empty if it isn't tracked)"""
+        # Other sessions sync the shared monitor concurrently, so reads take the lock too
+        with self._lock:
+            record = self.tickets.get(ticket_id)
+            return self._status(record) if record is not None else {}
+    
+    def watchlist(self, limit: int = 10) -> List[Dict]:
+        """Open tickets that are at risk or breached, most overdue first"""
+        with self._lock:
+            records = [record for record in self.tickets.values() if not record['closed'] and record['risk'] != 'On Track']
+            return [
+                dict(self._status(record), id=record['id'])
+                for record in heapq.nsmallest(limit, records, key=lambda record: record['deadline'])
+            ]
+    
+    def get_metrics(self) -> Dict:
+        """SLA compliance, breach risk and escalation totals"""
+        with self._lock:
+            breached = self.risk_counts['Breached']
+            judged = self.met + self.missed + breached
+            return {
+                'tracked': len(self.tickets),
+                'open': sum(self.risk_counts.values()),
+                'risk': dict(self.risk_counts),
+                'escalation_levels': dict(self.escalation_counts),
+                'met': self.met,
+                'missed': self.missed,
+                'escalated': self.escalated,
+                # Late resolutions and open breaches both count against compliance
+                'sla_compliance': round(self.met / judged * 100, 1) if judged else None,
+                'escalation_rate': round(self.escalated / len(self.tickets) * 100, 1) if self.tickets else None
+            }
+
+# Initialize global instance
+@st.cache_resource(max_entries=1)
+def _create_sla_monitor(tickets_version: int, _data_processor):
+    return SLAMonitor(
+        _data_processor.get_ticket_categories(),
+        _data_processor.get_sla_targets(),
+        _data_processor.get_escalation_matrix()
+    )
+
+def get_sla_monitor(ticket_store) -> SLAMonitor:
+    data_processor = get_data_processor()
+    data_processor.get_dataset('tickets')
+    # Keyed on the tickets data version so edited SLA targets rebuild the monitor from the store
+    monitor = _create_sla_monitor(data_processor.get_data_version('tickets'), data_processor)
+    monitor.sync(ticket_store)
+    return monitor
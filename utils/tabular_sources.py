@@ -0,0 +1,81 @@
+import os
+import tempfile
+from typing import Dict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+TABULAR_DIR = 'data/tables'
+
+# Tabular collections that may come from an Arrow/Parquet file instead of the JSON: name -> (dataset, field)
+TABULAR_SOURCES = {
+    'employees': ('employees', 'employees'),
+    'sample_tickets': ('tickets', 'sample_tickets'),
+    'ticket_trends': ('tickets', 'ticket_trends'),
+    'monthly_trends': ('water_data', 'monthly_trends')
+}
+
+# Arrow IPC is preferred: it is read zero-copy from the page cache, which every worker process shares.
+# Parquet is memory-mapped too, but decoding it copies the columns into each process.
+TABLE_EXTENSIONS = ('.arrow', '.feather', '.parquet')
+
+
+def find_table_sources(dataset: str, directory: str = TABULAR_DIR) -> Dict[str, str]:
+    """Map each tabular collection of a dataset to its Arrow/Parquet file, when one exists"""
+    sources = {}
+    for name, (source_dataset, _) in TABULAR_SOURCES.items():
+        if source_dataset != dataset:
+            continue
+        for extension in TABLE_EXTENSIONS:
+            path = os.path.join(directory, name + extension)
+            if os.path.exists(path):
+                sources[name] = path
+                break
+    return sources
+
+
+def open_table(path: str) -> pa.Table:
+    """Open an Arrow IPC or Parquet file with memory mapping"""
+    if path.endswith('.parquet'):
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def write_table(table: pa.Table, path: str):
+    """Write a table as uncompressed Arrow IPC (or Parquet by extension), replacing the file atomically"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    
+    # Never rewrite a file in place: workers may have it memory-mapped
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as file:
+        temp_path = file.name
+    if path.endswith('.parquet'):
+        pq.write_table(table, temp_path)
+    else:
+        with pa.OSFile(temp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Temp files are created private; tables are read by every worker
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+
+
+def export_tables(data_processor, directory: str = TABULAR_DIR, extension: str = '.arrow') -> Dict[str, str]:
+    """Export every tabular collection from the loaded data to Arrow/Parquet files; returns name -> path"""
+    exported = {}
+    for name in TABULAR_SOURCES:
+        records = data_processor.get_table_records(name)
+        if not records:
+            continue
+        path = os.path.join(directory, name + extension)
+        write_table(pa.Table.from_pylist(records), path)
+        exported[name] = path
+    return exported
+
+
+if __name__ == '__main__':
+    # python -m utils.tabular_sources [.arrow|.parquet]
+    import sys
+    from utils.data_processor import DataProcessor
+    
+    for name, path in export_tables(DataProcessor(), extension=(sys.argv[1:] or ['.arrow'])[0]).items():
+        print(f"{name}: {path}")
@@ -0,0 +1,255 @@
+import numpy as np
+from datetime import datetime
+from typing import Dict, List
+
+# Specialties that handle each ticket category: first is the primary skill, the rest can cover it
+CATEGORY_SPECIALTIES = {
+    'Water Quality Issues': ['Water Quality', 'Quality Control'],
+    'Billing Inquiries': ['Billing Systems', 'Customer Service'],
+    'Service Interruption': ['Network Maintenance', 'Emergency Repairs', 'Infrastructure'],
+    'New Connection Request': ['New Connections', 'Infrastructure'],
+    'Meter Reading Issues': ['Meter Services'],
+    'Leak Reports': ['Leak Detection', 'Infrastructure', 'Network Maintenance'],
+    'Payment Issues': ['Billing Systems', 'Customer Service'],
+    'Disconnection Request': ['Customer Service', 'Meter Services'],
+    'Emergency Repairs': ['Emergency Repairs', 'Infrastructure'],
+    'Pressure Problems': ['Pressure Systems', 'Network Maintenance'],
+    'Water Contamination': ['Quality Control', 'Water Quality', 'Emergency Repairs'],
+    'Meter Installation': ['Meter Services', 'New Connections']
+}
+
+# Service areas -> technician zones
+AREA_ZONES = {
+    'Quezon City': 'North Manila', 'Caloocan': 'North Manila', 'Malabon': 'North Manila',
+    'Navotas': 'North Manila', 'Valenzuela': 'North Manila',
+    'Makati': 'Central Manila', 'Mandaluyong': 'Central Manila', 'San Juan': 'Central Manila',
+    'Manila': 'West Manila',
+    'Pasig': 'East Manila', 'Marikina': 'East Manila',
+    'Taguig': 'South Manila', 'BGC': 'South Manila', 'Pateros': 'South Manila',
+    'Paranaque': 'South Manila', 'Las Pinas': 'South Manila', 'Muntinlupa': 'South Manila'
+}
+METRO_WIDE_ZONE = 'Metro-wide'
+
+# Cost multiplier per priority: urgent tickets get the best fits and keep capacity when it runs short
+PRIORITY_WEIGHTS = {'Critical': 4.0, 'High': 3.0, 'Medium': 2.0, 'Low': 1.0}
+
+# Technicians with these statuses can take work; the value is a cost penalty
+ASSIGNABLE_STATUSES = {'Available': 0.0, 'Busy': 0.5}
+
+# Hours (start, end) of each shift; '24/7' technicians are always on
+SHIFT_HOURS = {'Day': (6, 18), 'Night': (18, 6)}
+
+# Per-ticket cost weights of each factor (before the priority multiplier); a wrong specialty
+# outweighs zone, shift and status together, so off-hours tickets wait for a specialist
+SKILL_WEIGHT = 6.0
+ZONE_WEIGHT = 1.5
+SPEED_WEIGHT = 1.0
+RATING_WEIGHT = 1.0
+SHIFT_WEIGHT = 2.0
+EMERGENCY_WEIGHT = 2.0
+# Marginal cost of each extra ticket grows with the technician's utilization, spreading the load
+LOAD_WEIGHT = 1.5
+# Leaving a ticket unassigned costs more than any assignment, so capacity is always used
+UNASSIGNED_COST = 50.0
+
+def solve_capacitated_assignment(costs: np.ndarray, slot_costs: List[np.ndarray]) -> np.ndarray:
+    """Min-cost assignment of every row to a column, column j taking at most len(slot_costs[j]) rows
+    
+    The k-th row placed in column j additionally pays slot_costs[j][k], which must be non-decreasing
+    (convex load cost). Solved as min-cost flow by successive shortest paths: each row is added along
+    the cheapest path that may shift already-assigned rows between columns, with Dijkstra over the
+    columns only (reduced costs via potentials), so the work scales with the number of technicians
+    rather than with their total capacity. Returns the column of each row.
+    """
+    rows, columns = costs.shape
+    assignment = np.full(rows, -1, dtype=np.int64)
+    members = [[] for _ in range(columns)]
+    load = np.zeros(columns, dtype=np.int64)
+    capacity = np.array([len(slots) for slots in slot_costs])
+    potential = np.zeros(columns)
+    sink_potential = 0.0
+    
+    # move_cost[a, b]: cheapest change in cost from moving one row of column a to column b, and which row
+    move_cost = np.full((columns, columns), np.inf)
+    move_row = np.full((columns, columns), -1, dtype=np.int64)
+    stale = np.zeros(columns, dtype=bool)
+    
+    def refresh(column: int):
+        """Recompute a column's cheapest outgoing moves after a row left it"""
+        if members[column]:
+            member_rows = np.array(members[column])
+            deltas = costs[member_rows] - costs[member_rows, column][:, None]
+            best = deltas.argmin(axis=0)
+            move_cost[column] = deltas[best, np.arange(columns)]
+            move_row[column] = member_rows[best]
+        else:
+            move_cost[column] = np.inf
+            move_row[column] = -1
+        stale[column] = False
+    
+    def add_member(row: int, column: int):
+        """Place a row in a column, updating its cheapest moves incrementally"""
+        members[column].append(row)
+        assignment[row] = column
+        deltas = costs[row] - costs[row, column]
+        better = deltas < move_cost[column]
+        move_cost[column][better] = deltas[better]
+        move_row[column][better] = row
+    
+    for row in range(rows):
+        # Dijkstra from the new row over reduced costs; distances are relative to the row itself
+        distance = costs[row] - potential
+        previous = np.full(columns, -1, dtype=np.int64)
+        visited = np.zeros(columns, dtype=bool)
+        best_sink = np.inf
+        sink_column = -1
+        
+        while True:
+            candidates = np.where(visited, np.inf, distance)
+            column = int(candidates.argmin())
+            if candidates[column] >= best_sink:
+                break
+            visited[column] = True
+            
+            if load[column] < capacity[column]:
+                through_sink = distance[column] + slot_costs[column][load[column]] + potential[column] - sink_potential
+                if through_sink < best_sink:
+                    best_sink = through_sink
+                    sink_column = column
+            
+            if members[column]:
+                if stale[column]:
+                    refresh(column)
+                relaxed = distance[column] + move_cost[column] + potential[column] - potential
+                improved = ~visited & (relaxed < distance)
+                distance[improved] = relaxed[improved]
+                previous[improved] = column
+        
+        # Keep reduced costs non-negative for the next search
+        potential += np.where(visited, np.minimum(distance, best_sink), best_sink)
+        sink_potential += best_sink
+        
+        # Walk the path back from the column that gains a row, shifting one row along each hop
+        column = sink_column
+        load[column] += 1
+        while previous[column] != -1:
+            source = previous[column]
+            moved = move_row[source, column]
+            members[source].remove(moved)
+            stale[source] = True
+            add_member(moved, column)
+            column = source
+        add_member(row, column)
+    
+    return assignment
+
+def is_on_shift(shift: str, now: datetime) -> bool:
+    """Whether a technician on this shift is working at the given time"""
+    if shift not in SHIFT_HOURS:
+        return True
+    start, end = SHIFT_HOURS[shift]
+    if start < end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+class TechnicianAssigner:
+    """Scores ticket/technician fit and assigns batches of tickets as a min-cost matching under capacity"""
+    
+    def __init__(self, technicians: List[Dict], workloads: Dict[str, int] = None, now: datetime = None):
+        self.technicians = [tech for tech in technicians if tech.get('status') in ASSIGNABLE_STATUSES]
+        self.workloads = {
+            tech.get('name'): (workloads or {}).get(tech.get('name'), tech.get('current_workload', 0))
+            for tech in self.technicians
+        }
+        self.now = now or datetime.now()
+        
+        specialties = [tech.get('specialty', '') for tech in self.technicians]
+        self.specialties = np.array(specialties, dtype=object)
+        self.zones = np.array([tech.get('zone', '') for tech in self.technicians], dtype=object)
+        self.capacities = np.array([tech.get('max_capacity', 0) for tech in self.technicians], dtype=float)
+        self.emergency_ready = np.array([bool(tech.get('emergency_response')) for tech in self.technicians])
+        
+        # Ticket-independent part of the cost: speed, rating, shift and status
+        hours = np.array([tech.get('avg_resolution_time_hours', 24.0) for tech in self.technicians], dtype=float)
+        ratings = np.array([tech.get('customer_rating', 4.0) for tech in self.technicians], dtype=float)
+        off_shift = np.array([not is_on_shift(tech.get('shift', 'Day'), self.now) for tech in self.technicians])
+        status_penalty = np.array([ASSIGNABLE_STATUSES[tech.get('status')] for tech in self.technicians])
+        self.base_costs = (
+            SPEED_WEIGHT * hours / max(hours.max(initial=1.0), 1.0)
+            + RATING_WEIGHT * (5.0 - ratings) / 5.0
+            + SHIFT_WEIGHT * off_shift
+            + status_penalty
+        )
+        
+        self._skill_costs = {}
+        self._zone_costs = {}
+    
+    def _skill_cost(self, category: str) -> np.ndarray:
+        """0 for the primary specialty, 0.4 for a covering one, 1 otherwise"""
+        if category not in self._skill_costs:
+            specialties = CATEGORY_SPECIALTIES.get(category)
+            if specialties is None:
+                # Unknown category: fall back to word overlap between category and specialty
+                words = set(category.lower().split())
+                matches = np.array([bool(words & set(specialty.lower().split())) for specialty in self.specialties], dtype=bool)
+                costs = np.where(matches, 0.4, 1.0)
+            else:
+                costs = np.where(np.isin(self.specialties, specialties[1:]), 0.4, 1.0)
+                costs[self.specialties == specialties[0]] = 0.0
+            self._skill_costs[category] = costs
+        return self._skill_costs[category]
+    
+    def _zone_cost(self, area: str) -> np.ndarray:
+        """0 for technicians covering the ticket's zone (or metro-wide), 1 otherwise"""
+        if area not in self._zone_costs:
+            zone = AREA_ZONES.get(area, area)
+            self._zone_costs[area] = np.where((self.zones == zone) | (self.zones == METRO_WIDE_ZONE), 0.0, 1.0)
+        return self._zone_costs[area]
+    
+    def pair_costs(self, tickets: List[Dict]) -> np.ndarray:
+        """Cost of giving each ticket (rows) to each technician (columns), ignoring load"""
+        costs = np.empty((len(tickets), len(self.technicians)))
+        for row, ticket in enumerate(tickets):
+            priority = ticket.get('priority', 'Medium')
+            costs[row] = PRIORITY_WEIGHTS.get(priority, 2.0) * (
+                SKILL_WEIGHT * self._skill_cost(ticket.get('category', ''))
+                + ZONE_WEIGHT * self._zone_cost(ticket.get('area', ''))
+                + EMERGENCY_WEIGHT * ((priority == 'Critical') & ~self.emergency_ready)
+                + self.base_costs
+            )
+        return costs
+    
+    def assign(self, tickets: List[Dict]) -> List[Dict]:
+        """Assign tickets to technicians with remaining capacity at minimum total cost, updating workloads"""
+        if not tickets:
+            return []
+        
+        pair_costs = self.pair_costs(tickets)
+        
+        # The k-th extra ticket of a technician pays for the utilization it creates
+        slot_costs = []
+        for column, tech in enumerate(self.technicians):
+            workload = self.workloads[tech.get('name')]
+            free_slots = int(min(max(self.capacities[column] - workload, 0), len(tickets)))
+            slot_costs.append(LOAD_WEIGHT * (workload + np.arange(1, free_slots + 1)) / self.capacities[column])
+        
+        # A final "unassigned" column with room for everyone; urgent tickets are the last to end up there
+        weights = np.array([PRIORITY_WEIGHTS.get(ticket.get('priority', 'Medium'), 2.0) for ticket in tickets])
+        costs = np.hstack([pair_costs, (UNASSIGNED_COST * weights)[:, None]])
+        slot_costs.append(np.zeros(len(tickets)))
+        
+        results = []
+        unassigned = len(self.technicians)
+        for row, column in enumerate(solve_capacitated_assignment(costs, slot_costs)):
+            if column != unassigned:
+                tech = self.technicians[column]
+                self.workloads[tech.get('name')] += 1
+                results.append({'ticket': tickets[row], 'technician': tech, 'cost': round(float(pair_costs[row, column]), 2)})
+            else:
+                results.append({'ticket': tickets[row], 'technician': None, 'cost': None})
+        return results
+    
+    def best_for(self, ticket: Dict) -> Dict:
+        """Best technician for a single ticket (empty dict if nobody has capacity)"""
+        result = self.assign([ticket])
+        return result[0]['technician'] or {}
@@ -0,0 +1,59 @@
+import re
+from typing import List
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Shorter words ('s' from "Water's", stray initials and digits) carry no meaning for matching
+MIN_WORD_LENGTH = 2
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'been', 'but', 'by', 'for', 'from', 'has', 'have',
+    'i', 'in', 'is', 'it', 'its', 'my', 'of', 'on', 'or', 'our', 'please', 'since', 'so', 'that',
+    'the', 'this', 'to', 'too', 'very', 'was', 'we', 'with', 'you', 'your'
+}
+
+# Words that say a text is a question rather than what it is about; retrieval leaves them out so
+# lists of common questions don't outrank the passages that answer them
+QUESTION_WORDS = {
+    'am', 'can', 'could', 'do', 'does', 'get', 'how', 'me', 'should', 'what', 'when', 'where', 'which', 'who', 'why', 'will'
+}
+
+# Long text is split into passages of whole sentences up to this many characters
+PASSAGE_CHARS = 400
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(])")
+
+
+def words(text: str, stopwords: set = STOPWORDS) -> List[str]:
+    """Lowercase words of a text, without stopwords and single characters"""
+    return [word for word in TOKEN_PATTERN.findall(text.lower()) if len(word) >= MIN_WORD_LENGTH and word not in stopwords]
+
+
+def stem(word: str) -> str:
+    """Very small suffix stripper so 'leaking', 'leaks' and 'leak' share a term"""
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str, stopwords: set = STOPWORDS) -> List[str]:
+    """Stemmed words of a text plus their bigrams"""
+    stems = [stem(word) for word in words(text, stopwords)]
+    return stems + [f"{first}_{second}" for first, second in zip(stems, stems[1:])]
+
+
+def terms(text: str) -> List[str]:
+    """Retrieval terms of a text: its tokens, without question words"""
+    return tokenize(text, STOPWORDS | QUESTION_WORDS)
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS) -> List[str]:
+    """Group consecutive sentences into passages of at most max_chars (longer sentences stay whole)"""
+    passages = []
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        if passages and len(passages[-1]) + 1 + len(sentence) <= max_chars:
+            passages[-1] += ' ' + sentence
+        elif sentence:
+            passages.append(sentence)
+    return passages
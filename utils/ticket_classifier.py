@@ -0,0 +1,158 @@
+import re
+import numpy as np
+import streamlit as st
+from typing import Dict, List
+from utils.data_processor import get_data_processor
+from utils.text import tokenize
+
+# Words in a ticket that call for a higher priority than its category's default. A confident local
+# classification skips the LLM, so these stand in for its reading of urgency; they only ever raise it.
+PRIORITY_ORDER = ['Low', 'Medium', 'High', 'Critical']
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
+URGENCY_PHRASES = {
+    'Critical': ['burst', 'flood', 'sinkhole', 'sewage', 'contaminated', 'poisoning', 'diarrhea',
+                 'hospital', 'injured', 'injury', 'emergency', 'collapsed'],
+    'High': ['no water', 'no supply', 'without water', 'urgent', 'asap', 'gushing', 'spraying', 'overflowing']
+}
+# An outage lasting days is critical whatever words describe it
+LONG_OUTAGE = re.compile(r"\b(no|without)\s+(water|supply)\b.*?\b(\d+|several|many|two|three|four|five)\s+(days?|weeks?)\b")
+
+def urgency_priority(ticket_description: str) -> tuple:
+    """Priority implied by urgency words in a ticket (None if there are none) and the words that matched"""
+    text = ticket_description.lower()
+    outage = LONG_OUTAGE.search(text)
+    if outage:
+        return 'Critical', [outage.group(0)]
+    tokens = set(tokenize(text))
+    for priority in reversed(PRIORITY_ORDER):
+        # A phrase's last token is its bigram (or the word itself), so phrases match on the ticket's tokens
+        matched = [phrase for phrase in URGENCY_PHRASES.get(priority, []) if tokenize(phrase)[-1] in tokens]
+        if matched:
+            return priority, matched
+    return None, []
+
+class LocalTicketClassifier:
+    """TF-IDF nearest-centroid ticket classifier trained on data/tickets.json"""
+    
+    def __init__(self, temperature: float = 0.1):
+        self.temperature = temperature
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0)
+        self.centroids = np.zeros((0, 0))
+        self.category_names: List[str] = []
+        self.default_priorities: Dict[str, str] = {}
+    
+    def fit(self, tickets_data: Dict) -> "LocalTicketClassifier":
+        """Build one TF-IDF centroid per category from names, typical solutions, sample tickets and the knowledge base"""
+        categories = tickets_data.get('ticket_categories', [])
+        self.category_names = [cat['name'] for cat in categories]
+        self.default_priorities = {cat['name']: cat.get('priority_default', 'Medium') for cat in categories}
+        
+        documents = {
+            cat['name']: [cat['name'], cat['name'], cat.get('department', '')] + cat.get('typical_solutions', [])
+            for cat in categories
+        }
+        for ticket in tickets_data.get('sample_tickets', []):
+            if ticket.get('category') in documents:
+                documents[ticket['category']].append(ticket.get('description', ''))
+        self._fit_documents(documents)
+        
+        # Knowledge base entries carry no category, so attach each one to its nearest category and refit
+        for solution in tickets_data.get('knowledge_base', {}).get('common_solutions', []):
+            text = " ".join([solution.get('issue', '')] + solution.get('causes', []) + solution.get('troubleshooting_steps', []))
+            scores = self._similarities(solution.get('issue', ''))
+            if scores.any():
+                documents[self.category_names[int(scores.argmax())]].append(text)
+        self._fit_documents(documents)
+        
+        return self
+    
+    def _fit_documents(self, documents: Dict[str, List[str]]):
+        """Compute vocabulary, IDF weights and L2-normalized category centroids"""
+        tokenized = [tokenize(" ".join(documents[name])) for name in self.category_names]
+        self.vocabulary = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+        
+        counts = np.zeros((len(tokenized), len(self.vocabulary)))
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                counts[row, self.vocabulary[token]] += 1
+        
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = np.log((1 + len(tokenized)) / (1 + document_frequency)) + 1
+        self.centroids = self._normalize(np.log1p(counts) * self.idf)
+    
+    def _normalize(self, matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows, leaving all-zero rows untouched"""
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+    
+    def _vectorize(self, text: str) -> np.ndarray:
+        """TF-IDF vector for text over the fitted vocabulary"""
+        vector = np.zeros(len(self.vocabulary))
+        for token in tokenize(text):
+            index = self.vocabulary.get(token)
+            if index is not None:
+                vector[index] += 1
+        return self._normalize(np.log1p(vector) * self.idf)
+    
+    def _similarities(self, text: str) -> np.ndarray:
+        """Cosine similarity of text against every category centroid"""
+        if not self.vocabulary:
+            return np.zeros(len(self.category_names))
+        return self.centroids @ self._vectorize(text)
+    
+    def classify(self, ticket_description: str, categories: List[Dict] = None) -> Dict:
+        """Classify a ticket, returning the same shape as AIModelManager.classify_ticket plus 'source'"""
+        scores = self._similarities(ticket_description)
+        
+        # Only consider the categories the caller offers
+        allowed = {cat['name'] for cat in categories} if categories else set(self.category_names)
+        mask = np.array([name in allowed for name in self.category_names], dtype=bool)
+        if not mask.any() or not scores[mask].any():
+            return {
+                "category": "General Inquiry",
+                "priority": "Medium",
+                "confidence": 0.0,
+                "reasoning": "Local classifier found no matching keywords",
+                "source": "local"
+            }
+        
+        candidate_scores = np.where(mask, scores, -np.inf)
+        probabilities = np.exp((candidate_scores - candidate_scores.max()) / self.temperature)
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        category = self.category_names[best]
+        
+        matched = [token for token in dict.fromkeys(tokenize(ticket_description))
+                   if token in self.vocabulary and self.centroids[best, self.vocabulary[token]] > 0 and '_' not in token]
+        
+        reasoning = f"Local classifier matched: {', '.join(matched[:5])}"
+        priority = self.default_priorities.get(category, 'Medium')
+        urgent_priority, urgent_words = urgency_priority(ticket_description)
+        if urgent_priority and PRIORITY_RANK[urgent_priority] > PRIORITY_RANK.get(priority, -1):
+            priority = urgent_priority
+            reasoning += f"; raised to {priority} for: {', '.join(urgent_words[:3])}"
+        
+        return {
+            "category": category,
+            "priority": priority,
+            "confidence": round(float(probabilities[best]), 2),
+            "reasoning": reasoning,
+            "source": "local"
+        }
+
+# Initialize global instance
+@st.cache_resource(max_entries=1)
+def _fit_ticket_classifier(tickets_version: int, _data_processor):
+    # Sample tickets may come from an Arrow/Parquet table rather than the JSON
+    tickets_data = dict(_data_processor.get_dataset('tickets'), sample_tickets=_data_processor.get_sample_tickets())
+    return LocalTicketClassifier().fit(tickets_data)
+
+def get_ticket_classifier():
+    data_processor = get_data_processor()
+    data_processor.get_dataset('tickets')
+    # Keyed on the tickets data version so a hot-reloaded tickets.json refits the classifier
+    return _fit_ticket_classifier(data_processor.get_data_version('tickets'), data_processor)
@@ -0,0 +1,362 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Any
+
+import streamlit as st
+
+from utils.data_processor import get_data_processor
+
+TICKET_DB_PATH = 'data/tickets.db'
+
+# Columns stored natively (and indexed where filtered on); everything else lives in the JSON 'extra' column
+TICKET_COLUMNS = [
+    'id', 'description', 'customer_name', 'customer_contact', 'area', 'status',
+    'priority', 'category', 'assigned_tech', 'created_date'
+]
+INDEXED_COLUMNS = ['status', 'priority', 'category', 'area', 'created_date']
+FILTER_COLUMNS = ['status', 'priority', 'category', 'area', 'assigned_tech']
+
+PRIORITY_ORDER = ['Critical', 'High', 'Medium', 'Low']
+STATUS_ORDER = ['New', 'In Progress', 'Resolved', 'Closed']
+# Every other status (the sample data has Assessment, Dispatched, Scheduled, ...) counts as open work
+CLOSED_STATUSES = ['Resolved', 'Closed']
+
+TICKET_ID_PREFIX = 'TKT'
+
+def _ticket_number(column: str) -> str:
+    """SQL expression for the number in a TKT id ('TKT042' -> 42)"""
+    return f"CAST(substr({column}, {len(TICKET_ID_PREFIX) + 1}) AS INTEGER)"
+
+def _rank_expression(column: str, order: List[str]) -> str:
+    """SQL CASE expression ranking a column by a fixed value order, unknown values last"""
+    cases = " ".join(f"WHEN '{value}' THEN {rank}" for rank, value in enumerate(order))
+    return f"CASE {column} {cases} ELSE {len(order)} END"
+
+def _status_rank_expression() -> str:
+    """SQL status sort key: open statuses before closed ones, each group in STATUS_ORDER with unknown statuses last"""
+    closed = ", ".join(f"'{status}'" for status in CLOSED_STATUSES)
+    return f"(CASE WHEN status IN ({closed}) THEN {len(STATUS_ORDER) + 1} ELSE 0 END + {_rank_expression('status', STATUS_ORDER)})"
+
+# Sort keys offered to the UI -> ORDER BY expression; ties break on creation order in the same direction
+SORT_EXPRESSIONS = {
+    'created_date': 'created_date',
+    'priority': _rank_expression('priority', PRIORITY_ORDER),
+    'status': _status_rank_expression()
+}
+
+# Counters kept in ticket_stats by triggers: dimension -> expression over a tickets row
+STATS_DIMENSIONS = {
+    'status': '{row}.status',
+    'priority': '{row}.priority',
+    'category': '{row}.category',
+    'area': '{row}.area',
+    'created_day': 'substr({row}.created_date, 1, 10)'
+}
+
+def _stats_statements(row: str, delta: int) -> str:
+    """Trigger body adding delta to every counter of the NEW or OLD row"""
+    return " ".join(
+        f"INSERT INTO ticket_stats (dimension, value, count) "
+        f"VALUES ('{dimension}', COALESCE({expression.format(row=row)}, 'Unknown'), {delta}) "
+        f"ON CONFLICT (dimension, value) DO UPDATE SET count = count + {delta};"
+        for dimension, expression in STATS_DIMENSIONS.items()
+    )
+
+class TicketStore:
+    """SQLite ticket store (WAL mode) shared by every Streamlit session"""
+    
+    def __init__(self, db_path: str = TICKET_DB_PATH):
+        self.db_path = db_path
+        # Streamlit serves sessions from several threads; each gets its own connection
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._create_schema()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            # WAL lets page renders keep reading while another session writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+    
+    def _create_schema(self):
+        """Create the tickets table and its indexes if they don't exist"""
+        connection = self._connection()
+        columns = ", ".join(f"{column} TEXT" for column in TICKET_COLUMNS if column != 'id')
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS tickets (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+            f"id TEXT UNIQUE NOT NULL, {columns}, extra TEXT NOT NULL DEFAULT '{{}}')"
+        )
+        for column in INDEXED_COLUMNS:
+            connection.execute(f"CREATE INDEX IF NOT EXISTS idx_tickets_{column} ON tickets ({column})")
+        
+        # Per-dimension counters maintained by triggers: O(1) work per insert or status change,
+        # shared by every process, and read back as one tiny table instead of GROUP BYs per rerun
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS ticket_stats ("
+            "dimension TEXT NOT NULL, value TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (dimension, value))"
+        )
+        connection.execute(f"CREATE TRIGGER IF NOT EXISTS ticket_stats_insert AFTER INSERT ON tickets BEGIN {_stats_statements('NEW', 1)} END")
+        connection.execute(f"CREATE TRIGGER IF NOT EXISTS ticket_stats_delete AFTER DELETE ON tickets BEGIN {_stats_statements('OLD', -1)} END")
+        connection.execute(
+            f"CREATE TRIGGER IF NOT EXISTS ticket_stats_update AFTER UPDATE ON tickets BEGIN "
+            f"{_stats_statements('OLD', -1)} {_stats_statements('NEW', 1)} END"
+        )
+        
+        # Change log for incremental readers: the latest revision at which each ticket was written
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS ticket_changes (ticket_id TEXT PRIMARY KEY, revision INTEGER NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_ticket_changes_revision ON ticket_changes (revision)")
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            connection.execute(
+                f"CREATE TRIGGER IF NOT EXISTS ticket_changes_{event.lower()} AFTER {event} ON tickets BEGIN "
+                f"INSERT INTO ticket_changes (ticket_id, revision) "
+                f"VALUES ({row}.id, (SELECT COALESCE(MAX(revision), 0) + 1 FROM ticket_changes)) "
+                f"ON CONFLICT (ticket_id) DO UPDATE SET revision = excluded.revision; END"
+            )
+        
+        # Highest TKT number ever handed out or inserted: new ids come from here rather than from the
+        # row count or MAX(seq), so seeded, imported or deleted tickets never lead to a reused id
+        connection.execute("CREATE TABLE IF NOT EXISTS ticket_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute(
+            f"CREATE TRIGGER IF NOT EXISTS ticket_id_counter AFTER INSERT ON tickets WHEN NEW.id GLOB '{TICKET_ID_PREFIX}[0-9]*' BEGIN "
+            f"INSERT INTO ticket_counters (name, value) VALUES ('ticket_id', {_ticket_number('NEW.id')}) "
+            f"ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value); END"
+        )
+        
+        # Databases created before the counters existed are backfilled once
+        if not connection.execute("SELECT 1 FROM ticket_stats LIMIT 1").fetchone():
+            self.rebuild_stats()
+        if not connection.execute("SELECT 1 FROM ticket_counters WHERE name = 'ticket_id'").fetchone():
+            connection.execute(
+                f"INSERT OR IGNORE INTO ticket_counters (name, value) "
+                f"SELECT 'ticket_id', COALESCE(MAX({_ticket_number('id')}), 0) FROM tickets WHERE id GLOB '{TICKET_ID_PREFIX}[0-9]*'"
+            )
+    
+    def rebuild_stats(self):
+        """Recompute every counter from the tickets table"""
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM ticket_stats")
+                for dimension, expression in STATS_DIMENSIONS.items():
+                    value = f"COALESCE({expression.format(row='tickets')}, 'Unknown')"
+                    connection.execute(
+                        f"INSERT INTO ticket_stats (dimension, value, count) "
+                        f"SELECT '{dimension}', {value}, COUNT(*) FROM tickets GROUP BY 2"
+                    )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+    
+    def _row_to_ticket(self, row: sqlite3.Row) -> Dict:
+        """Rebuild the ticket dict: native columns win over anything stored in 'extra'"""
+        ticket = json.loads(row['extra'])
+        for column in TICKET_COLUMNS:
+            if row[column] is not None:
+                ticket[column] = row[column]
+        return ticket
+    
+    def _insert(self, connection: sqlite3.Connection, ticket: Dict, ignore_existing: bool = False):
+        """Insert one ticket; an id that already exists raises sqlite3.IntegrityError unless ignore_existing"""
+        extra = {key: value for key, value in ticket.items() if key not in TICKET_COLUMNS}
+        connection.execute(
+            f"INSERT {'OR IGNORE ' if ignore_existing else ''}INTO tickets ({', '.join(TICKET_COLUMNS)}, extra) "
+            f"VALUES ({', '.join('?' for _ in TICKET_COLUMNS)}, ?)",
+            [ticket.get(column) for column in TICKET_COLUMNS] + [json.dumps(extra, default=str)]
+        )
+    
+    def seed_if_empty(self, tickets: List[Dict]) -> int:
+        """Load initial tickets into an empty store; returns how many were inserted"""
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if connection.execute("SELECT 1 FROM tickets LIMIT 1").fetchone():
+                    connection.execute("COMMIT")
+                    return 0
+                for ticket in tickets:
+                    self._insert(connection, ticket, ignore_existing=True)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return len(tickets)
+    
+    def add_ticket(self, ticket: Dict) -> str:
+        """Persist a new ticket, assigning the next TKT id if it has none; returns the id (raises if the id is taken)"""
+        with self._write_lock:
+            connection = self._connection()
+            # IMMEDIATE takes the write lock up front so two processes can't hand out the same id
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                ticket = dict(ticket)
+                if not ticket.get('id'):
+                    connection.execute("UPDATE ticket_counters SET value = value + 1 WHERE name = 'ticket_id'")
+                    next_number = connection.execute("SELECT value FROM ticket_counters WHERE name = 'ticket_id'").fetchone()[0]
+                    ticket['id'] = f"{TICKET_ID_PREFIX}{next_number:03d}"
+                self._insert(connection, ticket)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return ticket['id']
+    
+    def update_status(self, ticket_id: str, status: str) -> bool:
+        """Set a ticket's status, stamping actual_resolution when it closes; returns False if the ticket doesn't exist"""
+        if status in CLOSED_STATUSES:
+            extra = "json_set(extra, '$.actual_resolution', ?)"
+            params = (status, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), ticket_id)
+        else:
+            # Reopened tickets are open again until they close anew
+            extra = "json_remove(extra, '$.actual_resolution')"
+            params = (status, ticket_id)
+        with self._write_lock:
+            cursor = self._connection().execute(f"UPDATE tickets SET status = ?, extra = {extra} WHERE id = ?", params)
+        return cursor.rowcount > 0
+    
+    def assign_technicians(self, assignments: Dict[str, str]) -> int:
+        """Set assigned_tech for many tickets (id -> technician name) in one transaction; returns rows updated"""
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                updated = sum(
+                    connection.execute("UPDATE tickets SET assigned_tech = ? WHERE id = ?", (tech, ticket_id)).rowcount
+                    for ticket_id, tech in assignments.items()
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return updated
+    
+    def get_ticket(self, ticket_id: str) -> Dict:
+        """Get one ticket by id"""
+        row = self._connection().execute("SELECT * FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        return self._row_to_ticket(row) if row else {}
+    
+    def _where(self, filters: Dict[str, Any]) -> tuple:
+        """WHERE clause and parameters for equality filters, a created_date range and open_only"""
+        clauses = []
+        params = []
+        for column in FILTER_COLUMNS:
+            value = filters.get(column)
+            if value and value != 'All':
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if filters.get('created_from'):
+            clauses.append("created_date >= ?")
+            params.append(filters['created_from'])
+        if filters.get('created_to'):
+            clauses.append("created_date < ?")
+            params.append(filters['created_to'])
+        if filters.get('open_only'):
+            clauses.append(f"status NOT IN ({', '.join('?' for _ in CLOSED_STATUSES)})")
+            params.extend(CLOSED_STATUSES)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+    
+    def list_tickets(self, sort_by: str = 'created_date', descending: bool = True, limit: int = None, **filters) -> List[Dict]:
+        """List tickets matching the filters (status, priority, category, area, assigned_tech, created_from/to, open_only), sorted in SQL"""
+        where, params = self._where(filters)
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT * FROM tickets{where} ORDER BY {SORT_EXPRESSIONS[sort_by]} {direction}, seq {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [self._row_to_ticket(row) for row in self._connection().execute(sql, params)]
+    
+    def list_tickets_page(self, page_size: int = 25, cursor: tuple = None, sort_by: str = 'created_date', descending: bool = True, **filters) -> tuple:
+        """One page of tickets by keyset pagination; returns (tickets, cursor of the next page or None)"""
+        where, params = self._where(filters)
+        expression = SORT_EXPRESSIONS[sort_by]
+        direction = "DESC" if descending else "ASC"
+        
+        if cursor is not None:
+            # Resume strictly after the previous page's last (sort key, seq); on created_date this is an
+            # index seek, so deep pages cost the same as the first one instead of scanning an OFFSET
+            comparison = "<" if descending else ">"
+            keyset = f"({expression}, seq) {comparison} (?, ?)"
+            where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+            params += list(cursor)
+        
+        rows = self._connection().execute(
+            f"SELECT *, {expression} AS sort_value FROM tickets{where} "
+            f"ORDER BY {expression} {direction}, seq {direction} LIMIT ?",
+            params + [page_size + 1]
+        ).fetchall()
+        
+        # One extra row tells us whether a next page exists without a second query
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1]['sort_value'], rows[-1]['seq'])
+        return [self._row_to_ticket(row) for row in rows], next_cursor
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of the trigger-maintained counters: one {value: count} dict per dimension plus 'total'"""
+        stats = {dimension: {} for dimension in STATS_DIMENSIONS}
+        rows = self._connection().execute(
+            "SELECT dimension, value, count FROM ticket_stats WHERE count > 0 ORDER BY count DESC, value"
+        )
+        for dimension, value, count in rows:
+            if dimension in stats:
+                stats[dimension][value] = count
+        stats['total'] = sum(stats['status'].values())
+        return stats
+    
+    def count_tickets(self, **filters) -> int:
+        """Count tickets matching the filters"""
+        if not any(value and value != 'All' for value in filters.values()):
+            return self.get_stats()['total']
+        where, params = self._where(filters)
+        return self._connection().execute(f"SELECT COUNT(*) FROM tickets{where}", params).fetchone()[0]
+    
+    def count_by(self, column: str, **filters) -> Dict[str, int]:
+        """Count tickets per value of a column (status, priority, category, area, assigned_tech)"""
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Cannot group tickets by {column}")
+        where, params = self._where(filters)
+        rows = self._connection().execute(
+            f"SELECT COALESCE({column}, 'Unknown'), COUNT(*) FROM tickets{where} GROUP BY 1 ORDER BY 2 DESC",
+            params
+        )
+        return {value: count for value, count in rows}
+    
+    def count_open_by_technician(self) -> Dict[str, int]:
+        """Count open (not resolved or closed) tickets per assigned technician"""
+        return {tech: count for tech, count in self.count_by('assigned_tech', open_only=True).items() if tech not in ('Unknown', 'Unassigned')}
+    
+    def get_revision(self) -> int:
+        """Latest change revision; it grows with every insert, update or delete"""
+        return self._connection().execute("SELECT COALESCE(MAX(revision), 0) FROM ticket_changes").fetchone()[0]
+    
+    def changes_since(self, revision: int) -> tuple:
+        """Ids of tickets written after a revision; returns (latest revision, ids)"""
+        rows = self._connection().execute(
+            "SELECT ticket_id, revision FROM ticket_changes WHERE revision > ? ORDER BY revision", (revision,)
+        ).fetchall()
+        if not rows:
+            return revision, []
+        return rows[-1]['revision'], [row['ticket_id'] for row in rows]
+    
+    def count_created_on(self, day: datetime) -> int:
+        """Count tickets created on a calendar day"""
+        return self.get_stats()['created_day'].get(day.strftime('%Y-%m-%d'), 0)
+
+# Initialize global instance
+@st.cache_resource
+def get_ticket_store():
+    store = TicketStore()
+    store.seed_if_empty(get_data_processor().get_sample_tickets())
+    return store